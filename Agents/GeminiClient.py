@@ -1,30 +1,207 @@
-import logging, requests
+import asyncio
+import logging, os, random, requests, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Optional, Tuple
 from dotenv import load_dotenv
-from Globals.Constants import Gemini_Api_Url, Gemini_Key
+from requests.adapters import HTTPAdapter
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Agents.GeminiOverloadedException import GeminiOverloadedException
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+from Helpers.CircuitBreaker import CircuitBreaker
+from Helpers.ConcurrencyLimiter import ConcurrencyFull, ConcurrencyLimiter
+from Helpers.Metrics import metrics
+from Globals.Constants import OVERLOAD_RETRY_AFTER
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+gemini_request_seconds = metrics.histogram("gemini_request_seconds", "Latency of Gemini API calls by outcome",
+                                           ["outcome"])
+_gemini_ok = gemini_request_seconds.labels("ok")
+_gemini_error = gemini_request_seconds.labels("error")
+gemini_retries = metrics.counter("gemini_retries_total", "Gemini attempts retried after a transient failure")
+gemini_hedges = metrics.counter("gemini_hedges_total", "Hedged Gemini requests sent after the p95 delay")
+gemini_rejections = metrics.counter("gemini_circuit_rejections_total",
+                                    "Gemini calls refused while the circuit is open")
+gemini_shed = metrics.counter("gemini_admission_rejections_total",
+                              "Gemini calls shed because the in-flight cap and its wait queue were full")
+gemini_admission_wait = metrics.histogram("gemini_admission_wait_seconds",
+                                          "Time Gemini calls waited for an in-flight slot").labels()
+
+_transport_lock = Lock()
+_transports = {}
+
+
+def _get_transport(max_connections: int) -> Tuple[requests.Session, ThreadPoolExecutor]:
+    """Get the process-wide pooled session and its executor, creating them on first use"""
+    key = (os.getpid(), max_connections)
+    with _transport_lock:
+        transport = _transports.get(key)
+        if transport is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="gemini")
+            transport = (session, executor)
+            _transports[key] = transport
+        return transport
+
+
+class _AttemptFailed(Exception):
+    def __init__(self, message: str, retryable: bool):
+        self.retryable = retryable
+        super().__init__(message)
+
+
+class _LatencyWindow:
+    """Recent successful call latencies, for picking the hedging delay"""
+
+    def __init__(self, size: int, quantile: float, min_samples: int):
+        self._samples = deque(maxlen=size)
+        self._quantile = quantile
+        self._min_samples = min_samples
+        self._lock = Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self) -> Optional[float]:
+        """The configured quantile, or None until there are enough samples to trust it"""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self._quantile))]
+
+
 class GeminiClient:
-    def __init__(self):
-        self.api_key = Gemini_Key
-        self.api_url = Gemini_Api_Url
+    def __init__(self, options: Optional[GeminiClientOptions] = None):
+        self._options = options or GeminiClientOptions()
+        self.api_key = self._options.api_key
+        self.api_url = self._options.api_url
+        self._session, self._executor = _get_transport(self._options.max_connections)
+        self.breaker = CircuitBreaker("gemini", self._options.breaker_failures, self._options.breaker_cooldown)
+        self._latencies = _LatencyWindow(self._options.latency_window, self._options.hedge_quantile,
+                                         self._options.hedge_min_samples)
+        self.admission = ConcurrencyLimiter(self._options.max_in_flight, self._options.max_queued,
+                                            self._options.queue_timeout)
 
     async def chat(self, prompt: str) -> str:
-        """Chat with Gemini AI"""
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
+        """Chat with Gemini AI within the deadline budget and the in-flight cap, retrying transient failures"""
+        start = time.perf_counter()
+        try:
+            await self.admission.acquire()
+        except ConcurrencyFull as ex:
+            gemini_shed.inc()
+            raise GeminiOverloadedException(str(ex), OVERLOAD_RETRY_AFTER)
+        gemini_admission_wait.observe(time.perf_counter() - start)
+        try:
+            return await self._chat(prompt)
+        finally:
+            self.admission.release()
+
+    async def _chat(self, prompt: str) -> str:
+        # Checked once a slot is held, so a half-open probe is never lost to a full queue
+        if not self.breaker.allow():
+            gemini_rejections.inc()
+            raise GeminiUnavailableException("circuit open")
+
         body = {"contents": [{"parts": [{"text": prompt}]}]}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._options.deadline
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                try:
+                    text = await self._hedged_attempt(body, deadline)
+                    self.breaker.record_success()
+                    return text
+                except _AttemptFailed as ex:
+                    if not ex.retryable:
+                        # The upstream answered, so it is alive even though this request cannot succeed
+                        self.breaker.record_success()
+                        raise GeminiUnavailableException(str(ex))
+                    self.breaker.record_failure()
+                    delay = random.uniform(0, min(self._options.retry_max_delay,
+                                                  self._options.retry_base_delay * 2 ** (attempt - 1)))
+                    if attempt >= self._options.max_attempts or loop.time() + delay >= deadline \
+                            or not self.breaker.allow():
+                        logger.error(f"Error communicating with Gemini API after {attempt} attempts: {ex}")
+                        raise GeminiUnavailableException(str(ex))
+                    logger.warning(f"Gemini attempt {attempt} failed ({ex}); retrying in {delay:.2f}s")
+                    gemini_retries.inc()
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            # The caller gave up, which says nothing about Gemini's health
+            self.breaker.release_probe()
+            raise
+
+    async def _hedged_attempt(self, body: dict, deadline: float) -> str:
+        """One attempt, duplicated once if it is still running after the recent p95 latency"""
+        loop = asyncio.get_running_loop()
+        pending = {asyncio.ensure_future(self._post(body, deadline))}
+        hedge_delay = self._latencies.quantile() if self._options.hedge else None
+        if hedge_delay is not None:
+            hedge_delay = max(hedge_delay, self._options.hedge_min_delay)
+            if loop.time() + hedge_delay < deadline:
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    gemini_hedges.inc()
+                    pending.add(asyncio.ensure_future(self._post(body, deadline)))
 
+        failure = None
         try:
-            response = requests.post(self.api_url, headers=headers, params=params, json=body)
-            response.raise_for_status()
-            return response.json()['candidates'][0]['content']['parts'][0]['text']
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, deadline - loop.time()),
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise _AttemptFailed("deadline exceeded", retryable=True)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    failure = task.exception()
+            raise failure
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post(self, body: dict, deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        read_timeout = min(self._options.read_timeout, max(0.001, deadline - loop.time()))
+        timeout = (self._options.connect_timeout, read_timeout)
+        start = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(
+                self._executor,
+                partial(self._session.post, self.api_url, headers={"Content-Type": "application/json"},
+                        params={"key": self.api_key}, json=body, timeout=timeout)
+            )
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error communicating with Gemini API: {e}")
-            return "I'm sorry, I couldn't connect to the AI service at the moment."
-        except (KeyError, IndexError):
-            logger.error("Unexpected response format from Gemini API.")
-            return "I'm sorry, I received an unexpected response from the AI service."
+            _gemini_error.observe(time.perf_counter() - start)
+            raise _AttemptFailed(f"request failed: {e}", retryable=True)
+
+        elapsed = time.perf_counter() - start
+        if response.status_code == 429 or response.status_code >= 500:
+            _gemini_error.observe(elapsed)
+            raise _AttemptFailed(f"HTTP {response.status_code}", retryable=True)
+        try:
+            response.raise_for_status()
+            text = response.json()['candidates'][0]['content']['parts'][0]['text']
+        except requests.exceptions.HTTPError as e:
+            _gemini_error.observe(elapsed)
+            raise _AttemptFailed(f"request rejected: {e}", retryable=False)
+        except (ValueError, KeyError, IndexError, TypeError):
+            _gemini_error.observe(elapsed)
+            raise _AttemptFailed("unexpected response format", retryable=False)
+
+        _gemini_ok.observe(elapsed)
+        self._latencies.add(elapsed)
+        return text
@@ -0,0 +1,36 @@
+from Globals.Constants import Gemini_Api_Url, Gemini_Key, GEMINI_CONNECT_TIMEOUT, GEMINI_READ_TIMEOUT, \
+    GEMINI_MAX_CONNECTIONS, GEMINI_DEADLINE, GEMINI_MAX_ATTEMPTS, GEMINI_RETRY_BASE_DELAY, GEMINI_RETRY_MAX_DELAY, \
+    GEMINI_HEDGE, GEMINI_HEDGE_QUANTILE, GEMINI_HEDGE_MIN_DELAY, GEMINI_HEDGE_MIN_SAMPLES, GEMINI_LATENCY_WINDOW, \
+    GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_COOLDOWN, GEMINI_MAX_IN_FLIGHT, GEMINI_MAX_QUEUED, GEMINI_QUEUE_TIMEOUT
+
+
+class GeminiClientOptions:
+    def __init__(self, api_url: str = Gemini_Api_Url, api_key: str = Gemini_Key,
+                 connect_timeout: float = GEMINI_CONNECT_TIMEOUT, read_timeout: float = GEMINI_READ_TIMEOUT,
+                 max_connections: int = GEMINI_MAX_CONNECTIONS, deadline: float = GEMINI_DEADLINE,
+                 max_attempts: int = GEMINI_MAX_ATTEMPTS, retry_base_delay: float = GEMINI_RETRY_BASE_DELAY,
+                 retry_max_delay: float = GEMINI_RETRY_MAX_DELAY, hedge: bool = GEMINI_HEDGE,
+                 hedge_quantile: float = GEMINI_HEDGE_QUANTILE, hedge_min_delay: float = GEMINI_HEDGE_MIN_DELAY,
+                 hedge_min_samples: int = GEMINI_HEDGE_MIN_SAMPLES, latency_window: int = GEMINI_LATENCY_WINDOW,
+                 breaker_failures: int = GEMINI_BREAKER_FAILURES, breaker_cooldown: float = GEMINI_BREAKER_COOLDOWN,
+                 max_in_flight: int = GEMINI_MAX_IN_FLIGHT, max_queued: int = GEMINI_MAX_QUEUED,
+                 queue_timeout: float = GEMINI_QUEUE_TIMEOUT):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
@@ -0,0 +1,7 @@
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+
+
+class GeminiOverloadedException(GeminiUnavailableException):
+    def __init__(self, reason: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(reason)
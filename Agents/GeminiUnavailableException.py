@@ -0,0 +1,4 @@
+class GeminiUnavailableException(Exception):
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(f"Gemini is unavailable: {reason}")
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+from typing import Iterable, Iterator, List, Optional, Union
+from Agents.McpServer import McpServer
+from Globals.Constants import Swagger_Title, Swagger_Version, MCP_PROTOCOL_VERSION, MCP_MAX_BATCH_MESSAGES, \
+    MCP_SSE_CHUNK_BYTES
+from Models.ToolResult import RowSetResult, ToolResult, encode_json
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+supported_protocol_versions = {"2024-11-05", "2025-03-26", MCP_PROTOCOL_VERSION}
+
+
+class InvalidParamsError(ValueError):
+    """Raised by a method handler when the request parameters cannot be used"""
+
+
+def error_response(message_id, code: int, message: str) -> dict:
+    """JSON-RPC error response"""
+    return {"jsonrpc": "2.0", "id": message_id, "error": {"code": code, "message": message}}
+
+
+class McpJsonRpc:
+    """Answers MCP JSON-RPC messages by dispatching tool calls straight into the MCP server, without any planning"""
+
+    def __init__(self, mcp_server: McpServer):
+        self._mcp_server = mcp_server
+        self._tools = {
+            "tools": [{"name": tool.name, "description": tool.description, "inputSchema": tool.input_schema}
+                      for tool in mcp_server.list_tools()]
+        }
+        self._tool_names = {tool["name"] for tool in self._tools["tools"]}
+        self._methods = {
+            "initialize": self._initialize,
+            "ping": self._ping,
+            "tools/list": self._list_tools,
+            "tools/call": self._call_tool
+        }
+
+    async def handle(self, payload) -> Union[dict, List[dict], None]:
+        """Response to a single message or batch, or None when nothing needs an answer"""
+        if not isinstance(payload, list):
+            return await self.handle_message(payload)
+        if not payload:
+            return error_response(None, INVALID_REQUEST, "Invalid Request: empty batch")
+        if len(payload) > MCP_MAX_BATCH_MESSAGES:
+            return error_response(None, INVALID_REQUEST,
+                                  f"Invalid Request: a batch can hold at most {MCP_MAX_BATCH_MESSAGES} messages")
+
+        responses = [response for response in await asyncio.gather(*map(self.handle_message, payload))
+                     if response is not None]
+        return responses or None
+
+    async def handle_message(self, message) -> Optional[dict]:
+        """Response to one message; notifications and client responses get none"""
+        if not isinstance(message, dict):
+            return error_response(None, INVALID_REQUEST, "Invalid Request")
+        if "method" not in message and ("result" in message or "error" in message):
+            return None
+
+        message_id = message.get("id")
+        if message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str) \
+                or not isinstance(message_id, (str, int, type(None))):
+            return error_response(message_id if isinstance(message_id, (str, int)) else None,
+                                  INVALID_REQUEST, "Invalid Request")
+        if "id" not in message:
+            return None
+
+        method = self._methods.get(message["method"])
+        if method is None:
+            return error_response(message_id, METHOD_NOT_FOUND, f"Method not found: {message['method']}")
+
+        params = message.get("params")
+        if params is None:
+            params = {}
+        if not isinstance(params, dict):
+            return error_response(message_id, INVALID_PARAMS, "Invalid params: expected an object")
+
+        try:
+            return {"jsonrpc": "2.0", "id": message_id, "result": await method(params)}
+        except InvalidParamsError as ex:
+            return error_response(message_id, INVALID_PARAMS, f"Invalid params: {ex}")
+        except Exception as ex:
+            logger.error(f"Error handling MCP method {message['method']}: {ex}")
+            return error_response(message_id, INTERNAL_ERROR, "Internal error")
+
+    @staticmethod
+    async def _initialize(params: dict) -> dict:
+        requested = params.get("protocolVersion")
+        return {
+            "protocolVersion": requested if requested in supported_protocol_versions else MCP_PROTOCOL_VERSION,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": {"name": Swagger_Title or "monkeys", "version": Swagger_Version or ""}
+        }
+
+    @staticmethod
+    async def _ping(params: dict) -> dict:
+        return {}
+
+    async def _list_tools(self, params: dict) -> dict:
+        return self._tools
+
+    async def _call_tool(self, params: dict) -> Union[dict, ToolResult]:
+        name = params.get("name")
+        arguments = params.get("arguments")
+        if arguments is None:
+            arguments = {}
+        if not isinstance(name, str) or name not in self._tool_names:
+            raise InvalidParamsError(f"Unknown tool: {name}")
+        if not isinstance(arguments, dict):
+            raise InvalidParamsError("arguments must be an object")
+
+        result = await self._mcp_server.call_tool(name, arguments)
+        if "error" in result:
+            return {"content": [{"type": "text", "text": result["error"]["message"]}], "isError": True}
+        return result["result"]
+
+    @staticmethod
+    def has_row_sets(messages: Iterable[dict]) -> bool:
+        """Whether any response carries rows that are better streamed than buffered"""
+        return any(isinstance(message.get("result"), RowSetResult) for message in messages)
+
+    @staticmethod
+    def encode(response: Union[dict, List[dict]]) -> bytes:
+        """JSON body for a response or batch of responses"""
+        def plain(message: dict) -> dict:
+            result = message.get("result")
+            return {**message, "result": result.to_mcp_content()} if isinstance(result, ToolResult) else message
+
+        if isinstance(response, list):
+            return encode_json([plain(message) for message in response])
+        return encode_json(plain(response))
+
+    @classmethod
+    def iter_sse(cls, messages: Iterable[dict]) -> Iterator[bytes]:
+        """Server-sent event stream with one event per response, row sets encoded as they are written"""
+        for message in messages:
+            yield b"event: message\ndata: "
+            yield from cls._iter_message(message)
+            yield b"\n\n"
+
+    @classmethod
+    def _iter_message(cls, message: dict) -> Iterator[bytes]:
+        result = message.get("result")
+        if not isinstance(result, RowSetResult):
+            yield cls.encode(message)
+            return
+
+        yield b'{"jsonrpc":"2.0","id":' + encode_json(message["id"]) + b',"result":{"content":[{"type":"text","text":"'
+        for chunk in result.iter_json():
+            # The rows are ASCII-only JSON, so any slice of them can be escaped on its own
+            for start in range(0, len(chunk), MCP_SSE_CHUNK_BYTES):
+                yield json.dumps(chunk[start:start + MCP_SSE_CHUNK_BYTES].decode())[1:-1].encode()
+        yield b'"}],"isError":false}}'
@@ -1,28 +1,39 @@
+import time
+from typing import List
+from Helpers.Metrics import metrics
+from Models.McpTool import McpTool
 from Services.MonkeyService import MonkeyService
 from Services.MonkeyTools import MonkeyTools
 
+tool_call_seconds = metrics.histogram("mcp_tool_call_seconds", "Tool execution time by tool and outcome",
+                                      ["tool", "outcome"])
+
+
 class McpServer:
     def __init__(self, monkey_service: MonkeyService):
         self.monkey_service = monkey_service
         self.tools = MonkeyTools(monkey_service)
 
+    def list_tools(self) -> List[McpTool]:
+        """Describe every tool for MCP clients"""
+        return self.tools.registry.tools()
+
     async def call_tool(self, name: str, arguments: dict) -> dict:
-        """Call a specific tool"""
+        """Call a specific tool, passing its structured result through unchanged"""
+        # Unknown names share one series so callers cannot grow the label set
+        tool = name if isinstance(name, str) and name in self.tools.registry else "unknown"
+        start = time.perf_counter()
         try:
             result = await self.tools.execute_tool(name, arguments)
+            tool_call_seconds.labels(tool, "ok").observe(time.perf_counter() - start)
             return {
-                "content": [
-                    {
-                        "type": "text",
-                        "text": result
-                    }
-                ]
+                "result": result
             }
         except Exception as ex:
+            tool_call_seconds.labels(tool, "error").observe(time.perf_counter() - start)
             return {
                 "error": {
                     "code": -1,
                     "message": str(ex)
                 }
             }
-
@@ -0,0 +1,213 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.LoadGenerator import run_load
+from Benchmarks.SyntheticData import generate_monkey_dicts, synthetic_name
+
+RESULTS_FORMAT = 1
+MEMORY_SAMPLES = 20
+request_pattern = re.compile(r'Request: "benchmark case (\d+) item (\d+)"')
+
+
+def _scenarios(records: int) -> Dict[str, Callable[[int], dict]]:
+    """Plan the fake Gemini returns for the i-th request of each chat scenario"""
+    return {
+        "get_monkeys": lambda i: {"tool_name": "get_monkeys", "arguments": {}},
+        "get_monkeys_paged": lambda i: {"tool_name": "get_monkeys", "arguments": {"limit": 100}},
+        "get_monkeys_filtered": lambda i: {"tool_name": "get_monkeys_filtered", "arguments": {
+            "fields": ["Name", "Location", "Population"], "sort_by": "Population", "sort_order": "desc",
+            "filters": {"Population": {"gte": (i * 7919) % 100000}}, "limit": 50}},
+        "get_monkey": lambda i: {"tool_name": "get_monkey", "arguments": {"name": synthetic_name(i % records)}},
+        "search_monkeys": lambda i: {"tool_name": "search_monkeys", "arguments": {
+            "query": synthetic_name(i % records).split()[1][:4], "limit": 10}},
+        "get_monkeys_near": lambda i: {"tool_name": "get_monkeys_near", "arguments": {
+            "latitude": (i * 37) % 120 - 60, "longitude": (i * 53) % 360 - 180, "limit": 10}},
+        "get_monkey_business": lambda i: {"tool_name": "get_monkey_business", "arguments": {}}
+    }
+
+
+def _serve(monkeys_url: str, gemini_url: str, port_queue):
+    logging.disable(logging.CRITICAL)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""))
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process from /proc, where available"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def _git_revision() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout
+        return {"commit": commit.strip(), "dirty": bool(dirty.strip())}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _requests_for(name: str, scenario_names: List[str], offset: int) -> Callable[[int], dict]:
+    if name == "chat_cached":
+        return lambda i: {"message": "benchmark case 0 item 0"}
+    case = scenario_names.index(name)
+    # Every message is new, so each request is planned by the fake Gemini and skips the plan cache
+    return lambda i: {"message": f"benchmark case {case} item {offset + i}"}
+
+
+def _memory_per_request(monkeys_url: str, gemini_url: str, bodies: Dict[str, Callable[[int], dict]]) -> dict:
+    """Peak Python heap allocated while handling one request of each scenario, in KB"""
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""), serving_mode="sync")
+    client = app.test_client()
+    client.post("/api/v1/chat/", json={"message": "get monkey business"})
+
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for name, (url, make_body) in bodies.items():
+            client.post(url, json=make_body(10 ** 6))
+            samples = []
+            for i in range(MEMORY_SAMPLES):
+                body = make_body(2 * 10 ** 6 + i)
+                baseline = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                client.post(url, json=body).close()
+                samples.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+            peaks[name] = {"mean_peak_kb": sum(samples) / len(samples), "max_peak_kb": max(samples)}
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def _compare(results: dict, baseline_path: str):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(run["scenario"], run["concurrency"]): run for run in baseline["runs"]}
+    print(f"\ncompared with {baseline_path} ({(baseline['revision']['commit'] or 'unknown')[:12]}):")
+    for run in results["runs"]:
+        before = previous.get((run["scenario"], run["concurrency"]))
+        if not before or not before["requests_per_second"] or not before["p99_ms"]:
+            continue
+        rps_change = run["requests_per_second"] / before["requests_per_second"] - 1
+        p99_change = run["p99_ms"] / before["p99_ms"] - 1
+        print(f"  {run['scenario']:<22} c={run['concurrency']:<3} rps {rps_change:+7.1%}  p99 {p99_change:+7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of /chat and /mcp against local fakes")
+    parser.add_argument("--records", type=int, default=10_000, help="Synthetic monkeys served by the fake feed")
+    parser.add_argument("--gemini-latency", type=float, default=0.05, help="Seconds the fake Gemini waits")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--scenarios", nargs="+", help="Only run these scenarios")
+    parser.add_argument("--output", default=f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--compare", help="Earlier results file to report changes against")
+    arguments = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    plans = _scenarios(arguments.records)
+    scenario_names = list(plans)
+
+    def responder(prompt: str) -> str:
+        match = request_pattern.search(prompt)
+        if not match:
+            return json.dumps({"tool_name": "chat", "arguments": {"message": "Request Is Out Of Context"}})
+        return json.dumps(plans[scenario_names[int(match.group(1))]](int(match.group(2))))
+
+    gemini = start_fake_gemini(latency=arguments.gemini_latency, responder=responder)
+    monkeys = start_fake_monkeys(generate_monkey_dicts(arguments.records))
+    filtered = plans["get_monkeys_filtered"]
+
+    def mcp_body(i: int) -> dict:
+        return {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                "params": {"name": "get_monkeys_filtered", "arguments": filtered(i)["arguments"]}}
+
+    offset = int(time.time() * 1000)
+    bodies = {name: ("/api/v1/chat/", _requests_for(name, scenario_names, offset))
+              for name in scenario_names + ["chat_cached"]}
+    bodies["mcp_tools_call"] = ("/api/v1/mcp/", mcp_body)
+    if arguments.scenarios:
+        bodies = {name: bodies[name] for name in arguments.scenarios}
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    process = context.Process(target=_serve, args=(monkeys.url, gemini.url, port_queue), daemon=True)
+    process.start()
+    results = {
+        "format": RESULTS_FORMAT,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "revision": _git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "config": {"records": arguments.records, "gemini_latency": arguments.gemini_latency,
+                   "concurrency": arguments.concurrency, "requests": arguments.requests},
+        "runs": []
+    }
+    try:
+        base_url = f"http://127.0.0.1:{port_queue.get(timeout=120)}"
+        requests.post(f"{base_url}/api/v1/chat/", json={"message": "get monkey business"})
+        print(f"records={arguments.records:,} gemini latency={arguments.gemini_latency * 1000:.0f}ms "
+              f"requests={arguments.requests} per level")
+
+        for name, (path, make_body) in bodies.items():
+            for concurrency in arguments.concurrency:
+                # Shift the request numbers per level so no level reuses another's plans
+                shift = concurrency * arguments.requests * 10
+                run = run_load(base_url + path, lambda i: make_body(shift + i), concurrency, arguments.requests)
+                run.update({"scenario": name, "server_rss_mb": _rss_mb(process.pid)})
+                results["runs"].append(run)
+                print(f"{name:<22} c={concurrency:<3} rps={run['requests_per_second']:8.1f} "
+                      f"p50={run['p50_ms']:8.2f}ms p95={run['p95_ms']:8.2f}ms p99={run['p99_ms']:8.2f}ms "
+                      f"statuses={run['statuses']}")
+    finally:
+        process.terminate()
+        process.join()
+
+    try:
+        memory = _memory_per_request(monkeys.url, gemini.url, bodies)
+    finally:
+        gemini.stop()
+        monkeys.stop()
+    for run in results["runs"]:
+        run.update(memory[run["scenario"]])
+    for name, peak in memory.items():
+        print(f"{name:<22} peak heap per request: mean={peak['mean_peak_kb']:9.1f}KB max={peak['max_peak_kb']:9.1f}KB")
+
+    with open(arguments.output, "w") as output:
+        json.dump(results, output, indent=2)
+    print(f"results written to {arguments.output}")
+
+    if arguments.compare:
+        _compare(results, arguments.compare)
+
+
+if __name__ == "__main__":
+    main()
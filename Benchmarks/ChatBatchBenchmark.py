@@ -0,0 +1,84 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+BATCH_SIZE = 500
+DISTINCT_MESSAGES = 400
+GEMINI_LATENCY = 0.1
+DATASET_SIZE = 100
+PLAN = {"tool_name": "get_monkeys_filtered", "arguments": {"fields": ["Name", "Population"]}}
+
+
+def _serve(monkeys_url: str, gemini_url: str, port_queue):
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""))
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _messages() -> list:
+    """A batch where a fifth of the messages repeat earlier ones"""
+    return [f"which primates would a zoologist find worth seeing, variant {i % DISTINCT_MESSAGES}"
+            for i in range(BATCH_SIZE)]
+
+
+def _timed(monkeys_url: str, gemini_url: str, send) -> float:
+    """Seconds taken by send against a fresh server, so no run benefits from another's caches"""
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    process = context.Process(target=_serve, args=(monkeys_url, gemini_url, port_queue), daemon=True)
+    process.start()
+    try:
+        base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}/api/v1/chat/"
+        requests.post(base_url, json={"message": "get monkey business"})
+        start = time.perf_counter()
+        send(base_url)
+        return time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    logging.disable(logging.INFO)
+    gemini = start_fake_gemini(latency=GEMINI_LATENCY, responder=lambda prompt: json.dumps(PLAN))
+    monkeys = start_fake_monkeys(generate_monkey_dicts(DATASET_SIZE))
+    messages = _messages()
+
+    def sequential(base_url: str):
+        with requests.Session() as session:
+            for message in messages:
+                assert session.post(base_url, json={"message": message}).status_code == 200
+
+    def batched(base_url: str):
+        response = requests.post(base_url + "batch", json={"messages": messages})
+        results = response.json()["results"]
+        assert len(results) == BATCH_SIZE and all("response" in result for result in results)
+
+    try:
+        sequential_seconds = _timed(monkeys.url, gemini.url, sequential)
+        batch_seconds = _timed(monkeys.url, gemini.url, batched)
+        print(f"messages={BATCH_SIZE} distinct={DISTINCT_MESSAGES} gemini latency={GEMINI_LATENCY * 1000:.0f}ms")
+        print(f"sequential: {sequential_seconds:6.2f}s ({BATCH_SIZE / sequential_seconds:6.1f} msg/s)")
+        print(f"batch:      {batch_seconds:6.2f}s ({BATCH_SIZE / batch_seconds:6.1f} msg/s) "
+              f"speedup={sequential_seconds / batch_seconds:.1f}x")
+    finally:
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
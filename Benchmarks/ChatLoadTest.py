@@ -0,0 +1,65 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.LoadGenerator import run_load
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+CONCURRENCY_LEVELS = [1, 10, 50]
+REQUESTS_PER_LEVEL = 300
+GEMINI_LATENCY = 0.1
+DATASET_SIZE = 100
+PLAN = {"tool_name": "get_monkeys_filtered", "arguments": {"fields": ["Name", "Population"]}}
+
+
+def _serve(mode: str, monkeys_url: str, gemini_url: str, port_queue):
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""), serving_mode=mode)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _message(i: int) -> dict:
+    return {"message": f"which primates would a zoologist find worth seeing, variant {i}"}
+
+
+def main():
+    logging.disable(logging.INFO)
+    gemini = start_fake_gemini(latency=GEMINI_LATENCY, responder=lambda prompt: json.dumps(PLAN))
+    monkeys = start_fake_monkeys(generate_monkey_dicts(DATASET_SIZE))
+    context = multiprocessing.get_context("spawn")
+
+    try:
+        for mode in ("sync", "async"):
+            port_queue = context.Queue()
+            process = context.Process(target=_serve, args=(mode, monkeys.url, gemini.url, port_queue), daemon=True)
+            process.start()
+            url = f"http://127.0.0.1:{port_queue.get(timeout=30)}/api/v1/chat/"
+            requests.post(url, json={"message": "get all monkeys"})
+
+            for concurrency in CONCURRENCY_LEVELS:
+                offset = int(time.time() * 1000)
+                result = run_load(url, lambda i: _message(offset + i), concurrency, REQUESTS_PER_LEVEL)
+                print(f"{mode:<6} concurrency={concurrency:<3} rps={result['requests_per_second']:7.1f} "
+                      f"p50={result['p50_ms']:7.1f}ms p99={result['p99_ms']:7.1f}ms statuses={result['statuses']}")
+
+            process.terminate()
+            process.join()
+    finally:
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+DATASET_SIZE = 200_000
+FEED_LATENCY = 0.2
+PLAN = {"tool_name": "get_monkeys_filtered", "arguments": {"fields": ["Name", "Population"], "sort_by": "Population"}}
+PAGE = {"message": "largest monkey populations", "limit": 10}
+
+
+def _serve(monkeys_url: str, gemini_url: str, snapshot_path: str, port_queue):
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""), snapshot_path=snapshot_path)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _first_response(monkeys_url: str, gemini_url: str, snapshot_path: str) -> (float, int):
+    """Seconds from process start to the first successful /chat response, and the rows it held"""
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    start = time.perf_counter()
+    process = context.Process(target=_serve, args=(monkeys_url, gemini_url, snapshot_path, port_queue), daemon=True)
+    process.start()
+    try:
+        url = f"http://127.0.0.1:{port_queue.get(timeout=600)}/api/v1/chat/"
+        while True:
+            response = requests.post(url, json=PAGE)
+            if response.status_code == 200:
+                return time.perf_counter() - start, len(response.json()["response"]["monkeys"])
+            time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.join()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DATASET_SIZE
+    logging.disable(logging.INFO)
+    gemini = start_fake_gemini(latency=0, responder=lambda prompt: json.dumps(PLAN))
+    monkeys = start_fake_monkeys(generate_monkey_dicts(size), latency=FEED_LATENCY)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            snapshot_path = os.path.join(directory, "monkeys.snapshot")
+            seconds, rows = _first_response(monkeys.url, gemini.url, "")
+            print(f"records={size:,} no snapshot:             first response={seconds:6.2f}s rows={rows}")
+
+            _first_response(monkeys.url, gemini.url, snapshot_path)
+            while not os.path.exists(snapshot_path):
+                time.sleep(0.1)
+            print(f"snapshot file={os.path.getsize(snapshot_path) / 1024 / 1024:.1f}MB")
+
+            seconds, rows = _first_response(monkeys.url, gemini.url, snapshot_path)
+            print(f"records={size:,} with snapshot:           first response={seconds:6.2f}s rows={rows}")
+
+            monkeys.configure(failing=True)
+            seconds, rows = _first_response(monkeys.url, gemini.url, "")
+            print(f"records={size:,} feed down, no snapshot:   first response={seconds:6.2f}s rows={rows}")
+            seconds, rows = _first_response(monkeys.url, gemini.url, snapshot_path)
+            print(f"records={size:,} feed down, with snapshot: first response={seconds:6.2f}s rows={rows}")
+    finally:
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import contextlib
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on this request, e.g. after its deadline
+            self.close_connection = True
+
+
+class _FakeGeminiHandler(_FakeHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests += 1
+        prompt = request_body["contents"][0]["parts"][0]["text"]
+
+        draw = self.server.random.random()
+        if self.server.failing or draw < self.server.error_rate:
+            time.sleep(self.server.latency)
+            self._send(503, b'{"error": {"code": 503, "message": "overloaded"}}')
+            return
+        spike = draw < self.server.error_rate + self.server.spike_rate
+        with self.server.capacity:
+            time.sleep(self.server.spike_latency if spike else self.server.latency)
+        text = self.server.responder(prompt)
+        body = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode()
+        self._send(200, body)
+
+
+class _FakeMonkeysHandler(_FakeHandler):
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.server.requests += 1
+        if self.server.failing:
+            self._send(503, b"{}")
+        elif self.headers.get("If-None-Match") == self.server.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(self.server.body)))
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+            self.wfile.write(self.server.body)
+
+
+class FakeServer:
+    def __init__(self, server: ThreadingHTTPServer):
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def requests(self) -> int:
+        """Requests the server has received so far"""
+        return self._server.requests
+
+    def configure(self, **attributes):
+        """Change the behaviour of the running server, e.g. latency or failing"""
+        for name, value in attributes.items():
+            setattr(self._server, name, value)
+
+    def start(self) -> "FakeServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def start_fake_gemini(latency: float = 0.05, responder: Optional[Callable[[str], str]] = None,
+                      error_rate: float = 0.0, spike_rate: float = 0.0, spike_latency: float = 0.0,
+                      seed: int = 0, capacity: int = 0) -> FakeServer:
+    """Start a local stand-in for the Gemini generateContent endpoint, optionally injecting 503s and latency spikes;
+    a capacity makes requests beyond that many queue, like a saturated quota"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGeminiHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 256
+    server.latency = latency
+    server.error_rate = error_rate
+    server.spike_rate = spike_rate
+    server.spike_latency = spike_latency
+    server.failing = False
+    server.requests = 0
+    server.capacity = threading.BoundedSemaphore(capacity) if capacity else contextlib.nullcontext()
+    server.random = random.Random(seed)
+    server.responder = responder or (lambda prompt: '{"tool_name": "get_monkeys", "arguments": {}}')
+    return FakeServer(server).start()
+
+
+def start_fake_monkeys(monkeys: List[dict], latency: float = 0.0) -> FakeServer:
+    """Start a local stand-in for the MONKEYS_URL feed"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeMonkeysHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.failing = False
+    server.requests = 0
+    fake = FakeServer(server).start()
+    set_fake_monkeys(fake, monkeys)
+    return fake
+
+
+def set_fake_monkeys(fake: FakeServer, monkeys: List[dict]):
+    """Replace the feed served by a fake monkeys server"""
+    body = json.dumps(monkeys).encode()
+    fake.configure(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
@@ -0,0 +1,91 @@
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from Benchmarks.SyntheticData import iter_monkey_dicts
+
+SIZES = [10_000, 1_000_000, 5_000_000]
+BASELINE_MAX_RECORDS = 1_000_000
+CHUNK_BYTES = 1024 * 1024
+
+
+class _DictMonkey:
+    """The model as it was before __slots__, for the baseline"""
+
+    def __init__(self, Name, Location, Details, Image, Population, Latitude, Longitude):
+        self.Name = Name
+        self.Location = Location
+        self.Details = Details
+        self.Image = Image
+        self.Population = Population
+        self.Latitude = Latitude
+        self.Longitude = Longitude
+
+
+def _write_feed(path: str, count: int):
+    with open(path, "w") as feed:
+        feed.write("[")
+        for i, row in enumerate(iter_monkey_dicts(count)):
+            feed.write(",\n" if i else "\n")
+            feed.write(json.dumps(row))
+        feed.write("\n]")
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def _load(loader: str, path: str, results):
+    start_rss = _rss_mb()
+    start = time.perf_counter()
+    if loader == "baseline":
+        with open(path, "rb") as feed:
+            monkeys = [_DictMonkey(**data) for data in json.load(feed)]
+    else:
+        from Services.MonkeyFeedLoader import load_monkeys
+        with open(path, "rb") as feed:
+            monkeys = load_monkeys(iter(lambda: feed.read(CHUNK_BYTES), b""))
+    seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 - start_rss
+    retained_mb = _rss_mb() - start_rss
+    results.put((seconds, peak_mb, retained_mb, len(monkeys)))
+
+
+def _run(loader: str, path: str):
+    """Load in a fresh process so peak RSS belongs to this loader alone"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_load, args=(loader, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, f"monkeys-{size}.json")
+            _write_feed(path, size)
+            feed_mb = os.path.getsize(path) / 1024 / 1024
+
+            loaders = ["baseline", "streaming"] if size <= BASELINE_MAX_RECORDS else ["streaming"]
+            for loader in loaders:
+                seconds, peak_mb, retained_mb, count = _run(loader, path)
+                assert count == size
+                print(f"records={size:<9} feed={feed_mb:7.1f}MB {loader:<9} load={seconds:6.2f}s "
+                      f"peak={peak_mb:7.1f}MB retained={retained_mb:7.1f}MB "
+                      f"({retained_mb * 1024 * 1024 / size:5.0f} bytes/row)")
+            if size > BASELINE_MAX_RECORDS:
+                print(f"records={size:<9} baseline skipped: the whole-document parse does not fit in memory here")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import statistics
+import time
+
+import requests
+
+from Agents.GeminiClient import GeminiClient
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini
+
+CONCURRENCY_LEVELS = [1, 10, 100]
+CALLS_PER_WORKER = 5
+SERVER_LATENCY = 0.05
+
+
+class BlockingGeminiClient:
+    """The previous client: a blocking requests.post per call, no session, no timeout"""
+
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+
+    async def chat(self, prompt: str) -> str:
+        body = {"contents": [{"parts": [{"text": prompt}]}]}
+        response = requests.post(self.api_url, params={"key": ""}, json=body)
+        response.raise_for_status()
+        return response.json()['candidates'][0]['content']['parts'][0]['text']
+
+
+async def _run(client, concurrency: int):
+    latencies = []
+
+    async def worker():
+        for _ in range(CALLS_PER_WORKER):
+            start = time.perf_counter()
+            await client.chat("benchmark")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def _report(label: str, concurrency: int, latencies, elapsed: float):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{label:<10} concurrency={concurrency:<4} calls={len(latencies):<4} "
+          f"p50={p50:8.1f}ms p99={p99:8.1f}ms throughput={len(latencies) / elapsed:8.1f} req/s")
+
+
+def main():
+    server = start_fake_gemini(latency=SERVER_LATENCY)
+    try:
+        clients = {
+            "blocking": BlockingGeminiClient(server.url),
+            "pooled": GeminiClient(GeminiClientOptions(api_url=server.url, api_key="")),
+        }
+        for concurrency in CONCURRENCY_LEVELS:
+            for label, client in clients.items():
+                latencies, elapsed = asyncio.run(_run(client, concurrency))
+                _report(label, concurrency, latencies, elapsed)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import statistics
+import time
+
+from Agents.GeminiClient import GeminiClient
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+from Benchmarks.FakeServers import start_fake_gemini
+from Helpers.IntentRouter import IntentRouter
+from Helpers.QueryPlanner import QueryPlanner
+from Helpers.WordCorrection import FuzzyCorrector
+from Globals.Constants import available_fields
+
+CALLS = 400
+CONCURRENCY = 16
+LATENCY = 0.05
+ERROR_RATE = 0.05
+SPIKE_RATE = 0.05
+SPIKE_LATENCY = 2.0
+OUTAGE_CALLS = 200
+OUTAGE_MESSAGE = "list the names and populations of the monkeys, sorted by population"
+
+
+def _percentiles(latencies: list) -> str:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50={statistics.median(ordered) * 1000:8.2f}ms p99={p99 * 1000:8.2f}ms"
+
+
+async def _run_calls(client: GeminiClient, calls: int) -> (list, int):
+    """Latency of every call, and how many ended without an answer"""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    failures = 0
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.chat(f"prompt {i}")
+            except GeminiUnavailableException:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies, failures
+
+
+async def _faults(url: str):
+    scenarios = {
+        "single attempt (before)": GeminiClientOptions(api_url=url, api_key="", max_attempts=1, deadline=60,
+                                                       breaker_failures=10 ** 9),
+        "deadline 1s + retries": GeminiClientOptions(api_url=url, api_key="", deadline=1.0),
+        "deadline 1s + retries + hedging": GeminiClientOptions(api_url=url, api_key="", deadline=1.0, hedge=True)
+    }
+    print(f"calls={CALLS} concurrency={CONCURRENCY} latency={LATENCY * 1000:.0f}ms errors={ERROR_RATE:.0%} "
+          f"spikes={SPIKE_RATE:.0%} of {SPIKE_LATENCY:.1f}s")
+    for label, options in scenarios.items():
+        client = GeminiClient(options)
+        # Warm the latency window the hedging delay is taken from
+        await _run_calls(client, 40)
+        latencies, failures = await _run_calls(client, CALLS)
+        print(f"{label:<34} {_percentiles(latencies)} failed={failures / CALLS:6.1%}")
+
+
+async def _outage(url: str, breaker_failures: int):
+    client = GeminiClient(GeminiClientOptions(api_url=url, api_key="", deadline=1.0,
+                                              breaker_failures=breaker_failures))
+    planner = QueryPlanner(client, IntentRouter(min_confidence=1.1), FuzzyCorrector(available_fields))
+    latencies = []
+    degraded = 0
+    for _ in range(OUTAGE_CALLS):
+        start = time.perf_counter()
+        try:
+            plan = await planner.plan(OUTAGE_MESSAGE)
+            degraded += plan["tool_name"] == "get_monkeys_filtered"
+        except GeminiUnavailableException:
+            pass
+        latencies.append(time.perf_counter() - start)
+    return latencies, degraded
+
+
+async def main_async():
+    gemini = start_fake_gemini(latency=LATENCY, error_rate=ERROR_RATE, spike_rate=SPIKE_RATE,
+                               spike_latency=SPIKE_LATENCY)
+    try:
+        await _faults(gemini.url)
+
+        gemini.configure(failing=True)
+        print(f"\noutage: every call fails, {OUTAGE_CALLS} plans for a query the local heuristic can answer")
+        for label, breaker_failures in (("without circuit breaker", 10 ** 9), ("with circuit breaker", 5)):
+            latencies, degraded = await _outage(gemini.url, breaker_failures)
+            print(f"{label:<34} {_percentiles(latencies)} answered by heuristic={degraded}/{OUTAGE_CALLS}")
+    finally:
+        gemini.stop()
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
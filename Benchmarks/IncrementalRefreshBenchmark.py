@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Callable, Dict, Tuple
+
+from Benchmarks.SyntheticData import iter_monkey_dicts, synthetic_name
+from Models.EncodedResponse import EncodedResponse
+from Services.ChangeImpact import ChangeImpact
+from Services.MonkeyDiff import MonkeyDiff
+from Services.MonkeyFeedLoader import load_monkeys
+from Services.MonkeySnapshot import MonkeySnapshot, lookup_structures
+from Services.ResponseCache import ResponseCache
+
+DATASET_SIZE = 1_000_000
+CHURN = 0.001
+CACHED_PER_SCENARIO = 200
+CHUNK_BYTES = 1024 * 1024
+
+
+def _write_feed(path: str, count: int, churn: float = 0.0, seed: int = 7) -> Tuple[int, int, int]:
+    """Write the synthetic feed, with a share of its rows updated, deleted or inserted as a later load would have"""
+    rng = random.Random(seed)
+    changed = set(rng.sample(range(count), int(count * churn)))
+    inserted = deleted = updated = 0
+    first = True
+    with open(path, "w") as feed:
+        feed.write("[")
+        for i, row in enumerate(iter_monkey_dicts(count)):
+            rows = [row]
+            if i in changed:
+                kind = rng.random()
+                if kind < 0.6:
+                    row["Population"] = rng.randint(0, 100000)
+                    updated += 1
+                elif kind < 0.8:
+                    rows = []
+                    deleted += 1
+                else:
+                    rows.append({**row, "Name": synthetic_name(count + inserted),
+                                 "Latitude": round(rng.uniform(-60, 60), 6)})
+                    inserted += 1
+            for written in rows:
+                feed.write("\n" if first else ",\n")
+                feed.write(json.dumps(written))
+                first = False
+        feed.write("\n]")
+    return inserted, updated, deleted
+
+
+def _load(path: str):
+    with open(path, "rb") as feed:
+        return load_monkeys(iter(lambda: feed.read(CHUNK_BYTES), b""))
+
+
+def _timed(action: Callable[[], object]) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def _build(snapshot: MonkeySnapshot) -> Dict[str, float]:
+    """Seconds each lookup structure takes to build, in the order warm() builds them"""
+    return {name: _timed(lambda: getattr(snapshot, name))[1] for name in lookup_structures}
+
+
+def _report(label: str, stages: Dict[str, float]):
+    detail = " ".join(f"{name}={seconds:5.2f}s" for name, seconds in stages.items())
+    print(f"{label:<22} total={sum(stages.values()):6.2f}s  {detail}")
+
+
+def _cached_calls(records: int) -> Dict[str, Callable[[int], dict]]:
+    """Arguments of the i-th cached call of each cacheable tool, as the chat planner would produce them"""
+    return {
+        "get_monkeys": lambda i: {"limit": 100} if i % 2 else {},
+        "get_monkeys_filtered": lambda i: {"fields": ["Name", "Population"], "sort_by": "Population",
+                                           "filters": {"Population": {"gte": (i * 7919) % 100000,
+                                                                      "lte": (i * 7919) % 100000 + 50}}},
+        "get_monkey": lambda i: {"name": synthetic_name((i * 7919) % records)},
+        "search_monkeys": lambda i: {"query": synthetic_name((i * 7919) % records).split()[1][:5], "limit": 10},
+        "get_monkeys_near": lambda i: {"latitude": (i * 37) % 120 - 60, "longitude": (i * 53) % 360 - 180,
+                                       "limit": 10}
+    }
+
+
+def _fill_cache(cache: ResponseCache, records: int, version: int):
+    for tool_name, arguments in _cached_calls(records).items():
+        for i in range(CACHED_PER_SCENARIO):
+            cache.put(cache.key(tool_name, arguments(i), version), EncodedResponse(b'{"response":[]}', tool_name))
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DATASET_SIZE
+    churn = float(sys.argv[2]) if len(sys.argv) > 2 else CHURN
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as directory:
+        before, after = os.path.join(directory, "before.json"), os.path.join(directory, "after.json")
+        _write_feed(before, size)
+        inserted, updated, deleted = _write_feed(after, size, churn)
+        print(f"records={size:,} churn={churn:.1%}: {inserted} inserted, {updated} updated, {deleted} deleted")
+
+        # Every load before this change was a full rebuild, which is also how the first load is still made
+        monkeys, parse = _timed(lambda: _load(before))
+        previous = MonkeySnapshot(monkeys, 1)
+        _report("full rebuild", {"parse": parse, **_build(previous)})
+        cache = ResponseCache(max_bytes=1 << 30)
+        _fill_cache(cache, size, previous.version)
+
+        monkeys, parse = _timed(lambda: _load(after))
+        # partial binds the rows now, unlike a closure over previous, which is deleted below
+        changes, diff = _timed(partial(MonkeyDiff.compute, previous.monkeys, monkeys))
+        del monkeys
+        snapshot = MonkeySnapshot(changes.monkeys, 2, previous=previous, changes=changes)
+        _report("incremental refresh", {"parse": parse, "diff": diff, **_build(snapshot)})
+        snapshot.warm()
+        del previous
+
+        cached = cache.stats()["entries"]
+        _, seconds = _timed(lambda: cache.invalidate(snapshot.version, snapshot.previous_version,
+                                                     ChangeImpact.of(snapshot).affects))
+        print(f"{'response cache':<22} {cache.retained}/{cached} entries kept, {cache.invalidations} dropped, "
+              f"in {seconds:5.2f}s (every entry was dropped before)")
+
+        monkeys, parse = _timed(lambda: _load(after))
+        unchanged, diff = _timed(lambda: MonkeyDiff.compute(snapshot.monkeys, monkeys))
+        assert unchanged.is_empty
+        print(f"{'unchanged feed':<22} total={parse + diff:6.2f}s  parse={parse:5.2f}s diff={diff:5.2f}s  "
+              f"(dataset version and caches kept)")
+        print(f"peak rss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
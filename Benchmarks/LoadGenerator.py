@@ -0,0 +1,57 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import requests
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run_load(url: str, make_body: Callable[[int], dict], concurrency: int, total_requests: int,
+             headers: Dict[str, str] = None) -> dict:
+    """POST total_requests bodies to url from concurrency client threads and summarize latency"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+    local = threading.local()
+
+    def client():
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            start = time.perf_counter()
+            response = session.post(url, json=make_body(i), headers=headers)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "statuses": statuses
+    }
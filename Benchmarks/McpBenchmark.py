@@ -0,0 +1,104 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+REQUESTS = 200
+DATASET_SIZE = 1000
+GEMINI_LATENCY = 0.2
+ARGUMENTS = {"fields": ["Name", "Population"], "sort_by": "Population", "limit": 10}
+PLAN = {"tool_name": "get_monkeys_filtered", "arguments": ARGUMENTS}
+CHAT = {"message": "which primates would a zoologist find worth seeing, ranked by headcount"}
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": PLAN["tool_name"], "arguments": ARGUMENTS}}
+
+
+def _serve(monkeys_url: str, gemini_url: str, port_queue):
+    logging.disable(logging.INFO)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""))
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _latencies(send, count: int) -> list:
+    send()
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        send()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} p50={p50 * 1e6:10.1f}us p99={p99 * 1e6:10.1f}us")
+
+
+def _in_process(monkeys_url: str, gemini_url: str):
+    """tools/call dispatch without HTTP, as seen by the endpoint handler"""
+    from Agents.McpJsonRpc import McpJsonRpc
+    from Agents.McpServer import McpServer
+    from Services.MonkeyService import MonkeyService
+    from Services.MonkeyServiceOptions import MonkeyServiceOptions
+
+    mcp_rpc = McpJsonRpc(McpServer(MonkeyService(MonkeyServiceOptions(api_url=monkeys_url))))
+    loop = asyncio.new_event_loop()
+    try:
+        _report("tools/call in process", _latencies(
+            lambda: McpJsonRpc.encode(loop.run_until_complete(mcp_rpc.handle(CALL))), REQUESTS * 10))
+    finally:
+        loop.close()
+
+
+def main():
+    logging.disable(logging.INFO)
+    gemini = start_fake_gemini(latency=GEMINI_LATENCY, responder=lambda prompt: json.dumps(PLAN))
+    monkeys = start_fake_monkeys(generate_monkey_dicts(DATASET_SIZE))
+
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    process = context.Process(target=_serve, args=(monkeys.url, gemini.url, port_queue), daemon=True)
+    process.start()
+    try:
+        base_url = f"http://127.0.0.1:{port_queue.get(timeout=30)}/api/v1"
+        with requests.Session() as session:
+            def chat():
+                # A distinct message per request, so neither the plan nor the response cache answers it
+                chat.count += 1
+                response = session.post(f"{base_url}/chat/", json={"message": f"{CHAT['message']} #{chat.count}"})
+                assert response.status_code == 200
+
+            def call():
+                response = session.post(f"{base_url}/mcp/", json=CALL)
+                assert not response.json()["result"]["isError"]
+
+            chat.count = 0
+            print(f"records={DATASET_SIZE:,} gemini latency={GEMINI_LATENCY * 1000:.0f}ms")
+            _report("/chat (planned by Gemini)", _latencies(chat, REQUESTS // 10))
+            _report("/mcp tools/call over HTTP", _latencies(call, REQUESTS))
+        _in_process(monkeys.url, gemini.url)
+    finally:
+        process.terminate()
+        process.join()
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
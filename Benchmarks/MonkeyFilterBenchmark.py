@@ -0,0 +1,64 @@
+import time
+
+from Benchmarks.SyntheticData import generate_monkey_dicts
+from Models.Monkey import Monkey
+from Services.MonkeyFilter import MonkeyFilterIndex
+from Services.MonkeyTable import MonkeyTable
+
+RECORDS = 1_000_000
+REPEATS = 5
+
+QUERIES = {
+    "population range (1%)": (
+        {"Population": {"between": [50_000, 50_999]}},
+        lambda m: isinstance(m.Population, int) and 50_000 <= m.Population <= 50_999
+    ),
+    "location equality": (
+        {"Location": "borneo"},
+        lambda m: m.Location.casefold() == "borneo"
+    ),
+    "location contains": (
+        {"Location": {"contains": "congo"}},
+        lambda m: "congo" in m.Location.casefold()
+    ),
+    "details tokens": (
+        {"Details": {"tokens": "golden marmoset"}},
+        lambda m: "golden" in m.Details.casefold().split() and "marmoset" in m.Details.casefold().split()
+    ),
+    "lat/long box + population": (
+        {"Latitude": {"between": [10, 12]}, "Longitude": {"between": [20, 30]}, "Population": {"gte": 50_000}},
+        lambda m: 10 <= m.Latitude <= 12 and 20 <= m.Longitude <= 30 and (m.Population or 0) >= 50_000
+    ),
+}
+
+
+def _timed_ms(func) -> (float, int):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func()
+    return (time.perf_counter() - start) / REPEATS * 1000, len(result)
+
+
+def main():
+    monkeys = [Monkey.from_dict(data) for data in generate_monkey_dicts(RECORDS)]
+
+    start = time.perf_counter()
+    table = MonkeyTable(monkeys)
+    table_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    filters = MonkeyFilterIndex(table)
+    index_ms = (time.perf_counter() - start) * 1000
+    print(f"records={RECORDS:,} table build={table_ms:.0f}ms filter index build={index_ms:.0f}ms")
+
+    for label, (query, predicate) in QUERIES.items():
+        indexed_ms, indexed_count = _timed_ms(lambda: table.order_subset(filters.select(query), "Population", True))
+        naive_ms, naive_count = _timed_ms(
+            lambda: sorted((m for m in monkeys if predicate(m)), key=lambda m: m.Population or 0, reverse=True)
+        )
+        assert indexed_count == naive_count, (label, indexed_count, naive_count)
+        print(f"{label:<28} rows={indexed_count:<7} indexed={indexed_ms:8.2f}ms naive scan={naive_ms:8.1f}ms "
+              f"speedup={naive_ms / indexed_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import math
+import random
+import time
+
+from Benchmarks.SyntheticData import generate_monkey_dicts
+from Models.Monkey import Monkey
+from Services.MonkeyGeoIndex import MonkeyGeoIndex, earth_radius_km
+
+RECORDS = 1_000_000
+QUERIES = 200
+SCAN_QUERIES = 3
+NEIGHBOURS = 10
+RADIUS_KM = 50
+
+
+def _distance_km(latitude, longitude, monkey: Monkey) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (latitude, longitude, monkey.Latitude, monkey.Longitude))
+    half_chord = math.sin((lat2 - lat1) / 2) ** 2 + \
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * math.asin(math.sqrt(min(1.0, half_chord))) * earth_radius_km
+
+
+def _scan_nearest(monkeys, latitude, longitude):
+    distances = sorted((_distance_km(latitude, longitude, m), position) for position, m in enumerate(monkeys))
+    return [position for _, position in distances[:NEIGHBOURS]]
+
+
+def _scan_within(monkeys, latitude, longitude):
+    return sorted(position for position, m in enumerate(monkeys) if _distance_km(latitude, longitude, m) <= RADIUS_KM)
+
+
+def _per_call_us(func, points) -> float:
+    start = time.perf_counter()
+    for point in points:
+        func(*point)
+    return (time.perf_counter() - start) / len(points) * 1_000_000
+
+
+def main():
+    monkeys = [Monkey.from_dict(data) for data in generate_monkey_dicts(RECORDS)]
+    rng = random.Random(7)
+    points = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(QUERIES)]
+
+    start = time.perf_counter()
+    index = MonkeyGeoIndex(monkeys)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    for latitude, longitude in points[:SCAN_QUERIES]:
+        assert [p for p, _ in index.nearest(latitude, longitude, NEIGHBOURS)] == \
+            _scan_nearest(monkeys, latitude, longitude)
+        assert sorted(p for p, _ in index.nearest(latitude, longitude, RECORDS, RADIUS_KM)) == \
+            _scan_within(monkeys, latitude, longitude)
+
+    nearest_us = _per_call_us(lambda lat, lon: index.nearest(lat, lon, NEIGHBOURS), points)
+    within_us = _per_call_us(lambda lat, lon: index.nearest(lat, lon, RECORDS, RADIUS_KM), points)
+    scan_us = _per_call_us(lambda lat, lon: _scan_nearest(monkeys, lat, lon), points[:SCAN_QUERIES])
+
+    print(f"records={RECORDS:,} build={build_ms:.0f}ms")
+    print(f"k={NEIGHBOURS} nearest={nearest_us:8.1f}us within {RADIUS_KM}km={within_us:8.1f}us "
+          f"full scan={scan_us / 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import time
+
+from Benchmarks.SyntheticData import generate_monkey_dicts
+from Models.Monkey import Monkey
+from Services.MonkeyIndex import MonkeyIndex
+
+SIZES = [1_000, 100_000, 1_000_000]
+LOOKUPS = 200
+
+
+def _misspell(name: str) -> str:
+    """Drop one letter from the species word, e.g. 'Golden Bakoru Monkey' -> 'golden bkoru'"""
+    words = name.lower().split()
+    return f"{words[0]} {words[1][0] + words[1][2:]}"
+
+
+def _per_call_us(func, queries) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries) * 1_000_000
+
+
+def main():
+    for size in SIZES:
+        monkeys = [Monkey.from_dict(data) for data in generate_monkey_dicts(size)]
+        names = [monkeys[(i * 7919) % size].Name for i in range(LOOKUPS)]
+
+        start = time.perf_counter()
+        index = MonkeyIndex(monkeys)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        scan_queries = [monkeys[-1 - i].Name for i in range(max(5, LOOKUPS * 1000 // size))]
+        linear_us = _per_call_us(lambda n: next((m for m in monkeys if m.Name.lower() == n.lower()), None),
+                                 scan_queries)
+        exact_us = _per_call_us(index.get, [n.upper() for n in names])
+        prefix_us = _per_call_us(lambda n: index.prefix(n[:8], 10), names)
+        fuzzy_us = _per_call_us(lambda n: index.fuzzy(_misspell(n), 10), names)
+
+        print(f"records={size:<9} build={build_ms:9.1f}ms linear_scan={linear_us:11.1f}us "
+              f"exact={exact_us:6.2f}us prefix={prefix_us:7.1f}us fuzzy={fuzzy_us:9.1f}us")
+
+
+if __name__ == "__main__":
+    main()
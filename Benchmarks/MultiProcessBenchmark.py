@@ -0,0 +1,106 @@
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+DATASET_SIZE = 100_000
+WORKER_COUNTS = (1, 4)
+MESSAGES = 20
+PLAN = {"tool_name": "get_monkeys_filtered", "arguments": {"fields": ["Name", "Population"],
+                                                           "sort_by": "Population", "sort_order": "desc", "limit": 10}}
+
+
+def _serve(monkeys_url: str, gemini_url: str, shared_state_dir: str, port_queue):
+    logging.disable(logging.CRITICAL)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    app = create_app(monkeys_url, GeminiClientOptions(api_url=gemini_url, api_key=""),
+                     shared_state_dir=shared_state_dir)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _memory_mb(pid: int, key: str) -> Optional[float]:
+    """RSS or PSS of a process in MB from /proc; PSS splits shared pages between the processes mapping them"""
+    for path in (f"/proc/{pid}/smaps_rollup", f"/proc/{pid}/status"):
+        try:
+            with open(path) as status:
+                for line in status:
+                    if line.startswith(key):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            continue
+    return None
+
+
+def _run(workers: int, monkeys, gemini, shared_state_dir: str) -> dict:
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    processes = [context.Process(target=_serve, args=(monkeys.url, gemini.url, shared_state_dir, port_queue),
+                                 daemon=True) for _ in range(workers)]
+    feed_requests, gemini_requests = monkeys.requests, gemini.requests
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    try:
+        urls = [f"http://127.0.0.1:{port_queue.get(timeout=600)}/api/v1/chat/" for _ in processes]
+        for url in urls:
+            response = requests.post(url, json={"message": "warm up"})
+            assert response.status_code == 200, response.text
+        ready = time.perf_counter() - start
+
+        # Every worker is asked the same questions, as a load balancer spreading one client's traffic would
+        for url in urls:
+            for i in range(MESSAGES):
+                requests.post(url, json={"message": f"biggest populations, question {i}"}).close()
+
+        pids = [process.pid for process in processes]
+        return {
+            "ready_s": ready,
+            "feed_requests": monkeys.requests - feed_requests,
+            "gemini_requests": gemini.requests - gemini_requests,
+            "rss_mb": sum(_memory_mb(pid, "Rss:") or _memory_mb(pid, "VmRSS:") or 0 for pid in pids),
+            "pss_mb": sum(_memory_mb(pid, "Pss:") or 0 for pid in pids)
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DATASET_SIZE
+    worker_counts: List[int] = [int(count) for count in sys.argv[2:]] or list(WORKER_COUNTS)
+    logging.disable(logging.CRITICAL)
+    gemini = start_fake_gemini(latency=0.02, responder=lambda prompt: json.dumps(PLAN))
+    monkeys = start_fake_monkeys(generate_monkey_dicts(size))
+
+    print(f"records={size:,} messages per worker={MESSAGES}")
+    try:
+        for workers in worker_counts:
+            for label in ("independent workers", "shared state"):
+                with tempfile.TemporaryDirectory() as directory:
+                    result = _run(workers, monkeys, gemini, directory if label == "shared state" else "")
+                print(f"workers={workers} {label:<20} ready={result['ready_s']:6.2f}s "
+                      f"feed fetches={result['feed_requests']:<2} gemini calls={result['gemini_requests']:<4} "
+                      f"total rss={result['rss_mb']:7.1f}MB total pss={result['pss_mb']:7.1f}MB")
+    finally:
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Benchmarks.LoadGenerator import run_load
+from Benchmarks.SyntheticData import generate_monkey_dicts
+
+GEMINI_LATENCY = 0.05
+GEMINI_CAPACITY = 8
+COMPLIANT_CONCURRENCY = 2
+COMPLIANT_REQUESTS = 300
+NOISY_CONCURRENCY = 64
+NOISY_RATE = 200
+RATE_LIMIT = 50
+PLAN = {"tool_name": "get_monkey_business", "arguments": {}}
+
+messages = itertools.count()
+
+
+def _serve(monkeys_url: str, gemini_url: str, shedding: bool, port_queue):
+    logging.disable(logging.CRITICAL)
+    sys.stdout = open(os.devnull, "w")
+    from main import create_app
+    from Helpers.RateLimiter import RateLimiter
+    if shedding:
+        gemini_options = GeminiClientOptions(api_url=gemini_url, api_key="", max_in_flight=GEMINI_CAPACITY,
+                                             max_queued=2 * GEMINI_CAPACITY, queue_timeout=0.5)
+        rate_limiter = RateLimiter(RATE_LIMIT, RATE_LIMIT, 1000)
+    else:
+        gemini_options = GeminiClientOptions(api_url=gemini_url, api_key="", max_in_flight=10 ** 6)
+        rate_limiter = RateLimiter(0, 0, 0)
+    # Clients are told apart by the X-Forwarded-For hop a single trusted proxy in front of the app would append
+    app = create_app(monkeys_url, gemini_options, rate_limiter=rate_limiter, trusted_proxy_hops=1)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    server.request_queue_size = 256
+    port_queue.put(server.server_port)
+    server.serve_forever()
+
+
+def _noisy_client(url: str, stop: threading.Event, statuses: dict, lock: threading.Lock):
+    """A client that ignores Retry-After, keeping up its share of NOISY_RATE requests per second"""
+    session = requests.Session()
+    interval = NOISY_CONCURRENCY / NOISY_RATE
+    next_send = time.perf_counter()
+    while not stop.is_set():
+        next_send += interval
+        status = session.post(url, json={"message": f"benchmark item {next(messages)}"},
+                              headers={"X-Forwarded-For": "10.0.0.99"}).status_code
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+        stop.wait(max(0.0, next_send - time.perf_counter()))
+
+
+def _run(url: str, noisy: bool) -> (dict, dict):
+    stop = threading.Event()
+    noisy_statuses = {}
+    lock = threading.Lock()
+    threads = [threading.Thread(target=_noisy_client, args=(url, stop, noisy_statuses, lock), daemon=True)
+               for _ in range(NOISY_CONCURRENCY if noisy else 0)]
+    for thread in threads:
+        thread.start()
+    try:
+        time.sleep(1 if noisy else 0)
+        compliant = run_load(url, lambda i: {"message": f"benchmark item {next(messages)}"}, COMPLIANT_CONCURRENCY,
+                             COMPLIANT_REQUESTS, headers={"X-Forwarded-For": "10.0.0.1"})
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    return compliant, noisy_statuses
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    gemini = start_fake_gemini(latency=GEMINI_LATENCY, responder=lambda prompt: json.dumps(PLAN),
+                               capacity=GEMINI_CAPACITY)
+    monkeys = start_fake_monkeys(generate_monkey_dicts(100))
+    print(f"gemini latency={GEMINI_LATENCY * 1000:.0f}ms capacity={GEMINI_CAPACITY} concurrent calls; compliant "
+          f"client c={COMPLIANT_CONCURRENCY}, noisy client {NOISY_RATE}/s; rate limit {RATE_LIMIT}/s")
+    try:
+        for label, shedding, noisy in (("quiet", False, False), ("noisy, no shedding", False, True),
+                                       ("noisy, with shedding", True, True)):
+            context = multiprocessing.get_context("spawn")
+            port_queue = context.Queue()
+            process = context.Process(target=_serve, args=(monkeys.url, gemini.url, shedding, port_queue),
+                                      daemon=True)
+            process.start()
+            try:
+                url = f"http://127.0.0.1:{port_queue.get(timeout=120)}/api/v1/chat/"
+                requests.post(url, json={"message": "get monkey business"})
+                compliant, noisy_statuses = _run(url, noisy)
+            finally:
+                process.terminate()
+                process.join()
+            print(f"{label:<22} compliant p50={compliant['p50_ms']:8.2f}ms p99={compliant['p99_ms']:8.2f}ms "
+                  f"statuses={compliant['statuses']}  noisy statuses={noisy_statuses}")
+    finally:
+        gemini.stop()
+        monkeys.stop()
+
+
+if __name__ == "__main__":
+    main()
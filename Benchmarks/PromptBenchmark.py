@@ -0,0 +1,47 @@
+import asyncio
+import logging
+import statistics
+import time
+
+from Helpers.ExtractQueryInfo import extract_query_info
+
+REQUESTS = 20_000
+MESSAGE = "which primates would a zoologist find worth seeing, ranked by headcount"
+# Rough size of a Gemini token for English prose and JSON
+BYTES_PER_TOKEN = 4
+
+
+class _RecordingGemini:
+    """Stands in for GeminiClient, keeping the last prompt instead of sending it"""
+
+    def __init__(self):
+        self.prompt = ""
+
+    async def chat(self, prompt: str) -> str:
+        self.prompt = prompt
+        return '{"tool_name": "get_monkeys", "arguments": {}}'
+
+
+async def _build_seconds(gemini: _RecordingGemini) -> list:
+    """Per-request time to produce the prompt and parse the canned answer, without any network"""
+    timings = []
+    for i in range(REQUESTS):
+        start = time.perf_counter()
+        await extract_query_info(f"{MESSAGE} #{i}", gemini)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    logging.disable(logging.INFO)
+    gemini = _RecordingGemini()
+    timings = asyncio.run(_build_seconds(gemini))
+    prompt_bytes = len(gemini.prompt.encode())
+    print(f"prompt bytes/request={prompt_bytes:,} (~{prompt_bytes // BYTES_PER_TOKEN:,} tokens) "
+          f"whitespace={sum(character.isspace() for character in gemini.prompt):,} chars")
+    print(f"prompt build + parse: p50={statistics.median(timings) * 1e6:.1f}us "
+          f"mean={statistics.fmean(timings) * 1e6:.1f}us over {REQUESTS:,} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import time
+import tracemalloc
+
+from Benchmarks.SyntheticData import generate_monkey_dicts
+from Models.Monkey import Monkey
+from Models.ToolResult import RowSetResult
+from Services.MonkeyTable import MonkeyTable
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def _timed(func) -> (float, float):
+    """Seconds to the first byte and to the last byte of one response"""
+    start = time.perf_counter()
+    first_byte = None
+    for _ in func():
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+    return first_byte, time.perf_counter() - start
+
+
+def _peak_mb(func) -> float:
+    """Peak memory traced while producing one response; timed separately as tracing slows Python down"""
+    tracemalloc.start()
+    for _ in func():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def main():
+    for size in SIZES:
+        table = MonkeyTable([Monkey.from_dict(data) for data in generate_monkey_dicts(size)])
+        positions = table.order("Population", descending=True)
+
+        def result():
+            return RowSetResult(lambda: table.rows(table.fields, positions))
+
+        def buffered():
+            return [result().to_json_bytes()]
+
+        def streamed():
+            return result().iter_ndjson()
+
+        buffered_first, buffered_total = _timed(buffered)
+        streamed_first, streamed_total = _timed(streamed)
+        print(f"records={size:<9} buffered: first byte={buffered_first * 1000:7.0f}ms "
+              f"total={buffered_total * 1000:7.0f}ms "
+              f"peak={_peak_mb(buffered):6.1f}MB | streamed: first byte={streamed_first * 1000:5.2f}ms "
+              f"total={streamed_total * 1000:7.0f}ms peak={_peak_mb(streamed):4.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import random
+from typing import Iterator, List
+
+_prefixes = ["Golden", "Black", "Red", "Gray", "Pygmy", "Spider", "Howler", "Squirrel", "Snub-nosed", "Woolly",
+             "Silver", "Crested", "Bearded", "White-faced", "Long-tailed", "Dusky", "Northern", "Southern"]
+_kinds = ["Monkey", "Macaque", "Langur", "Tamarin", "Marmoset", "Baboon", "Capuchin", "Colobus", "Douc", "Gelada",
+          "Mandrill", "Lemur", "Titi", "Saki", "Uakari"]
+_syllables = ["ba", "ko", "ru", "mi", "ta", "ne", "lo", "si", "da", "pe", "gu", "ha", "vi", "zo", "ka", "nu", "ri",
+              "te", "mo", "la", "fe", "yu"]
+_locations = ["Africa & Asia", "Central & South America", "Borneo", "China", "Indonesia", "Vietnam", "Japan",
+              "Southern Cameroon, Gabon, and Congo", "Ethiopia", "Brazil", "Sri Lanka", "Madagascar", "Peru"]
+
+
+def _species(i: int) -> str:
+    """A pronounceable three-syllable species word, distinct for each i below len(_syllables) ** 3"""
+    count = len(_syllables)
+    return _syllables[i % count] + _syllables[(i // count) % count] + _syllables[(i // count // count) % count]
+
+
+def synthetic_name(i: int) -> str:
+    """Unique, realistic-looking name for the i-th synthetic monkey"""
+    species_count = len(_syllables) ** 3
+    species = _species(i % species_count)
+    prefix = _prefixes[(i // species_count) % len(_prefixes)]
+    kind = _kinds[(i // species_count // len(_prefixes)) % len(_kinds)]
+    cycle = i // (species_count * len(_prefixes) * len(_kinds))
+    name = f"{prefix} {species.capitalize()} {kind}"
+    return f"{name} {cycle + 1}" if cycle else name
+
+
+def generate_monkey_dicts(count: int, seed: int = 42) -> List[dict]:
+    """Generate a reproducible synthetic monkeys feed with unique names"""
+    return list(iter_monkey_dicts(count, seed))
+
+
+def iter_monkey_dicts(count: int, seed: int = 42) -> Iterator[dict]:
+    """Yield the rows of generate_monkey_dicts one at a time, for feeds too large to hold in memory"""
+    rng = random.Random(seed)
+    for i in range(count):
+        prefix = _prefixes[(i // len(_syllables) ** 3) % len(_prefixes)]
+        kind = _kinds[(i // len(_syllables) ** 3 // len(_prefixes)) % len(_kinds)]
+        location = rng.choice(_locations)
+        yield {
+            "Name": synthetic_name(i),
+            "Location": location,
+            "Details": f"The {prefix.lower()} {kind.lower()} is a primate found in {location}.",
+            "Image": f"https://example.org/monkeys/{i}.jpg",
+            "Population": rng.randint(0, 100000) if rng.random() > 0.02 else None,
+            "Latitude": round(rng.uniform(-60, 60), 6),
+            "Longitude": round(rng.uniform(-180, 180), 6)
+        }
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import logging
+import time
+
+from flask import Flask
+
+from Agents.McpServer import McpServer
+from Benchmarks.FakeServers import start_fake_monkeys
+from Benchmarks.SyntheticData import generate_monkey_dicts
+from Services.MonkeyService import MonkeyService
+from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.ResponseCache import encode_result
+
+SIZES = [10_000, 100_000]
+REQUESTS = 5
+
+
+async def _before(mcp_server: McpServer, app: Flask):
+    """The previous pipeline: indented text in the tool, json.loads in Chat.post, re-encoded by Flask"""
+    monkeys = await mcp_server.monkey_service.get_monkeys_async()
+    text = json.dumps([monkey.to_dict() for monkey in monkeys], indent=2)
+    parsed = json.loads(text)
+    body = app.json.dumps({"response": parsed}).encode()
+    return len(text) + len(body)
+
+
+async def _after(mcp_server: McpServer):
+    result = await mcp_server.call_tool("get_monkeys", {})
+    encoded = encode_result(result["result"])
+    return len(encoded.body)
+
+
+async def _measure(coroutine_factory):
+    copied = []
+    start = time.process_time()
+    for _ in range(REQUESTS):
+        copied.append(await coroutine_factory())
+    cpu_ms = (time.process_time() - start) / REQUESTS * 1000
+    return cpu_ms, copied
+
+
+def main():
+    logging.disable(logging.INFO)
+    app = Flask(__name__)
+    for size in SIZES:
+        fake = start_fake_monkeys(generate_monkey_dicts(size))
+        try:
+            mcp_server = McpServer(MonkeyService(MonkeyServiceOptions(fake.url)))
+            asyncio.run(mcp_server.monkey_service.get_monkeys_async())
+
+            with app.app_context():
+                before_ms, before_bytes = asyncio.run(_measure(lambda: _before(mcp_server, app)))
+
+            start = time.process_time()
+            first_bytes = asyncio.run(_after(mcp_server))
+            first_ms = (time.process_time() - start) * 1000
+            after_ms, after_bytes = asyncio.run(_measure(lambda: _after(mcp_server)))
+
+            print(f"records={size:<7} before:      cpu={before_ms:8.1f}ms  bytes={before_bytes[-1]:>12,}  per request")
+            print(f"{'':<15} after first: cpu={first_ms:8.1f}ms  bytes={2 * first_bytes:>12,}  (encodes the list once)")
+            print(f"{'':<15} after:       cpu={after_ms:8.1f}ms  bytes={after_bytes[-1]:>12,}  per request")
+        finally:
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
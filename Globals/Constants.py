@@ -35,6 +35,34 @@ Monkeys_Url = os.getenv("MONKEYS_URL")
 Gemini_Key = os.getenv("GEMINI_KEY")
 Gemini_Api_Url = os.getenv("GEMINI_API_URL")
 
+#Gemini Transport
+GEMINI_CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", 5))
+GEMINI_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", 30))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", 100))
+
+#Gemini Resilience
+GEMINI_DEADLINE = float(os.getenv("GEMINI_DEADLINE", 15))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", 3))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", 0.2))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", 2))
+GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "false").lower() == "true"
+GEMINI_HEDGE_QUANTILE = float(os.getenv("GEMINI_HEDGE_QUANTILE", 0.95))
+GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", 0.05))
+GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", 20))
+GEMINI_LATENCY_WINDOW = int(os.getenv("GEMINI_LATENCY_WINDOW", 200))
+GEMINI_BREAKER_FAILURES = int(os.getenv("GEMINI_BREAKER_FAILURES", 5))
+GEMINI_BREAKER_COOLDOWN = float(os.getenv("GEMINI_BREAKER_COOLDOWN", 30))
+
+#Admission Control
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", 0))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 20))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", 100000))
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv("GEMINI_MAX_IN_FLIGHT", 32))
+GEMINI_MAX_QUEUED = int(os.getenv("GEMINI_MAX_QUEUED", 64))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 2))
+OVERLOAD_RETRY_AFTER = int(os.getenv("OVERLOAD_RETRY_AFTER", 1))
+
 #Swagger
 Swagger_Version = os.getenv('VERSION')
 Swagger_Title = os.getenv('TITLE')
@@ -42,6 +70,64 @@ Swagger_Description = os.getenv('DESCRIPTION')
 Swagger_Doc = os.getenv('DOC')
 Swagger_Prefix = os.getenv('PREFIX')
 CACHE_EXPIRATION_TIME=30
+MONKEYS_REQUEST_TIMEOUT = float(os.getenv("MONKEYS_REQUEST_TIMEOUT", 10))
+MONKEYS_RETRY_BASE_DELAY = float(os.getenv("MONKEYS_RETRY_BASE_DELAY", 5))
+MONKEYS_RETRY_MAX_DELAY = float(os.getenv("MONKEYS_RETRY_MAX_DELAY", 300))
+
+#Snapshot Store
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "")
+
+#Multi-Process
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "")
+SHARED_SNAPSHOT_POLL_SECONDS = float(os.getenv("SHARED_SNAPSHOT_POLL_SECONDS", 1))
+SHARED_RESPONSE_CACHE_MEMORY_BYTES = int(os.getenv("SHARED_RESPONSE_CACHE_MEMORY_BYTES", 8 * 1024 * 1024))
+
+#Feed Loading
+FEED_CHUNK_BYTES = int(os.getenv("FEED_CHUNK_BYTES", 1024 * 1024))
+
+#Response Cache
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+#Search
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", 10))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", 100))
+
+#Pagination
+PAGE_DEFAULT_LIMIT = int(os.getenv("PAGE_DEFAULT_LIMIT", 100))
+PAGE_MAX_LIMIT = int(os.getenv("PAGE_MAX_LIMIT", 1000))
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 500))
+
+#Geo Search
+NEAR_DEFAULT_LIMIT = int(os.getenv("NEAR_DEFAULT_LIMIT", 10))
+NEAR_MAX_LIMIT = int(os.getenv("NEAR_MAX_LIMIT", 1000))
+
+#Serving
+SERVING_MODE = os.getenv("SERVING_MODE", "async")
+CHAT_REQUEST_TIMEOUT = float(os.getenv("CHAT_REQUEST_TIMEOUT", 60))
+
+#Batch Chat
+CHAT_BATCH_MAX_MESSAGES = int(os.getenv("CHAT_BATCH_MAX_MESSAGES", 1000))
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", 16))
+CHAT_BATCH_TIMEOUT = float(os.getenv("CHAT_BATCH_TIMEOUT", 300))
+
+#MCP
+MCP_PROTOCOL_VERSION = os.getenv("MCP_PROTOCOL_VERSION", "2025-03-26")
+MCP_REQUEST_TIMEOUT = float(os.getenv("MCP_REQUEST_TIMEOUT", 60))
+MCP_MAX_BATCH_MESSAGES = int(os.getenv("MCP_MAX_BATCH_MESSAGES", 1000))
+MCP_SSE_CHUNK_BYTES = int(os.getenv("MCP_SSE_CHUNK_BYTES", 1 << 20))
+
+#Intent Router
+INTENT_ROUTER_MIN_CONFIDENCE = float(os.getenv("INTENT_ROUTER_MIN_CONFIDENCE", 0.9))
+INTENT_ROUTER_DEGRADED_MIN_CONFIDENCE = float(os.getenv("INTENT_ROUTER_DEGRADED_MIN_CONFIDENCE", 0.5))
+
+#Field Correction
+FIELD_CORRECTION_MAX_DISTANCE = int(os.getenv("FIELD_CORRECTION_MAX_DISTANCE", 2))
+FIELD_CORRECTION_MEMO_SIZE = int(os.getenv("FIELD_CORRECTION_MEMO_SIZE", 10000))
+
+#Plan Cache
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", 4096))
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", 3600))
+PLAN_CACHE_DB = os.getenv("PLAN_CACHE_DB", "")
 
 #Namespaces
 MCP_NS = Namespace('mcp', description='MCP (Model Context Protocol) operations')
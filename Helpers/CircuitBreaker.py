@@ -0,0 +1,64 @@
+import logging
+import time
+from threading import Lock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Stops calls to an upstream after consecutive failures, letting one probe through once the cooldown passes"""
+
+    def __init__(self, name: str, failure_threshold: int, cooldown_seconds: float):
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._cooldown_seconds = cooldown_seconds
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = Lock()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if self._cooldown_elapsed() else "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half-open state only one probe at a time is allowed"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or not self._cooldown_elapsed():
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit {self._name} closed")
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._probing or (self._opened_at is None and self._consecutive_failures >= self._failure_threshold):
+                if self._opened_at is None:
+                    self.times_opened += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+                logger.warning(f"Circuit {self._name} open for {self._cooldown_seconds}s after "
+                               f"{self._consecutive_failures} consecutive failures")
+
+    def release_probe(self):
+        """Give back a half-open probe slot without an outcome, as when the caller abandoned the call"""
+        with self._lock:
+            self._probing = False
+
+    def _cooldown_elapsed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self._cooldown_seconds
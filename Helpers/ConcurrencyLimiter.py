@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Future
+from threading import Lock
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyFull(Exception):
+    """Raised when a slot cannot be had: the wait queue is full or the wait timed out"""
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent calls across every thread and event loop, queueing a bounded number of callers in FIFO order"""
+
+    def __init__(self, max_in_flight: int, max_queued: int, queue_timeout: float):
+        self._max_in_flight = max_in_flight
+        self._max_queued = max_queued
+        self._queue_timeout = queue_timeout
+        self._in_flight = 0
+        self._waiters = deque()
+        self._lock = Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        """Take a slot, waiting up to the queue timeout behind earlier callers"""
+        with self._lock:
+            if self._in_flight < self._max_in_flight and not self._waiters:
+                self._in_flight += 1
+                return
+            if len(self._waiters) >= self._max_queued:
+                raise ConcurrencyFull(f"{self._in_flight} calls in flight and {len(self._waiters)} queued")
+            waiter = Future()
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(waiter), self._queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as ex:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    granted = False
+                else:
+                    granted = not waiter.cancelled()
+            if granted:
+                # The slot was handed over just as the wait ended, so give it to the next caller
+                self.release()
+            if isinstance(ex, asyncio.CancelledError):
+                raise
+            raise ConcurrencyFull(f"no slot within {self._queue_timeout}s")
+
+    def release(self):
+        """Hand the slot to the longest waiting caller, or free it"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self._in_flight -= 1
@@ -0,0 +1,37 @@
+import base64
+import hashlib
+import json
+from typing import Optional
+
+cursor_arguments = {"cursor", "limit"}
+
+
+def query_fingerprint(tool_name: str, arguments: dict) -> str:
+    """Fingerprint of a paged query, so a cursor can only continue the query that produced it"""
+    query = {key: value for key, value in arguments.items() if key not in cursor_arguments}
+    encoded = json.dumps([tool_name, query], sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+def encode_cursor(version: int, offset: int, fingerprint: str) -> str:
+    """Opaque token for the page starting at offset in a given dataset version"""
+    encoded = json.dumps([version, offset, fingerprint], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(encoded).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: Optional[str], version: int, fingerprint: str) -> int:
+    """Offset a cursor points at, checking it belongs to this query and dataset version"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_version, offset, cursor_fingerprint = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if cursor_fingerprint != fingerprint or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Cursor does not belong to this query")
+    if cursor_version != version:
+        raise ValueError(f"Cursor belongs to dataset version {cursor_version} but the data is now at version "
+                         f"{version}; start again without a cursor")
+    return offset
@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import os
+from threading import Lock, Thread
+from typing import Any, Coroutine, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class EventLoopRunner:
+    """Runs coroutines on one long-lived event loop owned by a background thread"""
+
+    def __init__(self, name: str = "event-loop"):
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._lock = Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the shared loop, starting it in this process if needed"""
+        pid = os.getpid()
+        if self._loop is not None and self._pid == pid:
+            return self._loop
+
+        with self._lock:
+            if self._loop is None or self._pid != pid:
+                loop = asyncio.new_event_loop()
+                Thread(target=self._run_forever, args=(loop,), name=self._name, daemon=True).start()
+                self._loop = loop
+                self._pid = pid
+                logger.info(f"Started shared event loop in process {pid}")
+            return self._loop
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the shared loop and wait for its result from a worker thread"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self):
+        """Stop the shared loop"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            self._pid = None
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
@@ -1,23 +1,25 @@
 import json
 import logging
 import re
+import textwrap
+from typing import Optional, List
 from Agents.GeminiClient import GeminiClient
 from Globals.Constants import available_fields
+from Helpers.IntentRouter import IntentRouter
+from Helpers.Metrics import metrics
+from Models.Monkey import Monkey
+from Services.ToolRegistry import monkey_tool_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+planner_fallbacks = metrics.counter("planner_fallbacks_total",
+                                    "Gemini plans replaced by 'Request Is Out Of Context', by reason", ["reason"])
 
-async def extract_query_info(user_input: str, gemini_client: GeminiClient) -> dict:
-    tool_descriptions = {
-        "get_monkeys": "Gets a complete list of all monkeys with their full details. Use when the user asks for 'all monkeys' or 'list all monkeys' without specific fields, sorting, or filtering.",
-        "get_monkeys_filtered": "Gets monkeys with specific fields, optional sorting by 'Name', 'Location', 'Details', 'Image', 'Population', 'Latitude', 'Longitude', and optional sort order ('asc' or 'desc'). Use when the user asks for monkeys with specific columns, or wants to sort them, or implies a general listing with criteria.",
-        "get_monkey": "Gets detailed information about a single specific monkey by its name. Use when the user asks for a particular monkey by name (e.g., 'show details for mandrill', 'find chimpanzee').",
-        "get_monkey_business": "Returns fun monkey emojis. Use when the user asks for 'monkey business' or something similar.",
-        "refresh_monkey_cache": "Refreshes the monkey data cache. Use when the user explicitly asks to 'refresh monkey data' or 'update monkeys'."
-    }
+TOOL_DESCRIPTIONS = monkey_tool_registry.descriptions()
 
-    prompt = f"""
+# Everything in the prompt but the request itself; str.format keeps the doubled braces of the JSON examples literal
+PROMPT_TEMPLATE = textwrap.dedent("""\
         You are an **exclusive, specialized, and non-conversational Monkey Data API assistant**. Your ONLY function is to determine which tool to use from a predefined list and extract its precise arguments based on the user's request. You operate purely as a tool-calling agent.
 
         **ABSOLUTELY CRITICAL INSTRUCTIONS (MUST ADHERE):**
@@ -28,9 +30,9 @@ async def extract_query_info(user_input: str, gemini_client: GeminiClient) -> di
         5.  **JSON Output Only**: Your response MUST be a valid JSON object with ONLY two top-level keys: "tool_name" (string) and "arguments" (JSON object). No other text, explanations, or markdown fences.
 
         Here are the available tools and their descriptions:
-        {json.dumps(tool_descriptions, indent=2)}
+        {tool_descriptions}
 
-        Available fields for 'get_monkeys_filtered' are: {list(available_fields.values())}.
+        Available fields for 'get_monkeys_filtered' are: {fields}.
         Sort orders are 'asc' (ascending) or 'desc' (descending).
 
         Based on the user's request, decide the most appropriate tool and its arguments.
@@ -67,9 +69,13 @@ async def extract_query_info(user_input: str, gemini_client: GeminiClient) -> di
         User: "Sort the monkeys by lifespan, ascending"
         Response: {{"tool_name": "get_monkeys_filtered", "arguments": {{"sort_by": "Lifespan", "sort_order": "asc"}}}}
 
-        Example 10 (Filter by endangered status):
-        User: "Show me monkeys that are endangered"
-        Response: {{"tool_name": "get_monkeys_filtered", "arguments": {{"filters": {{"Status": "Endangered"}}}}}}
+        Example 10 (Filter by location text):
+        User: "Show me monkeys that live in Borneo"
+        Response: {{"tool_name": "get_monkeys_filtered", "arguments": {{"filters": {{"Location": {{"contains": "Borneo"}}}}}}}}
+
+        Example 10b (Filter by a numeric range, sorted):
+        User: "monkeys with a population between 1000 and 20000, largest first"
+        Response: {{"tool_name": "get_monkeys_filtered", "arguments": {{"filters": {{"Population": {{"between": [1000, 20000]}}}}, "sort_by": "Population", "sort_order": "desc"}}}}
 
         Example 11 (Request with completely unknown intent):
         User: "How do I bake banana bread?"
@@ -83,10 +89,35 @@ async def extract_query_info(user_input: str, gemini_client: GeminiClient) -> di
         User: "get all monkeys, only name fields"
         Response: {{"tool_name": "get_monkeys_filtered", "arguments": {{"fields": ["Name"]}}}}
 
+        Example 14 (Search monkeys by partial name):
+        User: "find up to 5 monkeys whose name starts with golden"
+        Response: {{"tool_name": "search_monkeys", "arguments": {{"query": "golden", "limit": 5}}}}
+
+        Example 15 (Monkeys near a point):
+        User: "which 3 monkeys live closest to latitude 1.5, longitude 110.3?"
+        Response: {{"tool_name": "get_monkeys_near", "arguments": {{"latitude": 1.5, "longitude": 110.3, "limit": 3}}}}
+
+        Example 16 (Monkeys within a distance of another monkey):
+        User: "monkeys within 500 km of the Proboscis Monkey"
+        Response: {{"tool_name": "get_monkeys_near", "arguments": {{"name": "Proboscis Monkey", "radius_km": 500}}}}
+
         Your response MUST be a valid JSON object. Do not include any other text or formatting.
 
-        Request: "{user_input}"
-        """
+""")
+
+PROMPT_PREFIX = PROMPT_TEMPLATE.format(tool_descriptions=json.dumps(TOOL_DESCRIPTIONS, indent=2),
+                                       fields=list(available_fields.values()))
+
+
+async def extract_query_info(user_input: str, gemini_client: GeminiClient,
+                             intent_router: Optional[IntentRouter] = None,
+                             monkeys: Optional[List[Monkey]] = None) -> dict:
+    if intent_router:
+        local_plan = intent_router.route(user_input, monkeys)
+        if local_plan:
+            return local_plan
+
+    prompt = f'{PROMPT_PREFIX}Request: "{user_input}"\n'
 
     response = await gemini_client.chat(prompt)
     try:
@@ -102,12 +133,15 @@ async def extract_query_info(user_input: str, gemini_client: GeminiClient) -> di
 
         if "tool_name" not in parsed_response or "arguments" not in parsed_response:
             logger.warning(f"Gemini response missing 'tool_name' or 'arguments': {response}")
+            planner_fallbacks.labels("incomplete_plan").inc()
             return {"tool_name": "chat", "arguments": {"message": "Request Is Out Of Context"}}
 
         return parsed_response
     except json.JSONDecodeError:
         logger.error(f"Failed to parse Gemini JSON response: {response}")
+        planner_fallbacks.labels("unparseable_plan").inc()
         return {"tool_name": "chat", "arguments": {"message": "Request Is Out Of Context"}}
     except Exception as e:
         logger.error(f"An unexpected error occurred in extract_query_info: {e}")
+        planner_fallbacks.labels("error").inc()
         return {"tool_name": "chat", "arguments": {"message": "Request Is Out Of Context"}}
\ No newline at end of file
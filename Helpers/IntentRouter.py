@@ -0,0 +1,200 @@
+import logging
+import re
+from threading import Lock
+from typing import Optional, List, Dict, Tuple
+from Globals.Constants import available_fields, words_pattern, separators_pattern, INTENT_ROUTER_MIN_CONFIDENCE, \
+    INTENT_ROUTER_DEGRADED_MIN_CONFIDENCE
+from Models.Monkey import Monkey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+token_pattern = r"[a-z0-9]+"
+sort_by_pattern = r"\bby\s+([a-z0-9]+)"
+
+list_words = {"all", "every", "monkeys", "list", "everything"}
+desc_words = {"desc", "descending", "highest", "largest", "biggest", "most", "reverse", "reversed"}
+asc_words = {"asc", "ascending", "lowest", "smallest", "least"}
+sort_words = {"sort", "sorted", "order", "ordered", "by"}
+filler_words = {
+    "a", "about", "also", "an", "and", "any", "are", "but", "can", "column", "columns", "data", "detail", "display",
+    "do", "fetch", "field", "fields", "find", "for", "from", "get", "give", "i", "in", "info", "information", "is",
+    "just", "let", "like", "look", "me", "monkey", "need", "of", "on", "only", "or", "please", "return", "s", "see",
+    "show", "tell", "the", "their", "them", "then", "to", "up", "us", "want", "what", "with", "would", "you"
+}
+
+
+class IntentRouterStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def record(self, hit: bool):
+        """Record whether a query was answered locally"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self) -> dict:
+        """Get a point-in-time copy of the counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0
+            }
+
+
+class IntentRouter:
+    """Deterministic fast path that plans common queries without calling Gemini"""
+
+    def __init__(self, min_confidence: float = INTENT_ROUTER_MIN_CONFIDENCE):
+        self._min_confidence = min_confidence
+        self._field_lookup = self._build_field_lookup()
+        self._names_source: Optional[List[Monkey]] = None
+        self._name_lookup: Dict[Tuple[str, ...], str] = {}
+        self._max_name_length = 0
+        self._names_lock = Lock()
+        self.stats = IntentRouterStats()
+
+    def route(self, user_input: str, monkeys: Optional[List[Monkey]] = None) -> Optional[dict]:
+        """Plan a query locally, or return None when confidence is too low"""
+        plan, confidence = self._plan(user_input, monkeys or [])
+        hit = plan is not None and confidence >= self._min_confidence
+        self.stats.record(hit)
+
+        if not hit:
+            logger.info(f"Intent router miss (confidence {confidence:.2f}), falling back to Gemini")
+            return None
+
+        logger.info(f"Intent router hit: {plan['tool_name']}")
+        return plan
+
+    def best_effort(self, user_input: str, monkeys: Optional[List[Monkey]] = None) -> Optional[dict]:
+        """Plan a query locally at the lower degraded-mode confidence, for when Gemini cannot be reached"""
+        plan, confidence = self._plan(user_input, monkeys or [])
+        if plan is None or confidence < INTENT_ROUTER_DEGRADED_MIN_CONFIDENCE:
+            return None
+        logger.info(f"Degraded plan from intent router: {plan['tool_name']} (confidence {confidence:.2f})")
+        return plan
+
+    def _plan(self, user_input: str, monkeys: List[Monkey]) -> Tuple[Optional[dict], float]:
+        text = user_input.lower()
+        tokens = re.findall(token_pattern, text)
+        if not tokens:
+            return None, 0.0
+
+        if "business" in tokens:
+            return {"tool_name": "get_monkey_business", "arguments": {}}, self._confidence(tokens, {"business"})
+
+        if tokens[0] in ("refresh", "update", "reload"):
+            return {"tool_name": "refresh_monkey_cache", "arguments": {}}, \
+                self._confidence(tokens, {"refresh", "update", "reload", "cache", "monkeys"})
+
+        name, tokens = self._match_monkey_name(tokens, monkeys)
+        sort_by = self._match_sort_by(text)
+        fields = self._match_fields(re.sub(sort_by_pattern, " ", text))
+        sort_order = self._match_sort_order(tokens)
+
+        known = set(list_words) | desc_words | asc_words | sort_words | set(self._field_lookup)
+        confidence = self._confidence(tokens, known)
+
+        if name:
+            if sort_by or list_words.intersection(tokens):
+                return None, 0.0
+            return {"tool_name": "get_monkey", "arguments": {"name": name}}, confidence
+
+        if "monkeys" not in tokens and "monkey" not in tokens:
+            return None, 0.0
+
+        if not fields and not sort_by and sort_order is None:
+            return {"tool_name": "get_monkeys", "arguments": {}}, confidence
+
+        if sort_by and sort_by not in self._field_lookup:
+            return None, 0.0
+
+        arguments = {}
+        if fields:
+            arguments["fields"] = fields
+        if sort_by:
+            arguments["sort_by"] = self._field_lookup[sort_by]
+            arguments["sort_order"] = sort_order or "asc"
+        elif sort_order is not None:
+            return None, 0.0
+
+        return {"tool_name": "get_monkeys_filtered", "arguments": arguments}, confidence
+
+    @staticmethod
+    def _build_field_lookup() -> Dict[str, str]:
+        lookup = {}
+        for key, field in available_fields.items():
+            lookup[key] = field
+            lookup[key + "s"] = field
+        return lookup
+
+    def _match_fields(self, text: str) -> List[str]:
+        """Find requested fields, preferring an explicit 'with:' list"""
+        words_match = re.search(words_pattern, text, re.IGNORECASE)
+        if words_match:
+            candidates = [w.strip() for w in re.split(separators_pattern, words_match.group(1))]
+        else:
+            candidates = re.findall(token_pattern, text)
+
+        fields = []
+        for candidate in candidates:
+            field = self._field_lookup.get(candidate)
+            if field and field not in fields:
+                fields.append(field)
+        return fields
+
+    @staticmethod
+    def _match_sort_by(text: str) -> Optional[str]:
+        match = re.search(sort_by_pattern, text)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def _match_sort_order(tokens: List[str]) -> Optional[str]:
+        if desc_words.intersection(tokens):
+            return "desc"
+        if asc_words.intersection(tokens):
+            return "asc"
+        return None
+
+    def _match_monkey_name(self, tokens: List[str], monkeys: List[Monkey]) -> Tuple[Optional[str], List[str]]:
+        """Find the longest monkey name in the tokens and remove it from them"""
+        self._ensure_name_lookup(monkeys)
+
+        for length in range(min(self._max_name_length, len(tokens)), 0, -1):
+            for start in range(len(tokens) - length + 1):
+                name = self._name_lookup.get(tuple(tokens[start:start + length]))
+                if name:
+                    return name, tokens[:start] + tokens[start + length:]
+        return None, tokens
+
+    def _ensure_name_lookup(self, monkeys: List[Monkey]):
+        """Rebuild the name lookup when the cached dataset changes"""
+        if monkeys is self._names_source:
+            return
+
+        with self._names_lock:
+            if monkeys is self._names_source:
+                return
+            lookup = {}
+            for monkey in monkeys:
+                if monkey.Name:
+                    lookup[tuple(re.findall(token_pattern, monkey.Name.lower()))] = monkey.Name
+            self._name_lookup = lookup
+            self._max_name_length = max((len(key) for key in lookup), default=0)
+            self._names_source = monkeys
+
+    @staticmethod
+    def _confidence(tokens: List[str], known: set) -> float:
+        """Fraction of tokens the router understands"""
+        if not tokens:
+            return 1.0
+        recognized = sum(1 for t in tokens if t in known or t in filler_words)
+        return recognized / len(tokens)
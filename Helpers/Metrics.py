@@ -0,0 +1,195 @@
+import math
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, List, Sequence, Tuple
+
+default_buckets = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+counter_stats = {"hits", "disk_hits", "misses", "evictions", "expirations", "invalidations", "retained"}
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        """Context manager observing the seconds spent in its block, whether or not it raises"""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = Lock()
+        if not self.label_names:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh series for one combination of label values"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    @abstractmethod
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        """Exposition lines for one series"""
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally split by labels"""
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, optionally split by labels"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = default_buckets):
+        self._bounds = tuple(sorted(buckets))
+        super().__init__(name, help_text, label_names)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _new_child(self):
+        return _HistogramChild(self._bounds)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (math.inf,), list(child.counts)):
+            cumulative += count
+            labels = _format_labels(self.label_names, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = default_buckets) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def render_stats(component: str, stats: dict) -> str:
+    """Expose the numeric entries of a component's stats() as Prometheus samples"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if key in counter_stats:
+            name, kind = f"{component}_{key}_total", "counter"
+        else:
+            name, kind = f"{component}_{key}", "gauge"
+        lines.extend([f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"])
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+from Globals.Constants import PLAN_CACHE_SIZE, PLAN_CACHE_TTL, PLAN_CACHE_DB
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+whitespace_pattern = r"\s+"
+
+
+def plan_fingerprint(*parts) -> str:
+    """Fingerprint of everything a cached plan depends on, such as the tool set and field map"""
+    encoded = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def normalize_input(user_input: str) -> str:
+    """Normalize user input so trivially different messages share a cache entry"""
+    return re.sub(whitespace_pattern, " ", user_input).strip().strip(".!?").strip().lower()
+
+
+class PlanCache:
+    """LRU + TTL cache of final (tool_name, arguments) plans with an optional SQLite tier"""
+
+    def __init__(self, fingerprint: str, max_size: int = PLAN_CACHE_SIZE, ttl_seconds: float = PLAN_CACHE_TTL,
+                 db_path: Optional[str] = PLAN_CACHE_DB):
+        self._fingerprint = fingerprint
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db = self._open_db(db_path) if db_path else None
+
+    def get(self, user_input: str) -> Optional[dict]:
+        """Get the cached plan for a message, or None"""
+        key = normalize_input(user_input)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, encoded = entry
+                if now - stored_at <= self._ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(encoded)
+                self._remove(key)
+                self.expirations += 1
+
+            row = self._db_get(key, now)
+            if row is not None:
+                stored_at, encoded = row
+                self._insert(key, stored_at, encoded)
+                self.disk_hits += 1
+                return json.loads(encoded)
+
+            self.misses += 1
+            return None
+
+    def put(self, user_input: str, plan: dict):
+        """Cache the final plan for a message"""
+        key = normalize_input(user_input)
+        encoded = json.dumps(plan, sort_keys=True)
+        now = time.time()
+
+        with self._lock:
+            self._insert(key, now, encoded)
+            self._db_put(key, now, encoded)
+
+    def invalidate(self, fingerprint: Optional[str] = None):
+        """Drop every cached plan, optionally switching to a new fingerprint"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if fingerprint:
+                self._fingerprint = fingerprint
+            self._db_execute("DELETE FROM plans")
+        logger.info("Plan cache invalidated")
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "fingerprint": self._fingerprint
+            }
+
+    def _insert(self, key: str, stored_at: float, encoded: str):
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (stored_at, encoded)
+        self._bytes += len(key) + len(encoded)
+        while len(self._entries) > self._max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, encoded = self._entries.pop(key)
+        self._bytes -= len(key) + len(encoded)
+
+    def _open_db(self, db_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        # Write-ahead logging lets worker processes sharing the file read while one of them writes
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS plans ("
+                   "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, stored_at REAL NOT NULL, plan TEXT NOT NULL)")
+        stale = db.execute("DELETE FROM plans WHERE fingerprint != ?", (self._fingerprint,)).rowcount
+        db.commit()
+        if stale:
+            logger.info(f"Dropped {stale} persisted plans built for a different tool set")
+        return db
+
+    def _db_execute(self, statement: str, parameters: tuple = ()) -> list:
+        if not self._db:
+            return []
+        try:
+            rows = self._db.execute(statement, parameters).fetchall()
+            self._db.commit()
+            return rows
+        except sqlite3.Error as ex:
+            logger.warning(f"Shared plan cache unavailable: {ex}")
+            return []
+
+    def _db_get(self, key: str, now: float) -> Optional[Tuple[float, str]]:
+        rows = self._db_execute("SELECT stored_at, plan FROM plans WHERE key = ? AND fingerprint = ?",
+                                (key, self._fingerprint))
+        if not rows:
+            return None
+        stored_at, encoded = rows[0]
+        if now - stored_at > self._ttl_seconds:
+            self._db_execute("DELETE FROM plans WHERE key = ?", (key,))
+            self.expirations += 1
+            return None
+        return stored_at, encoded
+
+    def _db_put(self, key: str, stored_at: float, encoded: str):
+        self._db_execute("INSERT OR REPLACE INTO plans (key, fingerprint, stored_at, plan) VALUES (?, ?, ?, ?)",
+                         (key, self._fingerprint, stored_at, encoded))
@@ -0,0 +1,119 @@
+import logging
+from typing import List, Optional
+from Agents.GeminiClient import GeminiClient
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+from Globals.Constants import available_fields
+from Helpers.ExtractQueryInfo import extract_query_info
+from Helpers.IntentRouter import IntentRouter
+from Helpers.Metrics import metrics
+from Helpers.PlanCache import PlanCache
+from Helpers.WordCorrection import FuzzyCorrector, correct_typos
+from Models.Monkey import Monkey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+planning_stage_seconds = metrics.histogram("planning_stage_seconds", "Time spent in each query planning stage",
+                                           ["stage"])
+_plan_cache_span = planning_stage_seconds.labels("plan_cache")
+_extract_span = planning_stage_seconds.labels("extract_query_info")
+_correct_span = planning_stage_seconds.labels("correct_arguments")
+degraded_plans = metrics.counter("planner_degraded_plans_total",
+                                 "Queries planned by the local heuristic because Gemini was unavailable")
+
+
+class QueryPlanner:
+    """Turns a chat message into a corrected (tool_name, arguments) plan"""
+
+    def __init__(self, gemini_client: GeminiClient, intent_router: IntentRouter, field_corrector: FuzzyCorrector,
+                 plan_cache: Optional[PlanCache] = None):
+        self._gemini_client = gemini_client
+        self._intent_router = intent_router
+        self._field_corrector = field_corrector
+        self._plan_cache = plan_cache
+
+    async def plan(self, user_input: str, monkeys: Optional[List[Monkey]] = None) -> dict:
+        """Get the plan for a message, from the cache when possible"""
+        if self._plan_cache:
+            with _plan_cache_span.time():
+                cached_plan = self._plan_cache.get(user_input)
+            if cached_plan is not None:
+                return cached_plan
+
+        try:
+            with _extract_span.time():
+                query_info = await extract_query_info(user_input, self._gemini_client, self._intent_router, monkeys)
+        except GeminiUnavailableException:
+            degraded_plan = self._intent_router.best_effort(user_input, monkeys)
+            if degraded_plan is None:
+                raise
+            # Degraded plans are not cached, so the query is planned properly once Gemini is back
+            degraded_plans.inc()
+            return {"tool_name": degraded_plan["tool_name"],
+                    "arguments": await self._correct_arguments(degraded_plan["arguments"])}
+        tool_name = query_info.get("tool_name")
+        arguments = query_info.get("arguments", {})
+
+        if tool_name == "chat":
+            return {"tool_name": tool_name, "arguments": arguments}
+
+        with _correct_span.time():
+            plan = {"tool_name": tool_name, "arguments": await self._correct_arguments(arguments)}
+        if self._plan_cache:
+            self._plan_cache.put(user_input, plan)
+        return plan
+
+    async def _correct_arguments(self, arguments: dict) -> dict:
+        arguments = self._coerce_optional_arguments(arguments)
+        corrected_arguments = arguments.copy()
+
+        argument_fields = arguments.get("fields")
+        if isinstance(argument_fields, list) and \
+                not all(field in available_fields.values() for field in argument_fields):
+            corrected_field_names_map = await correct_typos(
+                self._gemini_client, argument_fields, available_fields, self._field_corrector
+            )
+            filtered_fields = [
+                corrected for original, corrected in corrected_field_names_map.items()
+                if corrected in available_fields.values()
+            ]
+            corrected_arguments["fields"] = filtered_fields
+
+        argument_filters = arguments.get("filters")
+        if isinstance(argument_filters, dict):
+            corrected_arguments["filters"] = {
+                self._field_corrector.correct(field) or field if isinstance(field, str) else field: condition
+                for field, condition in argument_filters.items()
+            }
+
+        if isinstance(arguments.get("sort_by"), str):
+            sort_by = arguments["sort_by"]
+            sort_by = next(
+                (f for f in available_fields.values() if f.lower() == sort_by.lower()),
+                sort_by
+            )
+            corrected_arguments["sort_by"] = sort_by
+
+        if isinstance(arguments.get("sort_order"), str):
+            sort_order = arguments["sort_order"].lower()
+            if sort_order in ["asc", "desc"]:
+                corrected_arguments["sort_order"] = sort_order
+
+        return corrected_arguments
+
+    @staticmethod
+    def _coerce_optional_arguments(arguments: dict) -> dict:
+        """Repair or drop malformed optional arguments in a model's plan, which the tool schemas would reject"""
+        coerced = arguments.copy()
+        argument_fields = coerced.get("fields")
+        if isinstance(argument_fields, str):
+            coerced["fields"] = [argument_fields]
+        elif isinstance(argument_fields, list):
+            coerced["fields"] = [field for field in argument_fields if isinstance(field, str)]
+        elif argument_fields is not None:
+            del coerced["fields"]
+
+        for name, expected_type in (("sort_by", str), ("sort_order", str), ("filters", dict)):
+            if coerced.get(name) is not None and not isinstance(coerced[name], expected_type):
+                del coerced[name]
+        return coerced
@@ -0,0 +1,36 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Tuple
+
+
+class RateLimiter:
+    """Per-client token buckets refilled at a steady rate; the least recently seen clients are forgotten first"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int):
+        self._rate = rate
+        self._burst = burst
+        self._max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._rate > 0
+
+    def acquire(self, client: str, cost: float = 1) -> float:
+        """Take cost tokens from the client's bucket; returns 0 when allowed, else the seconds until it would be"""
+        if not self.enabled:
+            return 0.0
+        cost = min(cost, self._burst)
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self._burst, now))
+            tokens = min(self._burst, tokens + (now - updated_at) * self._rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self._max_clients:
+                self._buckets.popitem(last=False)
+        return 0.0 if allowed else (cost - tokens) / self._rate
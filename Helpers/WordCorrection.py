@@ -1,10 +1,128 @@
 import json
 import re
 import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+from Globals.Constants import FIELD_CORRECTION_MAX_DISTANCE, FIELD_CORRECTION_MEMO_SIZE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """Optimal string alignment distance, giving up once it exceeds max_distance"""
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_row = None
+    row = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        before_previous_row, previous_row = previous_row, row
+        row = [i] + [0] * len(target)
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and source[i - 1] == target[j - 2] and source[i - 2] == target[j - 1]:
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+        if min(row) > max_distance:
+            return max_distance + 1
+    return row[-1]
+
+
+def _deletes(word: str, depth: int) -> Set[str]:
+    """Every string reachable from word by removing up to depth characters"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyCorrector:
+    """Edit-distance corrector over a fixed vocabulary, backed by a symmetric-delete index"""
+
+    def __init__(self, vocabulary: Dict[str, str], max_distance: int = FIELD_CORRECTION_MAX_DISTANCE,
+                 memo_size: int = FIELD_CORRECTION_MEMO_SIZE, index_depth: Optional[int] = None):
+        self._max_distance = max_distance
+        self._memo_size = memo_size
+        self._index_depth = max_distance if index_depth is None else index_depth
+        self._terms: Dict[str, str] = {}
+        self._index: Dict[str, List[str]] = {}
+        self._memo: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._lock = Lock()
+        self.extend(vocabulary.values())
+        for alias, term in vocabulary.items():
+            self._terms.setdefault(alias.lower(), term)
+
+    def extend(self, terms: Iterable[str]):
+        """Add terms such as monkey names or locations to the vocabulary"""
+        with self._lock:
+            for term in terms:
+                if not term or term.lower() in self._terms:
+                    continue
+                key = term.lower()
+                self._terms[key] = term
+                for variant in _deletes(key, self._index_depth):
+                    self._index.setdefault(variant, []).append(key)
+            self._memo.clear()
+
+    def correct(self, word: str) -> Optional[str]:
+        """Get the closest known term for a word, or None when nothing is close enough"""
+        key = word.strip().lower()
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+
+        corrected = self._terms.get(key) or self._closest(key)
+
+        with self._lock:
+            self._memo[key] = corrected
+            if len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return corrected
+
+    def correct_many(self, words: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """Correct a list of words, returning the mapping and the words left unresolved"""
+        mapping = {}
+        unresolved = []
+        for word in words:
+            if not isinstance(word, str):
+                continue
+            corrected = self.correct(word)
+            if corrected:
+                mapping[word] = corrected
+            else:
+                unresolved.append(word)
+        return mapping, unresolved
+
+    def candidates(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Get every known term within the allowed distance of a word, closest first"""
+        key = word.strip().lower()
+        if not key:
+            return []
+
+        if max_distance is None:
+            max_distance = min(self._max_distance, max(1, len(key) // 3))
+        candidates = {candidate for variant in _deletes(key, min(max_distance, self._index_depth))
+                      for candidate in self._index.get(variant, ())}
+
+        ranked = []
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                ranked.append(((distance, abs(len(candidate) - len(key)), candidate), self._terms[candidate]))
+        ranked.sort()
+        return [(term, rank[0]) for rank, term in ranked]
+
+    def _closest(self, key: str) -> Optional[str]:
+        candidates = self.candidates(key)
+        return candidates[0][0] if candidates else None
+
+
 async def correct_typos_with_gemini(gemini_client, words, available_fields):
     prompt = (
         "You are a helpful assistant. The following is a list of possibly misspelled field names:\n"
@@ -16,7 +134,11 @@ async def correct_typos_with_gemini(gemini_client, words, available_fields):
         "Return only the JSON mapping."
     )
 
-    response = await gemini_client.chat(prompt)
+    try:
+        response = await gemini_client.chat(prompt)
+    except GeminiUnavailableException as e:
+        logger.warning(f"Cannot correct field names {words}: {e}")
+        return {}
 
     try:
         json_match = re.search(r"```json\n(.*)\n```", response, re.DOTALL)
@@ -29,3 +151,12 @@ async def correct_typos_with_gemini(gemini_client, words, available_fields):
     except Exception as e:
         logger.error(f"Error correcting field names: {e}")
         return {}
+
+
+async def correct_typos(gemini_client, words, available_fields, corrector: FuzzyCorrector) -> dict:
+    """Correct field names locally, asking Gemini only about words with no close candidate"""
+    mapping, unresolved = corrector.correct_many(words)
+    if unresolved:
+        logger.info(f"No local correction for {unresolved}, falling back to Gemini")
+        mapping.update(await correct_typos_with_gemini(gemini_client, unresolved, available_fields))
+    return mapping
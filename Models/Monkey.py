@@ -1,4 +1,6 @@
 class Monkey:
+    __slots__ = ("Name", "Location", "Details", "Image", "Population", "Latitude", "Longitude")
+
     def __init__(self, Name: str, Location: str, Details: str, Image: str, Population: int, Latitude: float, Longitude: float):
         self.Name = Name
         self.Location = Location
@@ -0,0 +1,91 @@
+import json
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+from Globals.Constants import STREAM_CHUNK_ROWS
+
+
+def encode_json(data: Any) -> bytes:
+    """Compact JSON encoding used for everything written to clients"""
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+class ToolResult:
+    """Structured tool output, optionally carrying its already-encoded JSON form"""
+
+    def __init__(self, data: Any = None, encoded: Optional[bytes] = None):
+        self._data = data
+        self._encoded = encoded
+
+    @property
+    def data(self) -> Any:
+        if self._data is None and self._encoded is not None:
+            self._data = json.loads(self._encoded)
+        return self._data
+
+    def to_json_bytes(self) -> bytes:
+        """JSON encoding of the result, computed at most once"""
+        if self._encoded is None:
+            self._encoded = encode_json(self.data)
+        return self._encoded
+
+    def to_text(self) -> str:
+        """Text form for MCP text content: plain strings stay as they are"""
+        if isinstance(self._data, str):
+            return self._data
+        return self.to_json_bytes().decode()
+
+    def to_mcp_content(self) -> dict:
+        """MCP tools/call result for this output"""
+        return {"content": [{"type": "text", "text": self.to_text()}], "isError": False}
+
+
+class RowSetResult(ToolResult):
+    """Tool output made of rows that are only produced when encoded, so they can also be streamed"""
+
+    def __init__(self, rows: Callable[[], Iterable[Any]], paged: bool = False, next_cursor: Optional[str] = None,
+                 encoder: Optional[Callable[[], bytes]] = None):
+        super().__init__()
+        self._rows = rows
+        self._encoder = encoder
+        self.paged = paged
+        self.next_cursor = next_cursor
+
+    @property
+    def data(self) -> Any:
+        if self._data is None:
+            if self.paged:
+                self._data = {"monkeys": list(self._rows()), "next_cursor": self.next_cursor}
+            else:
+                self._data = list(self._rows())
+        return self._data
+
+    def to_json_bytes(self) -> bytes:
+        """JSON encoding of the rows, taken from the encoder when one is shared across requests"""
+        if self._encoded is None and self._encoder is not None:
+            self._encoded = self._encoder()
+        return super().to_json_bytes()
+
+    def iter_ndjson(self, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+        """Encode the rows as newline-delimited JSON, chunk_rows rows per yielded chunk"""
+        rows = iter(self._rows())
+        while True:
+            chunk = b"".join(encode_json(row) + b"\n" for row in islice(rows, chunk_rows))
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_json(self, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+        """The same bytes as to_json_bytes, produced chunk_rows rows at a time unless already encoded"""
+        if self._encoded is not None or self._encoder is not None:
+            yield self.to_json_bytes()
+            return
+        rows = iter(self._rows())
+        yield b'{"monkeys":[' if self.paged else b"["
+        separator = b""
+        while True:
+            chunk = b",".join(map(encode_json, islice(rows, chunk_rows)))
+            if not chunk:
+                break
+            yield separator + chunk
+            separator = b","
+        yield b'],"next_cursor":' + encode_json(self.next_cursor) + b"}" if self.paged else b"]"
@@ -0,0 +1,93 @@
+import math
+from typing import Optional
+from Globals.Constants import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, NEAR_DEFAULT_LIMIT, NEAR_MAX_LIMIT
+from Helpers.Cursor import cursor_arguments
+from Services.MonkeyFilter import MonkeyFilterIndex
+from Services.MonkeyGeoIndex import MonkeyGeoIndex
+from Services.MonkeyIndex import MonkeyIndex, name_key
+from Services.MonkeySnapshot import MonkeySnapshot
+from Services.MonkeyTable import MonkeyTable
+
+# Slack on distance bounds, so a changed row exactly as far away as a cached result's last row still counts
+distance_tolerance = 1e-9
+# Listings whose limit pages through the result; elsewhere a limit only caps how many matches come back
+paged_tools = {"get_monkeys", "get_monkeys_filtered"}
+
+
+class ChangeImpact:
+    """Decides which cached tool results a snapshot's changes can alter, by asking each cached query of an index
+    holding only the changed rows, both their previous and their new versions"""
+
+    def __init__(self, snapshot: MonkeySnapshot):
+        self._snapshot = snapshot
+        self._changes = snapshot.changes
+        self._rows = self._changes.removed_rows + self._changes.added_rows
+        self._names = {name_key(monkey.Name) for monkey in self._rows if monkey.Name}
+        self._index: Optional[MonkeyIndex] = None
+        self._filters: Optional[MonkeyFilterIndex] = None
+        self._geo: Optional[MonkeyGeoIndex] = None
+
+    @classmethod
+    def of(cls, snapshot: MonkeySnapshot) -> Optional["ChangeImpact"]:
+        """Impact of a snapshot's changes, or None when it was not diffed against the version before it"""
+        return cls(snapshot) if snapshot.changes is not None else None
+
+    def affects(self, tool_name: str, arguments: dict) -> bool:
+        """Whether the cached result of a tool call may differ in the new snapshot"""
+        if not self._changes.order_preserved or tool_name in paged_tools and cursor_arguments & arguments.keys():
+            # Moved rows reorder listings, and every page carries a cursor for its dataset version
+            return True
+        try:
+            if tool_name == "get_monkey":
+                return name_key(arguments["name"]) in self._names
+            if tool_name == "search_monkeys":
+                limit = min(int(arguments.get("limit", SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT)
+                return bool(self._changed_index().search(arguments["query"].strip(), limit))
+            if tool_name == "get_monkeys_filtered" and arguments.get("filters"):
+                return bool(self._changed_filters().select(arguments["filters"]))
+            if tool_name == "get_monkeys_near":
+                return self._affects_nearest(arguments)
+        except Exception:
+            return True
+        return True
+
+    def _affects_nearest(self, arguments: dict) -> bool:
+        origin = None
+        if arguments.get("name"):
+            if name_key(arguments["name"]) in self._names:
+                return True
+            origin = self._snapshot.index.get(arguments["name"])
+            if origin is None:
+                return True
+            latitude, longitude = origin.Latitude, origin.Longitude
+        else:
+            latitude, longitude = arguments.get("latitude"), arguments.get("longitude")
+
+        limit = min(int(arguments.get("limit", NEAR_DEFAULT_LIMIT)), NEAR_MAX_LIMIT) + (origin is not None)
+        radius_km = arguments.get("radius_km")
+        nearest = self._snapshot.geo.nearest(latitude, longitude, limit, radius_km)
+        # Changed rows farther out than everything the result holds cannot enter it or have been in it before
+        if len(nearest) == limit:
+            bound = nearest[-1][1] * (1 + distance_tolerance) if nearest else 0.0
+        elif radius_km is not None:
+            bound = radius_km * (1 + distance_tolerance)
+        else:
+            bound = math.inf
+        if bound == math.inf:
+            return self._changed_geo().size > 0
+        return bool(self._changed_geo().nearest(latitude, longitude, 1, bound))
+
+    def _changed_index(self) -> MonkeyIndex:
+        if self._index is None:
+            self._index = MonkeyIndex(self._rows)
+        return self._index
+
+    def _changed_filters(self) -> MonkeyFilterIndex:
+        if self._filters is None:
+            self._filters = MonkeyFilterIndex(MonkeyTable(self._rows))
+        return self._filters
+
+    def _changed_geo(self) -> MonkeyGeoIndex:
+        if self._geo is None:
+            self._geo = MonkeyGeoIndex(self._rows)
+        return self._geo
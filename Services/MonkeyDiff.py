@@ -0,0 +1,102 @@
+import gc
+from array import array
+from collections import deque
+from itertools import compress, repeat
+from operator import attrgetter, eq, lt, not_
+from typing import List, Optional, Tuple
+from Models.Monkey import Monkey
+
+row_values = attrgetter(*Monkey.__slots__)
+row_name = attrgetter("Name")
+
+
+class MonkeyDiff:
+    """Keyed difference between two dataset loads, matching rows by Name"""
+
+    def __init__(self, monkeys: List[Monkey], inserted: List[Monkey], updated: List[Tuple[Monkey, Monkey]],
+                 deleted: List[Monkey], remap: array, changed_positions: List[int], removed_positions: List[int],
+                 order_preserved: bool, rows_moved: bool):
+        # The new load, with every unchanged row replaced by the previous load's object for it
+        self.monkeys = monkeys
+        self.inserted = inserted
+        self.updated = updated
+        self.deleted = deleted
+        # Position in the new load of every previous row that is still there unchanged, else -1
+        self.remap = remap
+        # Positions in the new load of inserted and updated rows, ascending
+        self.changed_positions = changed_positions
+        # Positions in the previous load of the rows in removed_rows, in the same order
+        self.removed_positions = removed_positions
+        # Whether the unchanged rows kept their relative order
+        self.order_preserved = order_preserved
+        # Whether any unchanged or updated row is at a different position, so remap is not the identity
+        self.rows_moved = rows_moved
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.inserted or self.updated or self.deleted) and self.order_preserved
+
+    @property
+    def removed_rows(self) -> List[Monkey]:
+        """Previous versions of the rows that are gone or changed"""
+        return self.deleted + [previous for previous, _ in self.updated]
+
+    @property
+    def added_rows(self) -> List[Monkey]:
+        """New versions of the rows that are new or changed"""
+        return self.inserted + [current for _, current in self.updated]
+
+    def summary(self) -> str:
+        return f"{len(self.inserted)} inserted, {len(self.updated)} updated, {len(self.deleted)} deleted"
+
+    @classmethod
+    def compute(cls, previous: List[Monkey], current: List[Monkey]) -> Optional["MonkeyDiff"]:
+        """Diff two loads, or None when their rows cannot be matched by name because names are missing or repeated"""
+        # The row tuples hold no reference cycles, so collections triggered by allocating them would find nothing
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return cls._compute(previous, current)
+        finally:
+            if collecting:
+                gc.enable()
+
+    @classmethod
+    def _compute(cls, previous: List[Monkey], current: List[Monkey]) -> Optional["MonkeyDiff"]:
+        previous_names = list(map(row_name, previous))
+        current_names = list(map(row_name, current))
+        previous_positions = dict(zip(previous_names, range(len(previous))))
+        if len(previous_positions) != len(previous) or None in previous_positions or \
+                len(set(current_names)) != len(current) or None in current_names:
+            return None
+
+        previous_rows = list(map(row_values, previous))
+        current_rows = list(map(row_values, current))
+        if previous_rows == current_rows:
+            return cls(previous, [], [], [], array("i", range(len(previous))), [], [], True, False)
+
+        # Every row is compared with the previous row of the same name, wherever it was; new names match past the end
+        missing = len(previous)
+        matched = list(map(previous_positions.get, current_names, repeat(missing)))
+        previous_rows.append(None)
+        same = list(map(eq, map(previous_rows.__getitem__, matched), current_rows))
+
+        monkeys = [previous[match] if unchanged else monkey for match, unchanged, monkey in zip(matched, same, current)]
+        kept = list(compress(matched, same))
+        kept_positions = list(compress(range(len(current)), same))
+        remap = array("i", [-1]) * len(previous)
+        deque(map(remap.__setitem__, kept, kept_positions), maxlen=0)
+
+        changed_positions = list(compress(range(len(current)), map(not_, same)))
+        inserted = [current[position] for position in changed_positions if matched[position] == missing]
+        updated_at = [position for position in changed_positions if matched[position] != missing]
+        updated = [(previous[matched[position]], current[position]) for position in updated_at]
+        updated_positions = list(map(matched.__getitem__, updated_at))
+        rows_moved = kept != kept_positions or updated_positions != updated_at
+
+        seen = set(matched)
+        deleted_positions = [position for position in range(len(previous)) if position not in seen]
+        deleted = list(map(previous.__getitem__, deleted_positions))
+        order_preserved = all(map(lt, kept, kept[1:]))
+        return cls(monkeys, inserted, updated, deleted, remap, changed_positions,
+                   deleted_positions + updated_positions, order_preserved, rows_moved)
@@ -0,0 +1,145 @@
+import codecs
+import gc
+import json
+import logging
+import re
+import sys
+from typing import Any, Iterable, Iterator, List, Optional
+from Models.Monkey import Monkey
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+feed_fields = ("Name", "Location", "Details", "Image", "Population", "Latitude", "Longitude")
+separator_pattern = re.compile(r"[ \t\r\n,]*")
+
+
+class FeedStats:
+    """Counts of feed problems fixed or dropped while loading"""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped_rows = 0
+        self.invalid_values = 0
+
+    def snapshot(self) -> dict:
+        return {"rows": self.rows, "skipped_rows": self.skipped_rows, "invalid_values": self.invalid_values}
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array as its bytes arrive, without holding the whole document"""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    text, position, exhausted, opened = "", 0, False, False
+
+    def read_more() -> bool:
+        nonlocal text, position, exhausted
+        if exhausted:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            text = text[position:] + utf8.decode(b"", final=True)
+        else:
+            text = text[position:] + utf8.decode(chunk)
+        position = 0
+        return True
+
+    while True:
+        position = separator_pattern.match(text, position).end()
+        if position == len(text):
+            if read_more():
+                continue
+            raise ValueError("Monkeys feed ended before its closing bracket")
+
+        if not opened:
+            if text[position] != "[":
+                raise ValueError("Monkeys feed must be a JSON array")
+            opened = True
+            position += 1
+            continue
+
+        if text[position] == "]":
+            return
+
+        try:
+            element, end = decoder.raw_decode(text, position)
+        except json.JSONDecodeError:
+            if read_more():
+                continue
+            raise
+        if end == len(text) and read_more():
+            continue
+        position = end
+        yield element
+
+
+def _text(value: Any, stats: FeedStats) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    stats.invalid_values += 1
+    return None
+
+
+def _integer(value: Any, stats: FeedStats) -> Optional[int]:
+    if type(value) is int or value is None:
+        return value
+    try:
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, str):
+            return int(value.strip())
+    except ValueError:
+        pass
+    stats.invalid_values += 1
+    return None
+
+
+def _coordinate(value: Any, stats: FeedStats) -> Optional[float]:
+    if type(value) is float or value is None:
+        return value
+    try:
+        if type(value) is int or isinstance(value, str):
+            return float(value)
+    except ValueError:
+        pass
+    stats.invalid_values += 1
+    return None
+
+
+def load_monkeys(chunks: Iterable[bytes], stats: Optional[FeedStats] = None) -> List[Monkey]:
+    """Parse a monkeys feed incrementally, checking types and interning locations in the same pass"""
+    stats = stats or FeedStats()
+    monkeys = []
+    # Rows hold no reference cycles, so collections triggered by millions of allocations would find nothing
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        for row in iter_json_array(chunks):
+            if not isinstance(row, dict):
+                stats.skipped_rows += 1
+                continue
+
+            name, location, details, image, population, latitude, longitude = map(row.get, feed_fields)
+            if type(name) is not str or type(location) is not str or type(details) is not str or \
+                    type(image) is not str:
+                name, location, details, image = (_text(value, stats) for value in (name, location, details, image))
+            if type(population) is not int:
+                population = _integer(population, stats)
+            if type(latitude) is not float:
+                latitude = _coordinate(latitude, stats)
+            if type(longitude) is not float:
+                longitude = _coordinate(longitude, stats)
+            if location is not None:
+                location = sys.intern(location)
+            monkeys.append(Monkey(name, location, details, image, population, latitude, longitude))
+    finally:
+        if collecting:
+            gc.enable()
+
+    stats.rows = len(monkeys)
+    if stats.skipped_rows or stats.invalid_values:
+        logger.warning(f"Monkeys feed had {stats.skipped_rows} non-object rows and {stats.invalid_values} "
+                       f"values of the wrong type")
+    return monkeys
@@ -0,0 +1,218 @@
+import re
+from bisect import bisect_left, bisect_right
+from numbers import Number
+from typing import Any, Callable, Dict, Iterable, List, Set
+from Services.MonkeyTable import MonkeyTable
+
+range_fields = {"Population", "Latitude", "Longitude"}
+text_fields = {"Location", "Details"}
+equality_index_fields = {"Name", "Location"}
+range_operators = {"gt", "gte", "lt", "lte", "between"}
+filter_token_pattern = re.compile(r"[a-z0-9]+")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _fold(value: Any) -> Any:
+    return value.casefold() if isinstance(value, str) else value
+
+
+class _ValueGroups:
+    """Row positions per distinct case-folded value; unique values store a bare position instead of a list"""
+
+    def __init__(self, column: list):
+        self._first: Dict[Any, int] = {}
+        self._repeated: Dict[Any, List[int]] = {}
+        keys = map(str.casefold, column) if set(map(type, column)) <= {str} else map(_fold, column)
+        for position, key in enumerate(keys):
+            first = self._first.setdefault(key, position)
+            if first != position:
+                self._repeated.setdefault(key, [first]).append(position)
+
+    def values(self) -> Iterable[Any]:
+        return self._first.keys()
+
+    def positions(self, value: Any) -> List[int]:
+        if value in self._repeated:
+            return self._repeated[value]
+        return [self._first[value]] if value in self._first else []
+
+
+class _Predicate:
+    """One compiled filter condition: an estimated row count, a way to produce its rows and a per-value test"""
+
+    def __init__(self, field: str, estimate: int, materialize: Callable[[], Iterable[int]],
+                 test: Callable[[Any], bool]):
+        self.field = field
+        self.estimate = estimate
+        self.materialize = materialize
+        self.test = test
+
+
+class MonkeyFilterIndex:
+    """Per-field indexes answering 'filters' predicates, built once per cache load"""
+
+    def __init__(self, table: MonkeyTable):
+        self._table = table
+
+        self._sorted_values: Dict[str, List[Any]] = {}
+        self._sorted_positions: Dict[str, List[int]] = {}
+        for field in range_fields:
+            column = table.columns[field]
+            positions = table.ascending(field)[:table.non_null_count(field)]
+            values = list(map(column.__getitem__, positions))
+            if not set(map(type, values)) <= {int, float}:
+                numeric = [i for i, value in enumerate(values) if _is_number(value)]
+                positions = [positions[i] for i in numeric]
+                values = [values[i] for i in numeric]
+            self._sorted_positions[field] = positions
+            self._sorted_values[field] = values
+
+        groups = {field: _ValueGroups(table.columns[field]) for field in equality_index_fields | text_fields}
+        self._equality = {field: groups[field] for field in equality_index_fields}
+
+        self._tokens: Dict[str, Dict[str, List[int]]] = {}
+        for field in text_fields:
+            postings: Dict[str, List[int]] = {}
+            for value in groups[field].values():
+                if isinstance(value, str):
+                    positions = groups[field].positions(value)
+                    for token in set(filter_token_pattern.findall(value)):
+                        postings.setdefault(token, []).extend(positions)
+            self._tokens[field] = postings
+
+    def select(self, filters: Dict[str, Any]) -> Set[int]:
+        """Row positions matching every filter, driven by the most selective indexed condition"""
+        if not isinstance(filters, dict):
+            raise ValueError("Filters must be an object mapping field names to conditions")
+
+        predicates = []
+        for field, condition in filters.items():
+            if field not in self._table.columns:
+                raise ValueError(f"Unknown filter field: {field}")
+            conditions = condition if isinstance(condition, dict) else {"eq": condition}
+            for operator, operand in conditions.items():
+                predicates.append(self._compile(field, operator, operand))
+
+        if not predicates:
+            return set(range(self._table.size))
+
+        predicates.sort(key=lambda predicate: predicate.estimate)
+        selected = set(predicates[0].materialize())
+        for predicate in predicates[1:]:
+            if not selected:
+                break
+            column = self._table.columns[predicate.field]
+            selected = {position for position in selected if predicate.test(column[position])}
+        return selected
+
+    def _compile(self, field: str, operator: str, operand: Any) -> _Predicate:
+        if operator == "eq":
+            if field in range_fields and _is_number(operand):
+                return self._range(field, {"gte": operand, "lte": operand})
+            return self._equal(field, operand)
+        if operator in range_operators:
+            return self._range(field, self._bounds(field, operator, operand))
+        if operator in ("contains", "tokens"):
+            if field not in text_fields:
+                raise ValueError(f"Text filters are only supported on {sorted(text_fields)}")
+            if not isinstance(operand, str):
+                raise ValueError(f"Filter '{operator}' on {field} needs a string")
+            return self._tokens_match(field, operand) if operator == "tokens" else self._contains(field, operand)
+        raise ValueError(f"Unknown filter operator: {operator}")
+
+    def _scan(self, field: str, test: Callable[[Any], bool]) -> Callable[[], Iterable[int]]:
+        column = self._table.columns[field]
+        return lambda: (position for position, value in enumerate(column) if test(value))
+
+    def _equal(self, field: str, operand: Any) -> _Predicate:
+        folded = _fold(operand)
+
+        def test(value):
+            return _fold(value) == folded
+
+        if field in self._equality:
+            positions = self._equality[field].positions(folded)
+            return _Predicate(field, len(positions), lambda: positions, test)
+        return _Predicate(field, self._table.size, self._scan(field, test), test)
+
+    @staticmethod
+    def _bounds(field: str, operator: str, operand: Any) -> Dict[str, Any]:
+        if field not in range_fields:
+            raise ValueError(f"Range filters are only supported on {sorted(range_fields)}")
+        if operator != "between":
+            bounds = {operator: operand}
+        elif isinstance(operand, (list, tuple)) and len(operand) == 2:
+            bounds = {"gte": operand[0], "lte": operand[1]}
+        else:
+            raise ValueError("Filter 'between' needs a [low, high] pair")
+        if not all(_is_number(bound) for bound in bounds.values()):
+            raise ValueError(f"Range filter on {field} needs numeric bounds")
+        return bounds
+
+    def _range(self, field: str, bounds: Dict[str, Any]) -> _Predicate:
+        values = self._sorted_values[field]
+        start, end = 0, len(values)
+        if "gte" in bounds:
+            start = bisect_left(values, bounds["gte"])
+        if "gt" in bounds:
+            start = bisect_right(values, bounds["gt"])
+        if "lte" in bounds:
+            end = bisect_right(values, bounds["lte"])
+        if "lt" in bounds:
+            end = bisect_left(values, bounds["lt"])
+        end = max(start, end)
+
+        def test(value):
+            return _is_number(value) and all((
+                "gte" not in bounds or value >= bounds["gte"],
+                "gt" not in bounds or value > bounds["gt"],
+                "lte" not in bounds or value <= bounds["lte"],
+                "lt" not in bounds or value < bounds["lt"],
+            ))
+
+        return _Predicate(field, end - start, lambda: self._sorted_positions[field][start:end], test)
+
+    def _tokens_match(self, field: str, text: str) -> _Predicate:
+        """Rows whose text contains every word of the operand"""
+        postings = self._tokens[field]
+        tokens = sorted(set(filter_token_pattern.findall(text.casefold())), key=lambda t: len(postings.get(t, ())))
+
+        def materialize():
+            if not tokens:
+                return ()
+            result = set(postings.get(tokens[0], ()))
+            for token in tokens[1:]:
+                result.intersection_update(postings.get(token, ()))
+            return result
+
+        def test(value):
+            return isinstance(value, str) and set(tokens) <= set(filter_token_pattern.findall(value.casefold()))
+
+        estimate = len(postings.get(tokens[0], ())) if tokens else 0
+        return _Predicate(field, estimate, materialize, test)
+
+    def _contains(self, field: str, text: str) -> _Predicate:
+        """Rows whose text contains the operand as a substring, case-insensitively"""
+        needle = text.casefold()
+
+        def test(value):
+            return isinstance(value, str) and needle in value.casefold()
+
+        if field in self._equality:
+            values = self._equality[field]
+            groups = [values.positions(value) for value in values.values()
+                      if isinstance(value, str) and needle in value]
+            return _Predicate(field, sum(len(positions) for positions in groups),
+                              lambda: (position for positions in groups for position in positions), test)
+
+        words = filter_token_pattern.findall(needle)
+        whole_words = words[1:-1]
+        if whole_words:
+            narrowing = self._tokens_match(field, " ".join(whole_words))
+            column = self._table.columns[field]
+            return _Predicate(field, narrowing.estimate,
+                              lambda: (p for p in narrowing.materialize() if test(column[p])), test)
+        return _Predicate(field, self._table.size, self._scan(field, test), test)
@@ -0,0 +1,249 @@
+import math
+from array import array
+from bisect import bisect_right
+from heapq import nsmallest
+from numbers import Number
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from Models.Monkey import Monkey
+from Services.MonkeyDiff import MonkeyDiff
+
+earth_radius_km = 6371.0088
+target_points_per_cell = 8
+min_cell_degrees = 0.05
+max_cell_degrees = 10.0
+
+
+def _valid_coordinates(latitude, longitude) -> bool:
+    return all(isinstance(value, Number) and not isinstance(value, bool) for value in (latitude, longitude)) and \
+        -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+def _located(latitude, longitude) -> bool:
+    return type(latitude) in (int, float) and type(longitude) in (int, float) and -90 <= latitude <= 90 and \
+        -180 <= longitude <= 180
+
+
+def _half_chord(theta: float) -> float:
+    """Haversine term for an angular distance; it grows with distance, so points are ranked by it"""
+    return math.sin(theta / 2) ** 2
+
+
+def _angle(half_chord: float) -> float:
+    return 2 * math.asin(math.sqrt(min(1.0, half_chord)))
+
+
+class MonkeyGeoIndex:
+    """Equal-angle latitude/longitude grid for nearest and within-radius queries, built once per cache load"""
+
+    def __init__(self, monkeys: List[Monkey]):
+        latitudes = [m.Latitude for m in monkeys]
+        longitudes = [m.Longitude for m in monkeys]
+        located = [position for position, (lat, lon) in enumerate(zip(latitudes, longitudes)) if _located(lat, lon)]
+        self.size = len(located)
+        self._cell_degrees = self._choose_cell_degrees([latitudes[p] for p in located],
+                                                       [longitudes[p] for p in located])
+        self._rows = math.ceil(180 / self._cell_degrees)
+        self._columns = math.ceil(360 / self._cell_degrees)
+
+        cell_of = [0] * len(monkeys)
+        for position in located:
+            cell_of[position] = self._cell(latitudes[position], longitudes[position])
+        located.sort(key=cell_of.__getitem__)
+
+        # Points are stored cell by cell, so each cell is one contiguous slice of these arrays
+        self._positions = array("I", located)
+        self._latitudes = array("d", map(math.radians, map(latitudes.__getitem__, located)))
+        self._longitudes = array("d", map(math.radians, map(longitudes.__getitem__, located)))
+        self._cos_latitudes = array("d", map(math.cos, self._latitudes))
+
+        self._cells: Dict[int, Tuple[int, int]] = {}
+        start = 0
+        for end in range(1, len(located) + 1):
+            if end == len(located) or cell_of[located[end]] != cell_of[located[start]]:
+                self._cells[cell_of[located[start]]] = (start, end)
+                start = end
+
+    def apply(self, monkeys: List[Monkey], diff: MonkeyDiff) -> "MonkeyGeoIndex":
+        """Index for the next load on the same grid, copying the points of untouched cells a run at a time and
+        rebuilding only the cells changed rows leave or enter; the cell size is only chosen again on a full build"""
+        if not diff.order_preserved:
+            # Copied cells would keep their points in the old row order, which breaks ties differently
+            return MonkeyGeoIndex(monkeys)
+        index = MonkeyGeoIndex.__new__(MonkeyGeoIndex)
+        index._cell_degrees, index._rows, index._columns = self._cell_degrees, self._rows, self._columns
+
+        removed: Dict[int, Set[int]] = {}
+        for monkey, position in zip(diff.removed_rows, diff.removed_positions):
+            if _located(monkey.Latitude, monkey.Longitude):
+                removed.setdefault(self._cell(monkey.Latitude, monkey.Longitude), set()).add(position)
+        added: Dict[int, List[int]] = {}
+        for position in diff.changed_positions:
+            monkey = monkeys[position]
+            if _located(monkey.Latitude, monkey.Longitude):
+                added.setdefault(self._cell(monkey.Latitude, monkey.Longitude), []).append(position)
+
+        remap = diff.remap
+        index._positions, index._latitudes, index._longitudes, index._cos_latitudes = \
+            array("I"), array("d"), array("d"), array("d")
+
+        def copy(start: int, end: int):
+            positions = self._positions[start:end]
+            index._positions.extend(map(remap.__getitem__, positions) if diff.rows_moved else positions)
+            index._latitudes.extend(self._latitudes[start:end])
+            index._longitudes.extend(self._longitudes[start:end])
+            index._cos_latitudes.extend(self._cos_latitudes[start:end])
+
+        counts = {cell: end - start for cell, (start, end) in self._cells.items()}
+        occupied = list(self._cells)
+        copied = 0
+        for cell in sorted(removed.keys() | added.keys()):
+            if cell in self._cells:
+                start, end = self._cells[cell]
+            else:
+                following = bisect_right(occupied, cell)
+                start = end = self._cells[occupied[following]][0] if following < len(occupied) else self.size
+            copy(copied, start)
+            copied = end
+
+            gone = removed.get(cell, ())
+            points = [(remap[self._positions[point]], self._latitudes[point], self._longitudes[point],
+                       self._cos_latitudes[point]) for point in range(start, end) if self._positions[point] not in gone]
+            for position in added.get(cell, ()):
+                latitude, longitude = math.radians(monkeys[position].Latitude), math.radians(monkeys[position].Longitude)
+                points.append((position, latitude, longitude, math.cos(latitude)))
+            # Within a cell points are ordered by position, as a full build orders them
+            points.sort()
+            for position, latitude, longitude, cos_latitude in points:
+                index._positions.append(position)
+                index._latitudes.append(latitude)
+                index._longitudes.append(longitude)
+                index._cos_latitudes.append(cos_latitude)
+            counts[cell] = len(points)
+        copy(copied, self.size)
+
+        index.size = len(index._positions)
+        index._cells = {}
+        start = 0
+        for cell in sorted(cell for cell, count in counts.items() if count):
+            index._cells[cell] = (start, start + counts[cell])
+            start += counts[cell]
+        return index
+
+    def nearest(self, latitude: float, longitude: float, limit: int,
+                radius_km: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Row positions and distances in km of the closest points, optionally only those within radius_km"""
+        if not _valid_coordinates(latitude, longitude):
+            raise ValueError("Latitude must be within [-90, 90] and longitude within [-180, 180]")
+        if radius_km is not None:
+            return self._within(latitude, longitude, radius_km, limit)
+        if limit <= 0 or not self.size:
+            return []
+
+        longitude = (longitude + 180) % 360 - 180
+        latitude_radians, longitude_radians = math.radians(latitude), math.radians(longitude)
+        cos_latitude = math.cos(latitude_radians)
+        center_row, center_column = divmod(self._cell(latitude, longitude), self._columns)
+
+        best: List[Tuple[float, int]] = []
+        visited = set()
+        for ring in range(max(self._rows, self._columns)):
+            # Once a ring is half the grid wide its west and east columns wrap onto the same cells
+            ring_cells = [cell for cell in dict.fromkeys(self._ring(center_row, center_column, ring))
+                          if cell not in visited]
+            visited.update(ring_cells)
+            candidates = self._half_chords(ring_cells, latitude_radians, longitude_radians, cos_latitude)
+            best = nsmallest(limit, best + candidates)
+
+            bound = self._unvisited_bound(latitude, longitude, center_row, center_column, ring)
+            if bound == math.inf or len(best) == limit and best[-1][0] <= _half_chord(bound):
+                break
+
+        return [(self._positions[index], _angle(half_chord) * earth_radius_km) for half_chord, index in best]
+
+    def _within(self, latitude: float, longitude: float, radius_km: float, limit: int) -> List[Tuple[int, float]]:
+        if radius_km < 0:
+            raise ValueError("Radius must not be negative")
+        theta = min(math.pi, radius_km / earth_radius_km)
+        bound = _half_chord(theta)
+        latitude_radians, longitude_radians = math.radians(latitude), math.radians(longitude)
+        cos_latitude = math.cos(latitude_radians)
+
+        spread = math.degrees(theta)
+        rows = range(self._row(max(-90.0, latitude - spread)), self._row(min(90.0, latitude + spread)) + 1)
+        if latitude + spread >= 90 or latitude - spread <= -90 or math.sin(theta) >= cos_latitude:
+            columns: Iterable[int] = range(self._columns)
+        else:
+            half_width = math.degrees(math.asin(math.sin(theta) / cos_latitude))
+            columns = self._wrapped_columns(longitude - half_width, longitude + half_width)
+
+        cells = [row * self._columns + column for row in rows for column in columns]
+        candidates = self._half_chords(cells, latitude_radians, longitude_radians, cos_latitude)
+        inside = nsmallest(limit, (candidate for candidate in candidates if candidate[0] <= bound))
+        return [(self._positions[index], _angle(half_chord) * earth_radius_km) for half_chord, index in inside]
+
+    def _half_chords(self, cells: Iterable[int], latitude: float, longitude: float,
+                     cos_latitude: float) -> List[Tuple[float, int]]:
+        """Haversine terms for every point in the cells, computed one contiguous cell slice at a time"""
+        sin, result = math.sin, []
+        for cell in cells:
+            span = self._cells.get(cell)
+            if span is None:
+                continue
+            start, end = span
+            result.extend(zip(
+                [sin((lat - latitude) / 2) ** 2 + cos_latitude * cos_lat * sin((lon - longitude) / 2) ** 2
+                 for lat, lon, cos_lat in zip(self._latitudes[start:end], self._longitudes[start:end],
+                                              self._cos_latitudes[start:end])],
+                range(start, end)
+            ))
+        return result
+
+    def _ring(self, center_row: int, center_column: int, ring: int) -> Iterable[int]:
+        """Cells whose grid distance from the center cell is exactly ring, wrapping in longitude"""
+        for row in range(max(0, center_row - ring), min(self._rows, center_row + ring + 1)):
+            edge = abs(row - center_row) == ring
+            offsets = range(-ring, ring + 1) if edge else (-ring, ring) if ring else (0,)
+            for offset in offsets:
+                yield row * self._columns + (center_column + offset) % self._columns
+
+    def _unvisited_bound(self, latitude: float, longitude: float, center_row: int, center_column: int,
+                         ring: int) -> float:
+        """Lower bound, in radians, on the distance to any point outside the cells visited so far"""
+        south = (center_row - ring) * self._cell_degrees - 90
+        north = (center_row + ring + 1) * self._cell_degrees - 90
+        bounds = [math.inf]
+        if south > -90:
+            bounds.append(math.radians(latitude - south))
+        if north < 90:
+            bounds.append(math.radians(north - latitude))
+        if 2 * ring + 1 < self._columns:
+            # The last column is narrower when the cell size does not divide 360, which wrapped edges must allow for
+            wraps, column = divmod(center_column - ring, self._columns)
+            west = column * self._cell_degrees - 180 + 360 * wraps
+            wraps, column = divmod(center_column + ring, self._columns)
+            east = min(360.0, (column + 1) * self._cell_degrees) - 180 + 360 * wraps
+            spread = math.radians(min(90.0, longitude - west, east - longitude))
+            bounds.append(math.asin(math.sin(spread) * math.cos(math.radians(latitude))))
+        return min(bounds)
+
+    def _wrapped_columns(self, west: float, east: float) -> Iterable[int]:
+        first, last = self._column(west), self._column(east)
+        return range(first, last + 1) if first <= last else [*range(first, self._columns), *range(0, last + 1)]
+
+    def _row(self, latitude: float) -> int:
+        return min(self._rows - 1, int((latitude + 90) // self._cell_degrees))
+
+    def _column(self, longitude: float) -> int:
+        return int(((longitude + 180) % 360) // self._cell_degrees) % self._columns
+
+    def _cell(self, latitude: float, longitude: float) -> int:
+        return self._row(latitude) * self._columns + self._column(longitude)
+
+    @staticmethod
+    def _choose_cell_degrees(latitudes: List[float], longitudes: List[float]) -> float:
+        """Size cells so the occupied area holds roughly target_points_per_cell points per cell"""
+        if not latitudes:
+            return max_cell_degrees
+        area = max(1.0, (max(latitudes) - min(latitudes)) * (max(longitudes) - min(longitudes)))
+        cell_degrees = math.sqrt(area * target_points_per_cell / len(latitudes))
+        return min(max_cell_degrees, max(min_cell_degrees, cell_degrees))
@@ -0,0 +1,181 @@
+import re
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+from Helpers.WordCorrection import FuzzyCorrector
+from Models.Monkey import Monkey
+from Services.MonkeyDiff import MonkeyDiff
+
+name_token_pattern = re.compile(r"[a-z]+")
+
+
+def name_key(name: str) -> str:
+    """Case-folded form used for every name lookup"""
+    return name.strip().casefold()
+
+
+class MonkeyIndex:
+    """Name lookup structures built once per cache load"""
+
+    def __init__(self, monkeys: List[Monkey]):
+        self._by_name: Dict[str, Monkey] = {}
+        for monkey in monkeys:
+            if monkey.Name:
+                self._by_name.setdefault(name_key(monkey.Name), monkey)
+
+        ordered = sorted(((name_key(m.Name), position) for position, m in enumerate(monkeys) if m.Name))
+        self._sorted_keys = [key for key, _ in ordered]
+        self._sorted_monkeys = [monkeys[position] for _, position in ordered]
+
+        self._monkeys = monkeys
+        self._postings: Dict[str, List[int]] = {}
+        self._add_postings(enumerate(monkeys))
+        self._tokens = FuzzyCorrector({}, max_distance=2, index_depth=1)
+        self._tokens.extend(self._postings.keys())
+
+    def apply(self, monkeys: List[Monkey], diff: MonkeyDiff) -> "MonkeyIndex":
+        """Index for the next load, taking the removed rows out of this index's structures and merging the changed
+        rows in; entries for rows that moved are shifted to their new positions"""
+        if len(self._sorted_keys) != len(self._by_name):
+            # Names that differ only in case share an entry, which cannot be updated row by row
+            return MonkeyIndex(monkeys)
+        removed = [name_key(monkey.Name) for monkey in diff.removed_rows if monkey.Name]
+        added = sorted((name_key(monkeys[position].Name), position) for position in diff.changed_positions
+                       if monkeys[position].Name)
+
+        index = MonkeyIndex.__new__(MonkeyIndex)
+        index._by_name = dict(self._by_name)
+        for key in removed:
+            del index._by_name[key]
+        for key, position in added:
+            index._by_name.setdefault(key, monkeys[position])
+        if len(index._by_name) != len(self._by_name) - len(removed) + len(added):
+            return MonkeyIndex(monkeys)
+
+        index._sorted_keys, index._sorted_monkeys = [], []
+        start = 0
+        for at in sorted(bisect_left(self._sorted_keys, key) for key in removed):
+            index._sorted_keys += self._sorted_keys[start:at]
+            index._sorted_monkeys += self._sorted_monkeys[start:at]
+            start = at + 1
+        index._sorted_keys += self._sorted_keys[start:]
+        index._sorted_monkeys += self._sorted_monkeys[start:]
+        keys, ordered = index._sorted_keys, index._sorted_monkeys
+        index._sorted_keys, index._sorted_monkeys = [], []
+        start = 0
+        for key, position in added:
+            at = bisect_left(keys, key, start)
+            index._sorted_keys += keys[start:at]
+            index._sorted_keys.append(key)
+            index._sorted_monkeys += ordered[start:at]
+            index._sorted_monkeys.append(monkeys[position])
+            start = at
+        index._sorted_keys += keys[start:]
+        index._sorted_monkeys += ordered[start:]
+
+        index._monkeys = monkeys
+        touched = {token for monkey in diff.removed_rows + diff.added_rows if monkey.Name
+                   for token in name_token_pattern.findall(monkey.Name.casefold())}
+        gone = set(diff.removed_positions)
+        # Posting lists are shared with this index unless a changed row or a moved position touches them
+        index._postings = dict(self._postings)
+        for token in touched:
+            index._postings[token] = [position for position in self._postings.get(token, ()) if position not in gone]
+        if diff.rows_moved:
+            remap = diff.remap
+            # Shifted positions stay ascending; only rows that swapped places leave a list to sort again
+            remapped = list if diff.order_preserved else sorted
+            index._postings = {token: remapped(map(remap.__getitem__, positions))
+                               for token, positions in index._postings.items()}
+        index._add_postings((position, monkeys[position]) for position in diff.changed_positions)
+        for token in touched:
+            if index._postings[token]:
+                index._postings[token].sort()
+            else:
+                del index._postings[token]
+
+        if touched <= self._postings.keys() and touched <= index._postings.keys():
+            index._tokens = self._tokens
+        else:
+            index._tokens = FuzzyCorrector({}, max_distance=2, index_depth=1)
+            index._tokens.extend(index._postings.keys())
+        return index
+
+    def _add_postings(self, rows: Iterable[Tuple[int, Monkey]]):
+        for position, monkey in rows:
+            if monkey.Name:
+                for token in set(name_token_pattern.findall(monkey.Name.casefold())):
+                    self._postings.setdefault(token, []).append(position)
+
+    def get(self, name: str) -> Optional[Monkey]:
+        """Exact, case-insensitive lookup by name"""
+        return self._by_name.get(name_key(name))
+
+    def prefix(self, prefix: str, limit: int) -> List[Monkey]:
+        """Monkeys whose name starts with prefix, in name order"""
+        key = name_key(prefix)
+        results = []
+        position = bisect_left(self._sorted_keys, key)
+        while position < len(self._sorted_keys) and len(results) < limit and \
+                self._sorted_keys[position].startswith(key):
+            results.append(self._sorted_monkeys[position])
+            position += 1
+        return results
+
+    def fuzzy(self, query: str, limit: int) -> List[Monkey]:
+        """Monkeys whose name words all approximately match the query words, closest first"""
+        tokens = name_token_pattern.findall(query.casefold())
+        if not tokens:
+            return []
+
+        token_matches = []
+        for token in tokens:
+            matches = {token: 0} if token in self._postings else dict(self._tokens.candidates(token))
+            if not matches:
+                return []
+            token_matches.append(matches)
+
+        token_matches.sort(key=lambda matches: sum(len(self._postings[match]) for match in matches))
+        rarest, others = token_matches[0], token_matches[1:]
+
+        distances: Dict[int, int] = {}
+        for match, distance in rarest.items():
+            for position in self._postings[match]:
+                if distance < distances.get(position, distance + 1):
+                    distances[position] = distance
+
+        for matches in others:
+            narrowed = {}
+            for position, total in distances.items():
+                name_tokens = name_token_pattern.findall(self._monkeys[position].Name.casefold())
+                best = min((matches[t] for t in name_tokens if t in matches), default=None)
+                if best is not None:
+                    narrowed[position] = total + best
+            distances = narrowed
+            if not distances:
+                return []
+
+        query_length = len(query)
+        ranked = sorted(distances.items(),
+                        key=lambda item: (item[1], abs(len(self._monkeys[item[0]].Name) - query_length), item[0]))
+        return [self._monkeys[position] for position, _ in ranked[:limit]]
+
+    def search(self, query: str, limit: int) -> List[Monkey]:
+        """Exact match first, then prefix matches, then fuzzy matches"""
+        results = []
+        seen = set()
+
+        def add(candidates: List[Monkey]):
+            for monkey in candidates:
+                if len(results) >= limit:
+                    return
+                if id(monkey) not in seen:
+                    seen.add(id(monkey))
+                    results.append(monkey)
+
+        exact = self.get(query)
+        if exact:
+            add([exact])
+        add(self.prefix(query, limit))
+        if len(results) < limit:
+            add(self.fuzzy(query, limit))
+        return results
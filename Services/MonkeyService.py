@@ -1,71 +1,283 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from threading import Lock
-from typing import Optional, List
+from threading import Lock, Thread
+from typing import Callable, Optional, List
+from Globals.Constants import FEED_CHUNK_BYTES
+from Helpers.Metrics import metrics
 from Models.Monkey import Monkey
+from Services.MonkeyDiff import MonkeyDiff
+from Services.MonkeyFeedLoader import load_monkeys
 from Services.MonkeyNotFoundException import MonkeyNotFoundException
 from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeySnapshot import MonkeySnapshot
+from Services.SnapshotStore import SnapshotStore
 import logging, requests
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+feed_load_seconds = metrics.histogram("monkeys_feed_load_seconds",
+                                      "Time to fetch, parse and index the monkeys feed by outcome", ["outcome"])
+shared_snapshot_loads = metrics.counter("monkeys_shared_snapshot_loads_total",
+                                        "Snapshots another process published and this one mapped")
+
 class MonkeyService:
     def __init__(self, options: MonkeyServiceOptions):
         self._options = options
-        self._cached_monkeys: Optional[List[Monkey]] = None
+        self._snapshot: Optional[MonkeySnapshot] = None
         self._last_cache_update = datetime.min
         self._cache_lock = Lock()
+        self._refresh_future: Optional[Future] = None
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="monkey-feed")
+        self._session = requests.Session()
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._consecutive_failures = 0
+        self._next_attempt = datetime.min
+        self._snapshot_listeners: List[Callable[[MonkeySnapshot], None]] = []
+        self._snapshot_store = SnapshotStore(options.snapshot_path) if options.snapshot_path else None
+        self._snapshot_identity = None
+        self._shared = bool(options.loader_lock_path and self._snapshot_store and fcntl)
+        self._loader_lock = None
+        self._loader_pid = None
+        self._restore_snapshot()
+
+    def add_snapshot_listener(self, listener: Callable[[MonkeySnapshot], None]):
+        """Register a callback invoked with every newly loaded snapshot"""
+        self._snapshot_listeners.append(listener)
+
+    async def get_snapshot_async(self) -> MonkeySnapshot:
+        """Get the current dataset snapshot, refreshing cache if needed"""
+        await self._ensure_cache_is_current()
+        return self._snapshot if self._snapshot else MonkeySnapshot([], 0)
 
     async def get_monkeys_async(self) -> List[Monkey]:
         """Get all monkeys, refreshing cache if needed"""
-        await self._ensure_cache_is_current()
-        return self._cached_monkeys if self._cached_monkeys else []
+        snapshot = await self.get_snapshot_async()
+        return snapshot.monkeys
+
+    def get_cached_monkeys(self) -> List[Monkey]:
+        """Get the currently cached monkeys without triggering a refresh"""
+        return self._snapshot.monkeys if self._snapshot else []
 
     async def get_monkey_async(self, name: str) -> Monkey:
         """Get a specific monkey by name"""
         if not name or not name.strip():
             raise ValueError("Monkey name cannot be null or empty")
 
-        monkeys = await self.get_monkeys_async()
-        monkey = next((m for m in monkeys if m.Name.lower() == name.lower()), None)
+        snapshot = await self.get_snapshot_async()
+        monkey = snapshot.index.get(name)
 
         if not monkey:
             raise MonkeyNotFoundException(name)
 
         return monkey
 
+    async def search_monkeys_async(self, query: str, limit: int) -> List[Monkey]:
+        """Search monkeys by exact, prefix and fuzzy name match"""
+        if not query or not query.strip():
+            raise ValueError("Search query cannot be null or empty")
+
+        snapshot = await self.get_snapshot_async()
+        return snapshot.index.search(query, limit)
+
     async def refresh_cache_async(self):
         """Force refresh the monkey cache"""
-        with self._cache_lock:
-            await self._load_monkeys_from_api()
+        await asyncio.wrap_future(self._start_refresh(force=True))
 
     async def _ensure_cache_is_current(self):
-        """Ensure cache is current, refresh if expired"""
-        if self._is_cache_expired():
-            await self.refresh_cache_async()
+        """Serve the current snapshot, refreshing in the background once it has expired"""
+        if self._snapshot is None:
+            await asyncio.wrap_future(self._start_refresh())
+        elif self._is_cache_expired():
+            self._start_refresh()
+
+    def _start_refresh(self, force: bool = False) -> Future:
+        """Start a refresh, or join the one already in flight"""
+        with self._cache_lock:
+            if self._refresh_future is not None and not self._refresh_future.done():
+                return self._refresh_future
+
+            if not force and datetime.now() < self._next_attempt:
+                skipped = Future()
+                skipped.set_result(None)
+                return skipped
+
+            self._refresh_future = self._refresh_executor.submit(self._refresh)
+            return self._refresh_future
 
     def _is_cache_expired(self) -> bool:
-        """Check if the cache has expired"""
-        return (self._cached_monkeys is None or
-                datetime.now() - self._last_cache_update > self._options.cache_expiration)
+        """Check if the cache has expired; processes following the host's loader check its file far more often"""
+        expiration = self._options.shared_poll_interval if self._shared and not self._is_loader() \
+            else self._options.cache_expiration
+        return (self._snapshot is None or
+                datetime.now() - self._last_cache_update > expiration)
+
+    def _refresh(self):
+        """Fetch the feed when this process is the host's loader, otherwise pick up what the loader published"""
+        if self._shared and not self._acquire_loader_lock():
+            self._follow_shared_snapshot()
+        else:
+            self._load_monkeys_from_api()
+
+    def _is_loader(self) -> bool:
+        return self._loader_lock is not None and self._loader_pid == os.getpid()
 
-    async def _load_monkeys_from_api(self):
-        """Load monkeys from the API"""
+    def _acquire_loader_lock(self) -> bool:
+        """Become the host's loader if no other process holds the lock; it is kept until this process exits"""
+        if self._is_loader():
+            return True
+        try:
+            lock_file = open(self._options.loader_lock_path, "a")
+        except OSError as ex:
+            logger.error(f"Cannot open loader lock {self._options.loader_lock_path}: {ex}")
+            return False
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._loader_lock = lock_file
+        self._loader_pid = os.getpid()
+        logger.info(f"Process {self._loader_pid} is now the monkeys feed loader for this host")
+        return True
+
+    def _follow_shared_snapshot(self):
+        """Map the snapshot the loader published, waiting for its first one rather than fetching the feed again"""
+        deadline = time.monotonic() + self._options.request_timeout
+        identity = self._snapshot_store.identity()
+        while identity is None and self._snapshot is None and time.monotonic() < deadline:
+            time.sleep(0.1)
+            identity = self._snapshot_store.identity()
+
+        if identity is None and self._snapshot is None:
+            logger.warning("No shared snapshot was published in time; loading the feed in this process")
+            self._load_monkeys_from_api()
+            return
+
+        self._last_cache_update = datetime.now()
+        if identity is None or identity == self._snapshot_identity:
+            return
+        stored = self._snapshot_store.load()
+        if stored is None:
+            return
+
+        monkeys, table, header = stored
+        changes = self._diff(monkeys)
+        snapshot = MonkeySnapshot(changes.monkeys if changes else monkeys, header["version"], table,
+                                  previous=self._snapshot, changes=changes)
+        snapshot.warm()
+        self._snapshot = snapshot
+        self._snapshot_identity = identity
+        self._etag = header.get("etag")
+        self._last_modified = header.get("last_modified")
+        shared_snapshot_loads.inc()
+        self._notify_snapshot_listeners()
+        logger.info(f"Mapped {len(monkeys)} monkeys (dataset version {header['version']}) published by the loader")
+
+    def _load_monkeys_from_api(self):
+        """Load monkeys from the API, keeping the last good snapshot on failure"""
+        start = time.perf_counter()
         try:
             logger.info(f"Loading monkeys from API: {self._options.api_url}")
 
             if not self._options.api_url:
                 raise ValueError("ApiUrl must be configured in MonkeyServiceOptions")
 
-            response = requests.get(self._options.api_url)
-            response.raise_for_status()
+            headers = {}
+            if self._snapshot is not None:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
 
-            monkey_data = response.json()
-            self._cached_monkeys = [Monkey.from_dict(data) for data in monkey_data]
-            self._last_cache_update = datetime.now()
+            with self._session.get(self._options.api_url, headers=headers, stream=True,
+                                   timeout=self._options.request_timeout) as response:
+                if response.status_code == 304:
+                    logger.info("Monkeys feed not modified, keeping current snapshot")
+                    outcome = "not_modified"
+                else:
+                    response.raise_for_status()
+                    monkeys = load_monkeys(response.iter_content(chunk_size=FEED_CHUNK_BYTES))
+                    self._etag = response.headers.get("ETag")
+                    self._last_modified = response.headers.get("Last-Modified")
+                    changes = self._diff(monkeys)
+                    if changes is not None and changes.is_empty:
+                        logger.info(f"Monkeys feed content unchanged, keeping dataset version {self._snapshot.version}")
+                        outcome = "unchanged"
+                    else:
+                        outcome = "loaded"
+                        version = self._snapshot.version + 1 if self._snapshot else 1
+                        snapshot = MonkeySnapshot(changes.monkeys if changes else monkeys, version,
+                                                  previous=self._snapshot, changes=changes)
+                        snapshot.warm()
+                        self._snapshot = snapshot
+                        self._notify_snapshot_listeners()
+                        logger.info(f"Successfully loaded {len(monkeys)} monkeys (dataset version {version})")
 
-            logger.info(f"Successfully loaded {len(self._cached_monkeys)} monkeys")
+            self._last_cache_update = datetime.now()
+            self._consecutive_failures = 0
+            self._next_attempt = datetime.min
+            feed_load_seconds.labels(outcome).observe(time.perf_counter() - start)
 
         except Exception as ex:
-            logger.error(f"Failed to load monkeys from API: {ex}")
-            self._cached_monkeys = self._cached_monkeys or []
\ No newline at end of file
+            self._consecutive_failures += 1
+            self._next_attempt = datetime.now() + self._retry_delay()
+            feed_load_seconds.labels("error").observe(time.perf_counter() - start)
+            logger.error(f"Failed to load monkeys from API: {ex}; retrying after {self._next_attempt}")
+            self._snapshot = self._snapshot or MonkeySnapshot([], 0)
+
+        else:
+            # Persisting is best effort and outside the feed accounting: the new version is already being served
+            if outcome == "loaded" and self._snapshot_store:
+                self._snapshot_store.save(self._snapshot, self._etag, self._last_modified)
+
+    def _diff(self, monkeys: List[Monkey]) -> Optional[MonkeyDiff]:
+        """Changes from the current snapshot, or None when there is nothing to diff against"""
+        if not self._snapshot or not self._snapshot.monkeys:
+            return None
+        start = time.perf_counter()
+        changes = MonkeyDiff.compute(self._snapshot.monkeys, monkeys)
+        if changes is None:
+            logger.info("Monkey names are missing or repeated, so the feed is loaded without diffing")
+        else:
+            logger.info(f"Diffed the feed in {time.perf_counter() - start:.2f}s: {changes.summary()}")
+        return changes
+
+    def _restore_snapshot(self):
+        """Serve the last stored snapshot straight away; it is revalidated against the feed on first use"""
+        if not self._snapshot_store:
+            return
+        stored = self._snapshot_store.load()
+        if stored is None:
+            return
+
+        monkeys, table, header = stored
+        self._snapshot = MonkeySnapshot(monkeys, header["version"], table)
+        self._snapshot_identity = self._snapshot_store.identity()
+        self._etag = header.get("etag")
+        self._last_modified = header.get("last_modified")
+        Thread(target=self._snapshot.warm, name="monkey-snapshot-warm", daemon=True).start()
+        logger.info(f"Restored {len(monkeys)} monkeys (dataset version {header['version']}) from snapshot file")
+
+    def _notify_snapshot_listeners(self):
+        for listener in self._snapshot_listeners:
+            try:
+                listener(self._snapshot)
+            except Exception as ex:
+                logger.error(f"Snapshot listener failed: {ex}")
+
+    def _retry_delay(self):
+        """Exponential backoff with jitter for failed refreshes"""
+        delay = min(self._options.retry_base_delay * (2 ** min(self._consecutive_failures - 1, 16)),
+                    self._options.retry_max_delay)
+        return delay * random.uniform(0.5, 1.5)
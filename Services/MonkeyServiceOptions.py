@@ -1,8 +1,15 @@
 from datetime import timedelta
-from Globals.Constants import CACHE_EXPIRATION_TIME
+from Globals.Constants import CACHE_EXPIRATION_TIME, MONKEYS_REQUEST_TIMEOUT, MONKEYS_RETRY_BASE_DELAY, \
+    MONKEYS_RETRY_MAX_DELAY, SNAPSHOT_PATH, SHARED_SNAPSHOT_POLL_SECONDS
 
 
 class MonkeyServiceOptions:
-    def __init__(self, api_url: str):
+    def __init__(self, api_url: str, snapshot_path: str = SNAPSHOT_PATH, loader_lock_path: str = ""):
         self.api_url = api_url
-        self.cache_expiration = timedelta(minutes=CACHE_EXPIRATION_TIME)
\ No newline at end of file
+        self.snapshot_path = snapshot_path
+        self.loader_lock_path = loader_lock_path
+        self.cache_expiration = timedelta(minutes=CACHE_EXPIRATION_TIME)
+        self.shared_poll_interval = timedelta(seconds=SHARED_SNAPSHOT_POLL_SECONDS)
+        self.request_timeout = MONKEYS_REQUEST_TIMEOUT
+        self.retry_base_delay = timedelta(seconds=MONKEYS_RETRY_BASE_DELAY)
+        self.retry_max_delay = timedelta(seconds=MONKEYS_RETRY_MAX_DELAY)
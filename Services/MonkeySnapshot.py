@@ -0,0 +1,75 @@
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from Models.Monkey import Monkey
+from Models.ToolResult import encode_json
+from Services.MonkeyDiff import MonkeyDiff
+from Services.MonkeyFilter import MonkeyFilterIndex
+from Services.MonkeyGeoIndex import MonkeyGeoIndex
+from Services.MonkeyIndex import MonkeyIndex
+from Services.MonkeyTable import MonkeyTable
+
+lookup_structures = ("table", "index", "filters", "geo")
+
+
+class MonkeySnapshot:
+    """An immutable dataset load together with the structures derived from it, each built on first use"""
+
+    def __init__(self, monkeys: List[Monkey], version: int, table: Optional[MonkeyTable] = None,
+                 previous: Optional["MonkeySnapshot"] = None, changes: Optional[MonkeyDiff] = None):
+        self.monkeys = monkeys
+        self.version = version
+        # How this load differs from the previous version, when it was diffed against it
+        self.changes = changes
+        self.previous_version = previous.version if previous is not None and changes is not None else None
+        self._previous = previous if changes is not None else None
+        self._builders = {
+            "table": lambda: self._apply_changes("table") or MonkeyTable(self.monkeys),
+            "index": lambda: self._apply_changes("index") or MonkeyIndex(self.monkeys),
+            "filters": lambda: MonkeyFilterIndex(self.table),
+            "geo": lambda: self._apply_changes("geo") or MonkeyGeoIndex(self.monkeys),
+            "encoded_monkeys": lambda: encode_json([monkey.to_dict() for monkey in self.monkeys])
+        }
+        self._derived: Dict[str, Any] = {"table": table} if table is not None else {}
+        self._locks = {name: Lock() for name in self._builders}
+
+    @property
+    def table(self) -> MonkeyTable:
+        return self._get("table")
+
+    @property
+    def index(self) -> MonkeyIndex:
+        return self._get("index")
+
+    @property
+    def filters(self) -> MonkeyFilterIndex:
+        return self._get("filters")
+
+    @property
+    def geo(self) -> MonkeyGeoIndex:
+        return self._get("geo")
+
+    def encoded_monkeys(self) -> bytes:
+        """JSON encoding of the full list, built once per snapshot"""
+        return self._get("encoded_monkeys")
+
+    def warm(self):
+        """Build every lookup structure now rather than on the first request that needs it"""
+        for name in lookup_structures:
+            self._get(name)
+        # Everything reusable has been taken from the previous version, which can now be freed
+        self._previous = None
+
+    def _apply_changes(self, name: str) -> Any:
+        """The previous version's structure updated with the changed rows, or None when there is nothing to update"""
+        previous = self._previous
+        structure = previous._derived.get(name) if previous is not None else None
+        return structure.apply(self.monkeys, self.changes) if structure is not None else None
+
+    def _get(self, name: str) -> Any:
+        value = self._derived.get(name)
+        if value is None:
+            with self._locks[name]:
+                value = self._derived.get(name)
+                if value is None:
+                    value = self._derived[name] = self._builders[name]()
+        return value
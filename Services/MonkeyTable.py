@@ -0,0 +1,178 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from numbers import Number
+from operator import attrgetter
+from typing import Collection, Dict, Iterable, Iterator, List, Optional, Sequence
+from Globals.Constants import available_fields
+from Models.Monkey import Monkey
+from Services.MonkeyDiff import MonkeyDiff
+
+table_fields = list(available_fields.values())
+
+
+def _sort_key(value):
+    """Total order over mixed column values: numbers, then strings, then anything else"""
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return 0, value, ""
+    if isinstance(value, str):
+        return 1, 0, value
+    return 2, 0, str(value)
+
+
+class MonkeyTable:
+    """Columnar view of a snapshot with an ascending sort permutation per field, built once per load"""
+
+    def __init__(self, monkeys: List[Monkey]):
+        self.size = len(monkeys)
+        self.fields = table_fields
+        self.columns: Dict[str, list] = {field: [getattr(m, field) for m in monkeys] for field in table_fields}
+        self._ascending: Dict[str, Sequence[int]] = {}
+        self._non_null_count: Dict[str, int] = {}
+        self._ranks: Dict[str, Sequence[int]] = {}
+        self._descending: Dict[str, Sequence[int]] = {}
+        for field, column in self.columns.items():
+            self._ascending[field], self._non_null_count[field] = self._build_permutation(column)
+            self._ranks[field] = self._build_ranks(self._ascending[field])
+
+    @classmethod
+    def restore(cls, columns: Dict[str, list], ascending: Dict[str, Sequence[int]], non_null_count: Dict[str, int],
+                ranks: Dict[str, Sequence[int]]) -> "MonkeyTable":
+        """Rebuild a table from columns and permutations saved by SnapshotStore, without sorting again"""
+        table = cls.__new__(cls)
+        table.size = len(next(iter(columns.values()), []))
+        table.fields = table_fields
+        table.columns = columns
+        table._ascending = ascending
+        table._non_null_count = non_null_count
+        table._ranks = ranks
+        table._descending = {}
+        return table
+
+    def apply(self, monkeys: List[Monkey], diff: MonkeyDiff) -> "MonkeyTable":
+        """Table for the next load, merging the changed rows into this table's sort orders instead of sorting again"""
+        if not diff.order_preserved:
+            return MonkeyTable(monkeys)
+        table = MonkeyTable.__new__(MonkeyTable)
+        table.size = len(monkeys)
+        table.fields = table_fields
+        table.columns = {field: list(map(attrgetter(field), monkeys)) for field in table_fields}
+        table._ascending, table._non_null_count, table._ranks, table._descending = {}, {}, {}, {}
+        for field, column in table.columns.items():
+            permutation, non_null_count = self._ascending[field], self._non_null_count[field]
+            # The previous versions of removed rows leave the sort order from their previous ranks
+            gone = sorted(map(self._ranks[field].__getitem__, diff.removed_positions))
+            kept = self._without(permutation, gone)
+            if diff.rows_moved:
+                kept = list(map(diff.remap.__getitem__, kept))
+            kept_non_null = non_null_count - bisect_left(gone, non_null_count)
+            nulls = kept[kept_non_null:]
+            nulls.extend(position for position in diff.changed_positions if column[position] is None)
+            nulls.sort()
+            non_null = self._merge_non_null(column, kept[:kept_non_null],
+                                            [position for position in diff.changed_positions
+                                             if column[position] is not None])
+            table._ascending[field], table._non_null_count[field] = non_null + nulls, len(non_null)
+            table._ranks[field] = self._build_ranks(table._ascending[field])
+        return table
+
+    def ascending(self, field: str) -> Sequence[int]:
+        """Ascending row permutation for a field, None values last"""
+        return self._ascending[field]
+
+    def non_null_count(self, field: str) -> int:
+        """Number of rows with a value for a field"""
+        return self._non_null_count[field]
+
+    def ranks(self, field: str) -> Sequence[int]:
+        """Sorted rank of every row for a field"""
+        return self._ranks[field]
+
+    def order(self, sort_by: Optional[str] = None, descending: bool = False) -> Sequence[int]:
+        """Row positions in the requested order; None values always come last"""
+        if sort_by not in self._ascending:
+            return range(self.size)
+
+        permutation = self._ascending[sort_by]
+        if not descending:
+            return permutation
+
+        if sort_by not in self._descending:
+            non_null_count = self._non_null_count[sort_by]
+            # The permutation may be a view of a mapped snapshot file, which cannot be concatenated
+            self._descending[sort_by] = array("I", permutation[non_null_count - 1::-1]) \
+                + array("I", permutation[non_null_count:]) if non_null_count else permutation
+        return self._descending[sort_by]
+
+    def order_subset(self, positions: Collection[int], sort_by: Optional[str] = None,
+                     descending: bool = False) -> List[int]:
+        """Order a subset of rows the same way order() orders the whole table"""
+        if sort_by not in self._ranks:
+            return sorted(positions)
+
+        ranks = self._ranks[sort_by]
+        if not descending:
+            return sorted(positions, key=ranks.__getitem__)
+
+        non_null_count = self._non_null_count[sort_by]
+        non_null = [p for p in positions if ranks[p] < non_null_count]
+        nulls = [p for p in positions if ranks[p] >= non_null_count]
+        non_null.sort(key=ranks.__getitem__, reverse=True)
+        nulls.sort(key=ranks.__getitem__)
+        return non_null + nulls
+
+    def rows(self, fields: List[str], positions: Iterable[int]) -> Iterator[dict]:
+        """Lazily project the given fields for the given row positions"""
+        columns = [(field, self.columns[field]) for field in fields]
+        return ({field: column[position] for field, column in columns} for position in positions)
+
+    @staticmethod
+    def _build_permutation(column: list):
+        """Ascending permutation with None values moved to the end"""
+        non_null = [position for position, value in enumerate(column) if value is not None]
+        nulls = [position for position, value in enumerate(column) if value is None]
+
+        kinds = {type(column[position]) for position in non_null}
+        if kinds <= {int, float} or kinds == {str}:
+            non_null.sort(key=column.__getitem__)
+        else:
+            non_null.sort(key=lambda position: _sort_key(column[position]))
+
+        return non_null + nulls, len(non_null)
+
+    @staticmethod
+    def _merge_non_null(column: list, ordered: List[int], positions: List[int]) -> List[int]:
+        """Insert positions into an already ordered list, giving the order a full sort of both would"""
+        kinds = set(map(type, column)) - {type(None)}
+        if kinds <= {int, float} or kinds == {str}:
+            def key(position):
+                return column[position], position
+        else:
+            def key(position):
+                return _sort_key(column[position]), position
+        # Equal values are ordered by position, as the stable sort over ascending positions leaves them
+        merged, start = [], 0
+        for position in sorted(positions, key=key):
+            end = bisect_right(ordered, key(position), start, key=key)
+            merged += ordered[start:end]
+            merged.append(position)
+            start = end
+        merged += ordered[start:]
+        return merged
+
+    @staticmethod
+    def _without(permutation: Sequence[int], ranks: List[int]) -> List[int]:
+        """Permutation with the entries at the given ascending ranks left out"""
+        kept, start = [], 0
+        for rank in ranks:
+            kept += permutation[start:rank]
+            start = rank + 1
+        kept += permutation[start:]
+        return kept
+
+    @staticmethod
+    def _build_ranks(permutation: List[int]) -> array:
+        """Inverse permutation: the sorted rank of every row"""
+        ranks = array("I", bytes(4 * len(permutation)))
+        for rank, position in enumerate(permutation):
+            ranks[position] = rank
+        return ranks
@@ -1,90 +1,165 @@
-import json
 import logging
+from typing import Optional, Sequence, Tuple
 
-from Globals.Constants import valid_fields
+from Globals.Constants import valid_fields, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, NEAR_DEFAULT_LIMIT, \
+    NEAR_MAX_LIMIT, PAGE_DEFAULT_LIMIT, PAGE_MAX_LIMIT
+from Helpers.Cursor import decode_cursor, encode_cursor, query_fingerprint
+from Models.Monkey import Monkey
+from Models.ToolResult import RowSetResult, ToolResult
 from Services.MonkeyService import MonkeyService
+from Services.ToolRegistry import ToolRegistry, monkey_tool_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+pageable_tools = {"get_monkeys", "get_monkeys_filtered"}
+
 class MonkeyTools:
-    def __init__(self, monkey_service: MonkeyService):
+    def __init__(self, monkey_service: MonkeyService, registry: ToolRegistry = monkey_tool_registry):
         self._monkey_service = monkey_service
+        self.registry = registry
+        self._handlers = {
+            "get_monkeys": self._get_monkeys,
+            "get_monkeys_filtered": self._get_monkeys_filtered,
+            "get_monkey": self._get_monkey,
+            "search_monkeys": self._search_monkeys,
+            "get_monkeys_near": self._get_monkeys_near,
+            "get_monkey_business": self._get_monkey_business,
+            "refresh_monkey_cache": self._refresh_monkey_cache
+        }
+        missing = [name for name in registry.names if name not in self._handlers]
+        if missing:
+            raise ValueError(f"No handler for registered tools: {missing}")
 
-    async def execute_tool(self, tool_name: str, arguments: dict) -> str:
-        """Execute a specific tool"""
+    async def execute_tool(self, tool_name: str, arguments: dict) -> ToolResult:
+        """Validate the arguments against the tool's schema and execute it"""
         try:
-            if tool_name == "get_monkeys":
-                return await self._get_monkeys()
-            elif tool_name == "get_monkeys_filtered":
-                return await self._get_monkeys_filtered(arguments)
-            elif tool_name == "get_monkey":
-                return await self._get_monkey(arguments.get("name", ""))
-            elif tool_name == "get_monkey_business":
-                return await self._get_monkey_business()
-            elif tool_name == "refresh_monkey_cache":
-                return await self._refresh_monkey_cache()
-            else:
-                raise ValueError(f"Unknown tool: {tool_name}")
+            self.registry.validate(tool_name, arguments)
+            return await self._handlers[tool_name](arguments)
         except Exception as ex:
             logger.error(f"Failed to execute tool {tool_name}: {ex}")
             raise
 
-    async def _get_monkeys(self) -> str:
+    async def _get_monkeys(self, arguments: dict) -> ToolResult:
         """Get all monkeys"""
         logger.info("Retrieving all monkeys")
-        monkeys = await self._monkey_service.get_monkeys_async()
-        result = json.dumps([monkey.to_dict() for monkey in monkeys], indent=2)
-        logger.info(f"Successfully retrieved {len(monkeys)} monkeys")
+        snapshot = await self._monkey_service.get_snapshot_async()
+        monkeys = snapshot.monkeys
+
+        if not self._is_paged(arguments):
+            result = RowSetResult(lambda: map(Monkey.to_dict, monkeys), encoder=snapshot.encoded_monkeys)
+            logger.info(f"Successfully retrieved {len(monkeys)} monkeys")
+            return result
+
+        start, stop, next_cursor = self._page("get_monkeys", arguments, snapshot.version, len(monkeys))
+        result = RowSetResult(lambda: map(Monkey.to_dict, monkeys[start:stop]), paged=True, next_cursor=next_cursor)
+        logger.info(f"Successfully retrieved monkeys {start} to {stop} of {len(monkeys)}")
         return result
 
-    async def _get_monkeys_filtered(self, arguments: dict) -> str:
+    async def _get_monkeys_filtered(self, arguments: dict) -> ToolResult:
         """Get monkeys with filtering and sorting options"""
         logger.info("Retrieving filtered monkeys")
-        monkeys = await self._monkey_service.get_monkeys_async()
+        snapshot = await self._monkey_service.get_snapshot_async()
+        table = snapshot.table
 
-        monkey_dicts = [monkey.to_dict() for monkey in monkeys]
-
-        fields = arguments.get("fields", [])
-        if fields:
-            fields = [f for f in fields if f in valid_fields]
-            if fields:
-                monkey_dicts = [
-                    {field: monkey.get(field) for field in fields}
-                    for monkey in monkey_dicts
-                ]
+        fields = [f for f in arguments.get("fields") or [] if f in valid_fields] or table.fields
 
         sort_by = arguments.get("sort_by")
-        sort_order = arguments.get("sort_order", "asc")
+        sort_order = arguments.get("sort_order") or "asc"
+        descending = sort_order.lower() == "desc"
+
+        filters = arguments.get("filters")
+        positions: Sequence[int]
+        if filters:
+            positions = table.order_subset(snapshot.filters.select(filters), sort_by, descending)
+        else:
+            positions = table.order(sort_by, descending)
 
-        if sort_by and sort_by in ["Name", "Location", "Details", "Image", "Population", "Latitude", "Longitude"]:
-            reverse = sort_order.lower() == "desc"
-            monkey_dicts.sort(key=lambda x: x.get(sort_by, 0), reverse=reverse)
+        if not self._is_paged(arguments):
+            result = RowSetResult(lambda: table.rows(fields, positions))
+            logger.info(f"Successfully retrieved {len(positions)} filtered monkeys")
+            return result
 
-        result = json.dumps(monkey_dicts, indent=2)
-        logger.info(f"Successfully retrieved {len(monkey_dicts)} filtered monkeys")
+        start, stop, next_cursor = self._page("get_monkeys_filtered", arguments, snapshot.version, len(positions))
+        result = RowSetResult(lambda: table.rows(fields, positions[start:stop]), paged=True, next_cursor=next_cursor)
+        logger.info(f"Successfully retrieved filtered monkeys {start} to {stop} of {len(positions)}")
         return result
 
-    async def _get_monkey(self, name: str) -> str:
+    @staticmethod
+    def _is_paged(arguments: dict) -> bool:
+        return arguments.get("limit") is not None or bool(arguments.get("cursor"))
+
+    @staticmethod
+    def _page(tool_name: str, arguments: dict, version: int, total: int) -> Tuple[int, int, Optional[str]]:
+        """Bounds of the requested page and the cursor for the page after it, if any"""
+        fingerprint = query_fingerprint(tool_name, arguments)
+        start = min(decode_cursor(arguments.get("cursor"), version, fingerprint), total)
+        limit = arguments.get("limit")
+        limit = max(1, min(int(limit if limit is not None else PAGE_DEFAULT_LIMIT), PAGE_MAX_LIMIT))
+        stop = min(start + limit, total)
+        return start, stop, encode_cursor(version, stop, fingerprint) if stop < total else None
+
+    async def _get_monkey(self, arguments: dict) -> ToolResult:
         """Get a specific monkey"""
-        name = name.strip()
+        name = arguments["name"].strip()
         if not name:
             raise ValueError("Monkey name cannot be null or empty")
 
         logger.info(f"Retrieving monkey: {name}")
         monkey = await self._monkey_service.get_monkey_async(name)
-        result = json.dumps(monkey.to_dict(), indent=2)
+        result = ToolResult(monkey.to_dict())
         logger.info(f"Successfully retrieved monkey: {name}")
         return result
 
+    async def _search_monkeys(self, arguments: dict) -> ToolResult:
+        """Search monkeys by name"""
+        query = arguments["query"].strip()
+        if not query:
+            raise ValueError("Search query cannot be null or empty")
+
+        limit = min(int(arguments.get("limit", SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT)
+        logger.info(f"Searching monkeys: {query} (limit {limit})")
+        monkeys = await self._monkey_service.search_monkeys_async(query, limit)
+        result = ToolResult([monkey.to_dict() for monkey in monkeys])
+        logger.info(f"Found {len(monkeys)} monkeys matching: {query}")
+        return result
+
+    async def _get_monkeys_near(self, arguments: dict) -> ToolResult:
+        """Get the monkeys closest to a point or to a named monkey"""
+        snapshot = await self._monkey_service.get_snapshot_async()
+
+        origin = None
+        if arguments.get("name"):
+            origin = snapshot.index.get(arguments["name"])
+            if origin is None:
+                raise ValueError(f"Monkey with name '{arguments['name']}' not found")
+            latitude, longitude = origin.Latitude, origin.Longitude
+        else:
+            latitude, longitude = arguments.get("latitude"), arguments.get("longitude")
+
+        limit = min(int(arguments.get("limit", NEAR_DEFAULT_LIMIT)), NEAR_MAX_LIMIT)
+        radius_km = arguments.get("radius_km")
+        logger.info(f"Retrieving monkeys near ({latitude}, {longitude}) (limit {limit}, radius {radius_km} km)")
+
+        nearest = snapshot.geo.nearest(latitude, longitude, limit + (origin is not None), radius_km)
+        monkey_dicts = []
+        for position, distance in nearest:
+            monkey = snapshot.monkeys[position]
+            if monkey is not origin and len(monkey_dicts) < limit:
+                monkey_dicts.append({**monkey.to_dict(), "DistanceKm": round(distance, 3)})
+
+        result = ToolResult(monkey_dicts)
+        logger.info(f"Found {len(monkey_dicts)} monkeys near ({latitude}, {longitude})")
+        return result
+
     @staticmethod
-    async def _get_monkey_business() -> str:
+    async def _get_monkey_business(arguments: dict) -> ToolResult:
         """Get monkey business emojis"""
-        return "🐵🐵🐵"
+        return ToolResult("🐵🐵🐵")
 
-    async def _refresh_monkey_cache(self) -> str:
+    async def _refresh_monkey_cache(self, arguments: dict) -> ToolResult:
         """Refresh monkey cache"""
         logger.info("Refreshing monkey cache")
         await self._monkey_service.refresh_cache_async()
         logger.info("Successfully refreshed monkey cache")
-        return "Monkey cache refreshed successfully"
+        return ToolResult("Monkey cache refreshed successfully")
@@ -0,0 +1,221 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Optional, Tuple
+from Globals.Constants import RESPONSE_CACHE_MAX_BYTES
+from Models.EncodedResponse import EncodedResponse
+from Models.ToolResult import ToolResult
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+cacheable_tools = {"get_monkeys", "get_monkeys_filtered", "get_monkey", "search_monkeys", "get_monkeys_near"}
+
+
+def encode_response(payload: Any) -> EncodedResponse:
+    """Encode a /chat response body once, together with its ETag"""
+    return encode_result(ToolResult(payload))
+
+
+def encode_result(result: ToolResult) -> EncodedResponse:
+    """Wrap a tool result's JSON bytes as a /chat response body without re-encoding them"""
+    body = b'{"response":' + result.to_json_bytes() + b'}'
+    return EncodedResponse(body, hashlib.blake2b(body, digest_size=16).hexdigest())
+
+
+class ResponseCache:
+    """Ready-to-send /chat bodies keyed by tool, normalized arguments and dataset version, with an optional SQLite
+    tier that worker processes on the same host share"""
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, db_path: Optional[str] = None,
+                 db_max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._db_max_bytes = db_max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, int], EncodedResponse]" = OrderedDict()
+        self._lock = Lock()
+        self._bytes = 0
+        self._version = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.retained = 0
+        self._db = self._open_db(db_path) if db_path else None
+
+    @staticmethod
+    def key(tool_name: str, arguments: dict, version: int) -> Optional[Tuple[str, str, int]]:
+        """Cache key for a tool call, or None when the tool's output must not be cached"""
+        if tool_name not in cacheable_tools:
+            return None
+        return tool_name, json.dumps(arguments, sort_keys=True, default=str), version
+
+    def get(self, key: Optional[Tuple[str, str, int]]) -> Optional[EncodedResponse]:
+        """Get a cached response"""
+        if key is None:
+            return None
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return response
+
+            response = self._db_get(key)
+            if response is not None:
+                self._insert(key, response)
+                self.disk_hits += 1
+                return response
+
+            self.misses += 1
+            return None
+
+    def put(self, key: Optional[Tuple[str, str, int]], response: EncodedResponse):
+        """Cache a response unless it was built from an outdated snapshot or is too large"""
+        size = len(response.body)
+        if key is None or size > self._max_bytes:
+            return
+        with self._lock:
+            if key[2] < self._version:
+                return
+            self._insert(key, response)
+            self._db_put(key, response)
+
+    def invalidate(self, version: int, previous_version: Optional[int] = None,
+                   affects: Optional[Callable[[str, dict], bool]] = None):
+        """Drop every response built from a snapshot older than version, except that responses from previous_version
+        which affects says the change leaves alone are kept for the new version"""
+        with self._lock:
+            self._version = version
+            carried = {}
+            if affects is not None and previous_version is not None:
+                for key in self._entries:
+                    if key[2] == previous_version and not affects(key[0], json.loads(key[1])):
+                        carried[key] = (key[0], key[1], version)
+            stale = [key for key in self._entries if key[2] < version]
+            kept = 0
+            for key in stale:
+                response = self._entries.pop(key)
+                if key in carried and carried[key] not in self._entries:
+                    self._entries[carried[key]] = response
+                    kept += 1
+                else:
+                    self._bytes -= len(response.body)
+            self.invalidations += len(stale) - kept
+            self.retained += kept
+            if affects is not None and previous_version is not None:
+                self._db_carry_over(previous_version, version, affects)
+            self._db_execute("DELETE FROM responses WHERE version < ?", (version,))
+        if stale:
+            logger.info(f"Dropped {len(stale) - kept} cached responses older than dataset version {version}, "
+                        f"kept {kept} the changes do not affect")
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "retained": self.retained,
+                "dataset_version": self._version
+            }
+
+    def _insert(self, key: Tuple[str, str, int], response: EncodedResponse):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.body)
+        self._entries[key] = response
+        self._bytes += len(response.body)
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+            self.evictions += 1
+
+    @staticmethod
+    def _open_db(db_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        # Write-ahead logging lets every worker read while one of them writes
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS responses (tool TEXT NOT NULL, arguments TEXT NOT NULL, "
+                   "version INTEGER NOT NULL, body BLOB NOT NULL, etag TEXT NOT NULL, size INTEGER NOT NULL, "
+                   "stored_at REAL NOT NULL, PRIMARY KEY (tool, arguments, version))")
+        db.execute("CREATE INDEX IF NOT EXISTS responses_age ON responses (stored_at, size)")
+        # Triggers keep the table's total size in a meta row, so no put has to add up every row to check the budget
+        db.execute("BEGIN IMMEDIATE")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        db.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'bytes', total(size) FROM responses")
+        db.execute("CREATE TRIGGER IF NOT EXISTS responses_added AFTER INSERT ON responses BEGIN "
+                   "UPDATE meta SET value = value + new.size WHERE key = 'bytes'; END")
+        db.execute("CREATE TRIGGER IF NOT EXISTS responses_removed AFTER DELETE ON responses BEGIN "
+                   "UPDATE meta SET value = value - old.size WHERE key = 'bytes'; END")
+        db.execute("CREATE TRIGGER IF NOT EXISTS responses_resized AFTER UPDATE OF size ON responses BEGIN "
+                   "UPDATE meta SET value = value + new.size - old.size WHERE key = 'bytes'; END")
+        db.commit()
+        return db
+
+    def _db_execute(self, statement: str, parameters: tuple = ()) -> list:
+        if not self._db:
+            return []
+        try:
+            rows = self._db.execute(statement, parameters).fetchall()
+            self._db.commit()
+            return rows
+        except sqlite3.Error as ex:
+            logger.warning(f"Shared response cache unavailable: {ex}")
+            return []
+
+    def _db_get(self, key: Tuple[str, str, int]) -> Optional[EncodedResponse]:
+        rows = self._db_execute("SELECT body, etag FROM responses WHERE tool = ? AND arguments = ? AND version = ?",
+                                key)
+        return EncodedResponse(rows[0][0], rows[0][1]) if rows else None
+
+    def _db_carry_over(self, previous_version: int, version: int, affects: Callable[[str, dict], bool]):
+        if not self._db:
+            return
+        rows = self._db_execute("SELECT tool, arguments FROM responses WHERE version = ?", (previous_version,))
+        carried = [(version, tool, arguments, previous_version) for tool, arguments in rows
+                   if not affects(tool, json.loads(arguments))]
+        try:
+            # Another worker may already have carried the same rows over, which the IGNORE leaves in place
+            self._db.executemany("UPDATE OR IGNORE responses SET version = ? WHERE tool = ? AND arguments = ? "
+                                 "AND version = ?", carried)
+            self._db.commit()
+        except sqlite3.Error as ex:
+            logger.warning(f"Shared response cache unavailable: {ex}")
+
+    def _db_put(self, key: Tuple[str, str, int], response: EncodedResponse):
+        if not self._db or len(response.body) > self._db_max_bytes:
+            return
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete would bypass the size triggers
+        self._db_execute("INSERT INTO responses (tool, arguments, version, body, etag, size, stored_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (tool, arguments, version) DO UPDATE SET "
+                         "body = excluded.body, etag = excluded.etag, size = excluded.size, "
+                         "stored_at = excluded.stored_at", (*key, response.body, response.etag, len(response.body),
+                                                            time.time()))
+        (total,), = self._db_execute("SELECT value FROM meta WHERE key = 'bytes'") or [(0,)]
+        if total <= self._db_max_bytes:
+            return
+        evict = []
+        for rowid, size in self._db_execute("SELECT rowid, size FROM responses ORDER BY stored_at"):
+            if total <= self._db_max_bytes:
+                break
+            evict.append((rowid,))
+            total -= size
+        try:
+            self._db.executemany("DELETE FROM responses WHERE rowid = ?", evict)
+            self._db.commit()
+        except sqlite3.Error as ex:
+            logger.warning(f"Shared response cache unavailable: {ex}")
+        self.evictions += len(evict)
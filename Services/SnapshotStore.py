@@ -0,0 +1,151 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import Dict, Optional, Tuple
+from Models.Monkey import Monkey
+from Services.MonkeyTable import MonkeyTable, table_fields
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+snapshot_magic = b"MONKEYS\0"
+snapshot_format = 1
+numeric_typecodes = {"Population": "q", "Latitude": "d", "Longitude": "d"}
+interned_fields = {"Location"}
+alignment = 8
+
+
+class SnapshotStore:
+    """Saves dataset snapshots with their sort permutations to a memory-mappable file and restores them"""
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def save(self, snapshot, etag: Optional[str], last_modified: Optional[str]):
+        """Atomically replace the stored snapshot; failures are logged and leave the previous file in place"""
+        try:
+            sections = self._encode_sections(snapshot.table)
+        except (TypeError, OverflowError, ValueError) as ex:
+            logger.warning(f"Dataset version {snapshot.version} cannot be stored in a snapshot file: {ex}")
+            return
+
+        layout = {}
+        offset = 0
+        for name, data in sections.items():
+            layout[name] = [offset, len(data)]
+            offset += len(data) + (-len(data) % alignment)
+
+        header = json.dumps({
+            "format": snapshot_format,
+            "version": snapshot.version,
+            "rows": len(snapshot.monkeys),
+            "etag": etag,
+            "last_modified": last_modified,
+            "non_null_count": {field: snapshot.table.non_null_count(field) for field in table_fields},
+            "sections": layout
+        }).encode()
+        prefix = snapshot_magic + struct.pack("<I", len(header)) + header
+        prefix += b"\0" * (-len(prefix) % alignment)
+
+        temporary_path = f"{self._path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as snapshot_file:
+                snapshot_file.write(prefix)
+                for data in sections.values():
+                    snapshot_file.write(data)
+                    snapshot_file.write(b"\0" * (-len(data) % alignment))
+            os.replace(temporary_path, self._path)
+            logger.info(f"Stored dataset version {snapshot.version} in {self._path}")
+        except OSError as ex:
+            logger.error(f"Failed to store snapshot in {self._path}: {ex}")
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+
+    def identity(self) -> Optional[Tuple[int, int, int]]:
+        """Inode, modification time and size of the stored file; every save changes it"""
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> Optional[Tuple[list, MonkeyTable, dict]]:
+        """Monkeys, table and header of the stored snapshot, or None when there is no usable file"""
+        if not os.path.exists(self._path):
+            return None
+        try:
+            with open(self._path, "rb") as snapshot_file:
+                mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+
+            if bytes(view[:len(snapshot_magic)]) != snapshot_magic:
+                raise ValueError("not a monkeys snapshot file")
+            header_length, = struct.unpack_from("<I", view, len(snapshot_magic))
+            header_start = len(snapshot_magic) + 4
+            header = json.loads(bytes(view[header_start:header_start + header_length]))
+            if header["format"] != snapshot_format:
+                raise ValueError(f"unsupported snapshot format {header['format']}")
+
+            data_start = header_start + header_length + (-(header_start + header_length) % alignment)
+
+            def section(name: str) -> memoryview:
+                offset, length = header["sections"][name]
+                return view[data_start + offset:data_start + offset + length]
+
+            columns, ascending, ranks = self._decode_sections(section, header["rows"])
+            table = MonkeyTable.restore(columns, ascending, header["non_null_count"], ranks)
+            monkeys = list(map(Monkey, *(columns[field] for field in table_fields)))
+            return monkeys, table, header
+        except Exception as ex:
+            logger.warning(f"Ignoring unreadable snapshot file {self._path}: {ex}")
+            return None
+
+    @staticmethod
+    def _encode_sections(table: MonkeyTable) -> Dict[str, bytes]:
+        sections = {}
+        for field in table_fields:
+            column = table.columns[field]
+            sections[f"{field}.nulls"] = bytes(value is None for value in column)
+            if field in numeric_typecodes:
+                sections[f"{field}.values"] = array(numeric_typecodes[field],
+                                                    (0 if value is None else value for value in column)).tobytes()
+            else:
+                values = ["" if value is None else value for value in column]
+                sections[f"{field}.offsets"] = array("Q", accumulate(map(len, values), initial=0)).tobytes()
+                sections[f"{field}.text"] = "".join(values).encode()
+            sections[f"{field}.ascending"] = array("I", table.ascending(field)).tobytes()
+            sections[f"{field}.ranks"] = table.ranks(field).tobytes()
+        return sections
+
+    @staticmethod
+    def _decode_sections(section, rows: int):
+        columns, ascending, ranks = {}, {}, {}
+        for field in table_fields:
+            if field in numeric_typecodes:
+                values = section(f"{field}.values").cast(numeric_typecodes[field]).tolist()
+            else:
+                text = str(section(f"{field}.text"), "utf-8")
+                offsets = section(f"{field}.offsets").cast("Q")
+                values = list(map(text.__getitem__, map(slice, offsets[:-1], offsets[1:])))
+                if field in interned_fields:
+                    values = list(map(sys.intern, values))
+
+            nulls = section(f"{field}.nulls")
+            if any(nulls):
+                values = [None if null else value for value, null in zip(values, nulls)]
+            if len(values) != rows:
+                raise ValueError(f"column {field} has {len(values)} rows, expected {rows}")
+
+            columns[field] = values
+            # Permutations and ranks are only indexed, sliced and iterated, so they stay backed by the mapped
+            # file and every process that maps it shares the same pages
+            ascending[field] = section(f"{field}.ascending").cast("I")
+            ranks[field] = section(f"{field}.ranks").cast("I")
+        return columns, ascending, ranks
@@ -0,0 +1,129 @@
+from typing import Dict, Iterable, List
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+from Models.McpTool import McpTool
+
+_page_properties = {
+    "limit": {"type": "integer", "minimum": 1, "description": "Page size; the result then carries a next_cursor"},
+    "cursor": {"type": "string", "description": "next_cursor from the previous page of the same query"}
+}
+
+
+class ToolRegistry:
+    """Tools by name, with argument validators compiled once from their JSON Schemas"""
+
+    def __init__(self, tools: Iterable[McpTool]):
+        self._tools: Dict[str, McpTool] = {}
+        self._validators = {}
+        for tool in tools:
+            validator_class = validator_for(tool.input_schema)
+            validator_class.check_schema(tool.input_schema)
+            self._tools[tool.name] = tool
+            self._validators[tool.name] = validator_class(tool.input_schema)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def tools(self) -> List[McpTool]:
+        """Every registered tool, in registration order"""
+        return list(self._tools.values())
+
+    def descriptions(self) -> Dict[str, str]:
+        """Tool descriptions by name, as shown to the planning model"""
+        return {name: tool.description for name, tool in self._tools.items()}
+
+    def validate(self, name: str, arguments: dict):
+        """Raise ValueError when the tool is unknown or the arguments do not match its schema"""
+        validator = self._validators.get(name)
+        if validator is None:
+            raise ValueError(f"Unknown tool: {name}")
+        error = best_match(validator.iter_errors(arguments))
+        if error is not None:
+            location = "/".join(map(str, error.absolute_path))
+            raise ValueError(f"Invalid arguments for {name}: {f'{location}: ' if location else ''}{error.message}")
+
+
+monkey_tool_registry = ToolRegistry([
+    McpTool(
+        "get_monkeys",
+        "Gets a complete list of all monkeys with their full details. Use when the user asks for 'all monkeys' or "
+        "'list all monkeys' without specific fields, sorting, or filtering. Optional 'limit' returns only the first "
+        "monkeys together with a 'next_cursor' for the following page.",
+        {"type": "object", "properties": dict(_page_properties)}
+    ),
+    McpTool(
+        "get_monkeys_filtered",
+        "Gets monkeys with specific fields, optional sorting by 'Name', 'Location', 'Details', 'Image', 'Population', "
+        "'Latitude', 'Longitude', optional sort order ('asc' or 'desc'), and optional 'filters' mapping a field to a "
+        "value (equality) or to conditions: 'gt', 'gte', 'lt', 'lte', 'between' ([low, high]) on 'Population', "
+        "'Latitude', 'Longitude'; 'contains' (substring) or 'tokens' (all words) on 'Location' and 'Details'. "
+        "Optional 'limit' returns only the first matching monkeys together with a 'next_cursor' for the following "
+        "page. Use when the user asks for monkeys with specific columns, or wants to sort or filter them, or implies "
+        "a general listing with criteria.",
+        {
+            "type": "object",
+            "properties": {
+                "fields": {"type": ["array", "null"], "items": {"type": "string"}},
+                "sort_by": {"type": ["string", "null"]},
+                "sort_order": {"type": ["string", "null"]},
+                "filters": {
+                    "type": ["object", "null"],
+                    "description": "Field to a value, or field to {operator: operand}"
+                },
+                **_page_properties
+            }
+        }
+    ),
+    McpTool(
+        "get_monkey",
+        "Gets detailed information about a single specific monkey by its name. Use when the user asks for a "
+        "particular monkey by name (e.g., 'show details for mandrill', 'find chimpanzee').",
+        {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}
+    ),
+    McpTool(
+        "search_monkeys",
+        "Searches monkeys by name, matching exact names, name prefixes and misspelled names, with an optional "
+        "'limit' on the number of results (default 10). Use when the user is looking for monkeys whose name starts "
+        "with or resembles some text, or is unsure of the exact name (e.g., 'find monkeys named golden', "
+        "'search for mandril').",
+        {
+            "type": "object",
+            "properties": {"query": {"type": "string"}, "limit": {"type": "integer", "minimum": 1}},
+            "required": ["query"]
+        }
+    ),
+    McpTool(
+        "get_monkeys_near",
+        "Gets the monkeys closest to a point, given as 'latitude' and 'longitude' in degrees or as the 'name' of a "
+        "monkey to search around, ordered by great-circle distance with each result's 'DistanceKm'. Optional "
+        "'limit' on the number of results (default 10) and optional 'radius_km' to only return monkeys within that "
+        "distance. Use when the user asks for monkeys near, around or within some distance of a place or another "
+        "monkey.",
+        {
+            "type": "object",
+            "properties": {
+                "latitude": {"type": "number", "minimum": -90, "maximum": 90},
+                "longitude": {"type": "number", "minimum": -180, "maximum": 180},
+                "name": {"type": "string", "minLength": 1},
+                "limit": {"type": "integer", "minimum": 1},
+                "radius_km": {"type": ["number", "null"], "minimum": 0}
+            },
+            "anyOf": [{"required": ["name"]}, {"required": ["latitude", "longitude"]}]
+        }
+    ),
+    McpTool(
+        "get_monkey_business",
+        "Returns fun monkey emojis. Use when the user asks for 'monkey business' or something similar.",
+        {"type": "object", "properties": {}}
+    ),
+    McpTool(
+        "refresh_monkey_cache",
+        "Refreshes the monkey data cache. Use when the user explicitly asks to 'refresh monkey data' or "
+        "'update monkeys'.",
+        {"type": "object", "properties": {}}
+    )
+])
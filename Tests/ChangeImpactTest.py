@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import unittest
+
+from Benchmarks.FakeServers import start_fake_monkeys, set_fake_monkeys
+from Models.EncodedResponse import EncodedResponse
+from Models.Monkey import Monkey
+from Services.ChangeImpact import ChangeImpact
+from Services.MonkeyDiff import MonkeyDiff
+from Services.MonkeyService import MonkeyService
+from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeySnapshot import MonkeySnapshot
+from Services.MonkeyTools import MonkeyTools
+from Services.ResponseCache import ResponseCache
+from Tests.MonkeySnapshotTest import _churn, _feed
+
+
+def _calls(rng: random.Random, monkeys: list) -> list:
+    """Cacheable tool calls of every kind, about rows that may or may not change"""
+    calls = []
+    for monkey in rng.sample(monkeys, 15):
+        calls.append(("get_monkey", {"name": monkey.Name.upper()}))
+        calls.append(("search_monkeys", {"query": monkey.Name.split()[0][:4], "limit": 5}))
+        calls.append(("get_monkeys_near", {"name": monkey.Name, "limit": 3}))
+        if monkey.Latitude is not None:
+            calls.append(("get_monkeys_near", {"latitude": monkey.Latitude + 0.5, "longitude": monkey.Longitude,
+                                               "limit": rng.choice([2, 8])}))
+    for _ in range(15):
+        low = rng.randint(0, 95)
+        calls.append(("get_monkeys_filtered", {"filters": {"Population": {"between": [low, low + 2]}},
+                                               "sort_by": "Population"}))
+        calls.append(("get_monkeys_near", {"latitude": rng.uniform(-60, 60), "longitude": rng.uniform(-180, 180),
+                                           "limit": rng.choice([1, 5])}))
+        calls.append(("get_monkeys_near", {"latitude": rng.uniform(-60, 60), "longitude": rng.uniform(-180, 180),
+                                           "radius_km": rng.choice([300, 1500])}))
+    calls.append(("get_monkeys_filtered", {"fields": ["Name"]}))
+    return calls
+
+
+class ChangeImpactTest(unittest.TestCase):
+    """A cached result the impact check keeps must be exactly what the new snapshot returns"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    async def results(self, tools: MonkeyTools, calls: list) -> list:
+        results = []
+        for tool_name, arguments in calls:
+            try:
+                results.append((await tools.execute_tool(tool_name, arguments)).to_json_bytes())
+            except Exception as ex:
+                results.append(type(ex).__name__)
+        return results
+
+    def test_kept_results_match_the_new_snapshot(self):
+        rng = random.Random(42)
+        kept = changed = 0
+        for trial in range(6):
+            feed = _feed(rng, 300)
+            fake = start_fake_monkeys([monkey.to_dict() for monkey in feed])
+            try:
+                service = MonkeyService(MonkeyServiceOptions(fake.url, snapshot_path=""))
+                tools = MonkeyTools(service)
+                calls = _calls(rng, feed)
+                before = asyncio.run(self.results(tools, calls))
+
+                set_fake_monkeys(fake, [monkey.to_dict() for monkey in _churn(rng, feed, 0.05, trial % 3 == 2)])
+                asyncio.run(service.refresh_cache_async())
+                snapshot = asyncio.run(service.get_snapshot_async())
+                impact = ChangeImpact.of(snapshot)
+                self.assertEqual((snapshot.version, snapshot.previous_version), (2, 1))
+                after = asyncio.run(self.results(tools, calls))
+            finally:
+                fake.stop()
+
+            for (tool_name, arguments), old, new in zip(calls, before, after):
+                if not impact.affects(tool_name, arguments):
+                    kept += 1
+                    with self.subTest(trial=trial, tool_name=tool_name, arguments=arguments):
+                        self.assertEqual(old, new)
+                changed += old != new
+        # The check must keep a good share of results, and the churn must change some, or this proves little
+        self.assertGreater(kept, 100)
+        self.assertGreater(changed, 20)
+
+
+class ChangeImpactBoundsTest(unittest.TestCase):
+    """Changes just inside a cached result's reach affect it, and changes just beyond it do not"""
+
+    def setUp(self):
+        # One monkey per degree of latitude along the prime meridian
+        self.rows = [Monkey(f"Monkey {i}", "Borneo", "", "", i * 10, float(i), 0.0) for i in range(10)]
+
+    def impact(self, rows: list) -> ChangeImpact:
+        previous = MonkeySnapshot(self.rows, 1)
+        changes = MonkeyDiff.compute(previous.monkeys, rows)
+        return ChangeImpact.of(MonkeySnapshot(changes.monkeys, 2, previous=previous, changes=changes))
+
+    def inserted(self, latitude: float) -> ChangeImpact:
+        return self.impact(self.rows + [Monkey("Newcomer", "Peru", "", "", 1, latitude, 0.0)])
+
+    def test_nearest(self):
+        arguments = {"latitude": 0, "longitude": 0, "limit": 3}
+        self.assertTrue(self.inserted(1.9).affects("get_monkeys_near", arguments))
+        self.assertFalse(self.inserted(2.1).affects("get_monkeys_near", arguments))
+        self.assertTrue(self.impact(self.rows[:2] + self.rows[3:]).affects("get_monkeys_near", arguments))
+        self.assertFalse(self.impact(self.rows[:9]).affects("get_monkeys_near", arguments))
+
+    def test_within_radius(self):
+        arguments = {"latitude": 0, "longitude": 0, "radius_km": 150}
+        self.assertTrue(self.inserted(1.2).affects("get_monkeys_near", arguments))
+        self.assertFalse(self.inserted(1.5).affects("get_monkeys_near", arguments))
+
+    def test_around_a_named_monkey(self):
+        arguments = {"name": "Monkey 5", "limit": 2}
+        self.assertTrue(self.inserted(5.9).affects("get_monkeys_near", arguments))
+        self.assertFalse(self.inserted(8.5).affects("get_monkeys_near", arguments))
+        updated = [*self.rows[:5], Monkey("Monkey 5", "Peru", "", "", 50, 5.0, 0.0), *self.rows[6:]]
+        self.assertTrue(self.impact(updated).affects("get_monkeys_near", arguments))
+
+    def test_lookups_and_filters(self):
+        impact = self.inserted(8.5)
+        self.assertTrue(impact.affects("get_monkey", {"name": "NEWCOMER"}))
+        self.assertFalse(impact.affects("get_monkey", {"name": "Monkey 3"}))
+        self.assertTrue(impact.affects("search_monkeys", {"query": "newc"}))
+        self.assertFalse(impact.affects("search_monkeys", {"query": "Monkey 3", "limit": 1}))
+        self.assertTrue(impact.affects("get_monkeys_filtered", {"filters": {"Location": "peru"}}))
+        self.assertFalse(impact.affects("get_monkeys_filtered", {"filters": {"Population": {"gte": 50}}}))
+        # Listings without filters and pages of listings always change
+        self.assertTrue(impact.affects("get_monkeys_filtered", {"fields": ["Name"]}))
+        self.assertTrue(impact.affects("get_monkeys_filtered", {"filters": {"Population": {"gte": 50}}, "limit": 1}))
+
+
+class ResponseCacheCarryOverTest(unittest.TestCase):
+    """Invalidation keeps the responses a change leaves alone, under the new version, in both cache tiers"""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "responses.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def fill(self, cache: ResponseCache, version: int) -> dict:
+        keys = {}
+        for i in range(20):
+            key = cache.key("get_monkey", {"name": f"Monkey {i}"}, version)
+            cache.put(key, EncodedResponse(f'{{"response":{i}}}'.encode(), f"etag-{i}"))
+            keys[i] = key
+        return keys
+
+    @staticmethod
+    def affects(tool_name: str, arguments: dict) -> bool:
+        return int(arguments["name"].split()[1]) % 3 == 0
+
+    def assert_carried_over(self, cache: ResponseCache):
+        for i in range(20):
+            response = cache.get(cache.key("get_monkey", {"name": f"Monkey {i}"}, 2))
+            with self.subTest(i=i):
+                if i % 3 == 0:
+                    self.assertIsNone(response)
+                else:
+                    self.assertEqual((response.body, response.etag), (f'{{"response":{i}}}'.encode(), f"etag-{i}"))
+                self.assertIsNone(cache.get(cache.key("get_monkey", {"name": f"Monkey {i}"}, 1)))
+
+    def test_memory_tier(self):
+        cache = ResponseCache(1 << 20)
+        self.fill(cache, 1)
+        cache.invalidate(2, 1, self.affects)
+        self.assertEqual((cache.retained, cache.invalidations), (13, 7))
+        self.assert_carried_over(cache)
+
+    def test_shared_tier_is_carried_over_for_every_worker(self):
+        loader, follower = ResponseCache(1 << 20, self.db_path), ResponseCache(1 << 20, self.db_path)
+        self.fill(loader, 1)
+        loader.invalidate(2, 1, self.affects)
+        # The follower has nothing in memory, so every hit comes from the shared file
+        follower.invalidate(2)
+        self.assert_carried_over(follower)
+        self.assertEqual(follower.disk_hits, 13)
+
+    def test_invalidation_without_impact_drops_everything(self):
+        cache = ResponseCache(1 << 20, self.db_path)
+        keys = self.fill(cache, 1)
+        cache.invalidate(2)
+        self.assertTrue(all(cache.get(key) is None for key in keys.values()))
+        self.assertEqual(cache._db_execute("SELECT count(*) FROM responses"), [(0,)])
+
+    def test_puts_for_an_outdated_version_are_ignored(self):
+        cache = ResponseCache(1 << 20)
+        cache.invalidate(2)
+        key = cache.key("get_monkey", {"name": "Monkey 1"}, 1)
+        cache.put(key, EncodedResponse(b"{}", "etag"))
+        self.assertIsNone(cache.get(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
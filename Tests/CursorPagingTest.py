@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import random
+import unittest
+
+from Benchmarks.FakeServers import start_fake_monkeys, set_fake_monkeys
+from Globals.Constants import PAGE_MAX_LIMIT
+from Helpers.Cursor import decode_cursor, encode_cursor, query_fingerprint
+from Services.MonkeyService import MonkeyService
+from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeyTools import MonkeyTools
+from Tests.MonkeySnapshotTest import _feed
+
+
+class CursorTest(unittest.TestCase):
+    """Cursors only continue the query and dataset version that produced them"""
+
+    def test_round_trip(self):
+        fingerprint = query_fingerprint("get_monkeys", {"limit": 5})
+        self.assertEqual(decode_cursor(encode_cursor(3, 40, fingerprint), 3, fingerprint), 40)
+        self.assertEqual(decode_cursor(None, 3, fingerprint), 0)
+
+    def test_paging_arguments_do_not_change_the_fingerprint(self):
+        self.assertEqual(query_fingerprint("get_monkeys_filtered", {"sort_by": "Name", "limit": 5}),
+                         query_fingerprint("get_monkeys_filtered", {"sort_by": "Name", "limit": 9, "cursor": "x"}))
+        self.assertNotEqual(query_fingerprint("get_monkeys_filtered", {"sort_by": "Name"}),
+                            query_fingerprint("get_monkeys_filtered", {"sort_by": "Population"}))
+
+    def test_foreign_stale_and_malformed_cursors_are_rejected(self):
+        fingerprint = query_fingerprint("get_monkeys", {})
+        for cursor, version, expected in ((encode_cursor(1, 5, "other"), 1, "does not belong"),
+                                          (encode_cursor(1, -5, fingerprint), 1, "does not belong"),
+                                          (encode_cursor(1, 5, fingerprint), 2, "version 1"),
+                                          ("not a cursor!", 1, "Invalid cursor")):
+            with self.subTest(cursor=cursor):
+                with self.assertRaisesRegex(ValueError, expected):
+                    decode_cursor(cursor, version, fingerprint)
+
+
+class MonkeyToolsPagingTest(unittest.TestCase):
+    """Following next_cursor through a listing returns every row of the unpaged listing exactly once, in order"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.feed = _feed(random.Random(13), 57)
+        cls.fake = start_fake_monkeys([monkey.to_dict() for monkey in cls.feed])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fake.stop()
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        set_fake_monkeys(self.fake, [monkey.to_dict() for monkey in self.feed])
+        self.service = MonkeyService(MonkeyServiceOptions(self.fake.url, snapshot_path=""))
+        self.tools = MonkeyTools(self.service)
+
+    def call(self, tool_name: str, arguments: dict):
+        return json.loads(asyncio.run(self.tools.execute_tool(tool_name, arguments)).to_json_bytes())
+
+    def pages(self, tool_name: str, arguments: dict) -> list:
+        rows, cursor, pages = [], None, 0
+        while True:
+            page = self.call(tool_name, {**arguments, **({"cursor": cursor} if cursor else {})})
+            rows += page["monkeys"]
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return rows, pages
+
+    def test_pages_cover_the_listing(self):
+        for tool_name, arguments in (("get_monkeys", {}),
+                                     ("get_monkeys_filtered", {"sort_by": "Population", "sort_order": "desc"}),
+                                     ("get_monkeys_filtered", {"fields": ["Name"], "filters": {"Location": "peru"}})):
+            listing = self.call(tool_name, arguments)
+            for limit in (1, 10, 57, 100):
+                with self.subTest(tool_name=tool_name, arguments=arguments, limit=limit):
+                    rows, pages = self.pages(tool_name, {**arguments, "limit": limit})
+                    self.assertEqual(rows, listing)
+                    self.assertEqual(pages, max(1, -(-len(listing) // limit)))
+
+    def test_limits_are_clamped(self):
+        page = self.call("get_monkeys", {"limit": PAGE_MAX_LIMIT * 10})
+        self.assertEqual((len(page["monkeys"]), page["next_cursor"]), (57, None))
+
+    def test_cursor_from_another_query_is_rejected(self):
+        cursor = self.call("get_monkeys_filtered", {"sort_by": "Name", "limit": 5})["next_cursor"]
+        with self.assertRaisesRegex(ValueError, "does not belong"):
+            self.call("get_monkeys_filtered", {"sort_by": "Population", "limit": 5, "cursor": cursor})
+
+    def test_cursor_from_before_a_refresh_is_rejected(self):
+        cursor = self.call("get_monkeys", {"limit": 5})["next_cursor"]
+        set_fake_monkeys(self.fake, [monkey.to_dict() for monkey in self.feed[1:]])
+        asyncio.run(self.service.refresh_cache_async())
+        with self.assertRaisesRegex(ValueError, "start again without a cursor"):
+            self.call("get_monkeys", {"limit": 5, "cursor": cursor})
+
+
+if __name__ == "__main__":
+    unittest.main()
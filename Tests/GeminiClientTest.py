@@ -0,0 +1,51 @@
+import asyncio
+import logging
+import unittest
+
+from Agents.GeminiClient import GeminiClient
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini
+from Helpers.CircuitBreaker import CircuitBreaker
+
+
+class GeminiClientCancellationTest(unittest.TestCase):
+    """Callers abandoning in-flight calls must not count against Gemini's health"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.gemini = start_fake_gemini(latency=2.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.gemini.stop()
+        logging.disable(logging.NOTSET)
+
+    def test_cancelled_calls_leave_the_breaker_closed(self):
+        client = GeminiClient(GeminiClientOptions(api_url=self.gemini.url, api_key="", deadline=10,
+                                                  breaker_failures=1, breaker_cooldown=60))
+
+        async def cancel_in_flight():
+            calls = [asyncio.ensure_future(client.chat(f"prompt {i}")) for i in range(4)]
+            await asyncio.sleep(0.2)
+            for call in calls:
+                call.cancel()
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            self.assertTrue(all(isinstance(result, asyncio.CancelledError) for result in results))
+
+        asyncio.run(cancel_in_flight())
+        self.assertEqual(client.breaker.state, "closed")
+        self.assertTrue(client.breaker.allow())
+
+    def test_cancelled_probe_frees_the_probe_slot(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, cooldown_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.release_probe()
+        self.assertEqual(breaker.times_opened, 1)
+        self.assertTrue(breaker.allow())
+
+
+if __name__ == "__main__":
+    unittest.main()
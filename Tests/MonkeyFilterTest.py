@@ -0,0 +1,140 @@
+import random
+import re
+import unittest
+from numbers import Number
+
+from Models.Monkey import Monkey
+from Services.MonkeyFilter import MonkeyFilterIndex
+from Services.MonkeyTable import MonkeyTable, table_fields
+
+locations = ["Central Africa", "South America", "south america", "Borneo", "Costa Rica", "Africa, East", None]
+words = ["long", "tail", "howler", "night", "tree", "river", "red", "face", "2020"]
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", text.casefold()))
+
+
+def _monkeys(rng: random.Random, count: int) -> list:
+    monkeys = []
+    for i in range(count):
+        population = rng.choice([rng.randint(0, 50), rng.randint(0, 50), rng.uniform(0, 50), None, "unknown"])
+        details = " ".join(rng.sample(words, 3)) if rng.random() < 0.9 else None
+        monkeys.append(Monkey(f"Monkey {i % 40}", rng.choice(locations), details, "", population,
+                              rng.choice([rng.uniform(-10, 10), None]), rng.uniform(-10, 10)))
+    return monkeys
+
+
+def _matches(value, operator: str, operand) -> bool:
+    """What each filter operator means, evaluated one value at a time"""
+    if operator == "eq":
+        if _is_number(operand):
+            return _is_number(value) and value == operand
+        return isinstance(value, str) and isinstance(operand, str) and value.casefold() == operand.casefold()
+    if operator == "contains":
+        return isinstance(value, str) and operand.casefold() in value.casefold()
+    if operator == "tokens":
+        return isinstance(value, str) and _tokens(operand) <= _tokens(value)
+    low, high = (operand if operator == "between" else (None, None))
+    return _is_number(value) and {
+        "gt": lambda: value > operand, "gte": lambda: value >= operand, "lt": lambda: value < operand,
+        "lte": lambda: value <= operand, "between": lambda: low <= value <= high
+    }[operator]()
+
+
+def _random_condition(rng: random.Random):
+    field = rng.choice(["Name", "Location", "Details", "Population", "Latitude", "Longitude"])
+    if field == "Name":
+        return field, "eq", f"monkey {rng.randint(0, 45)}"
+    if field == "Location":
+        operator = rng.choice(["eq", "contains"])
+        return field, operator, rng.choice(["south america", "AFRICA", "rica", "a, e", "Borneo"])
+    if field == "Details":
+        operator = rng.choice(["contains", "tokens"])
+        return field, operator, rng.choice(["tail howler", "ong tail howl", "RED", "2020", "night river tree"])
+    operator = rng.choice(["eq", "gt", "gte", "lt", "lte", "between"])
+    low = rng.randint(-10, 30)
+    return field, operator, [low, low + rng.randint(0, 20)] if operator == "between" else low
+
+
+class MonkeyFilterIndexTest(unittest.TestCase):
+    """Indexed filters must select exactly the rows a scan of every row selects"""
+
+    def test_select_matches_brute_force(self):
+        rng = random.Random(11)
+        matched = 0
+        for trial in range(40):
+            monkeys = _monkeys(rng, rng.choice([0, 1, 30, 300, 300]))
+            index = MonkeyFilterIndex(MonkeyTable(monkeys))
+            for _ in range(25):
+                filters = {}
+                for _ in range(rng.choice([1, 1, 2, 3])):
+                    field, operator, operand = _random_condition(rng)
+                    filters.setdefault(field, {})[operator] = operand
+                expected = {position for position, monkey in enumerate(monkeys)
+                            if all(_matches(getattr(monkey, field), operator, operand)
+                                   for field, conditions in filters.items()
+                                   for operator, operand in conditions.items())}
+                with self.subTest(trial=trial, filters=filters):
+                    self.assertEqual(index.select(filters), expected)
+                matched += bool(expected)
+        # Enough random filter sets must select something, or the comparison proves little
+        self.assertGreater(matched, 250)
+
+    def test_bare_values_mean_equality(self):
+        monkeys = [Monkey("A", "Borneo", "", "", 5, 0.0, 0.0), Monkey("B", "borneo", "", "", 5.0, 0.0, 0.0),
+                   Monkey("C", "Peru", "", "", 6, 0.0, 0.0)]
+        index = MonkeyFilterIndex(MonkeyTable(monkeys))
+        self.assertEqual(index.select({"Location": "BORNEO", "Population": 5}), {0, 1})
+        self.assertEqual(index.select({}), {0, 1, 2})
+
+    def test_invalid_filters_are_rejected(self):
+        index = MonkeyFilterIndex(MonkeyTable([Monkey("A", "Borneo", "", "", 5, 0.0, 0.0)]))
+        for filters in ({"Colour": "red"}, {"Name": {"gt": 1}}, {"Population": {"between": [1]}},
+                        {"Population": {"gte": "many"}}, {"Population": {"contains": "5"}}, {"Name": {"near": 1}}):
+            with self.subTest(filters=filters):
+                with self.assertRaises(ValueError):
+                    index.select(filters)
+        with self.assertRaises(ValueError):
+            index.select(["Name"])
+
+
+class MonkeyTableTest(unittest.TestCase):
+    """Sort permutations must order rows as a stable sort would, with missing values last"""
+
+    @staticmethod
+    def brute_force_order(column: list, descending: bool) -> list:
+        def key(position):
+            value = column[position]
+            # Numbers sort before strings, and equal values keep feed order
+            return (0, value, "") if _is_number(value) else (1, 0, value), position
+
+        non_null = sorted((p for p, value in enumerate(column) if value is not None), key=key)
+        nulls = [p for p, value in enumerate(column) if value is None]
+        return (non_null[::-1] if descending else non_null) + nulls
+
+    def test_order_and_order_subset_match_a_sort(self):
+        rng = random.Random(5)
+        monkeys = _monkeys(rng, 200)
+        table = MonkeyTable(monkeys)
+        subset = set(rng.sample(range(len(monkeys)), 60))
+        for field in table_fields:
+            for descending in (False, True):
+                expected = self.brute_force_order(table.columns[field], descending)
+                with self.subTest(field=field, descending=descending):
+                    self.assertEqual(list(table.order(field, descending)), expected)
+                    self.assertEqual(table.order_subset(subset, field, descending),
+                                     [position for position in expected if position in subset])
+
+    def test_unknown_sort_field_keeps_feed_order(self):
+        table = MonkeyTable(_monkeys(random.Random(1), 10))
+        self.assertEqual(list(table.order("Colour")), list(range(10)))
+        self.assertEqual(table.order_subset({7, 2, 5}, None), [2, 5, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import math
+import random
+import unittest
+
+from Models.Monkey import Monkey
+from Services.MonkeyGeoIndex import MonkeyGeoIndex, earth_radius_km
+
+
+def _distance_km(latitude: float, longitude: float, monkey: Monkey) -> float:
+    phi1, phi2 = math.radians(latitude), math.radians(monkey.Latitude)
+    half_chord = math.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(monkey.Longitude - longitude) / 2) ** 2
+    return 2 * math.asin(math.sqrt(min(1.0, half_chord))) * earth_radius_km
+
+
+def _monkeys(rng: random.Random, count: int, max_latitude: float = 90) -> list:
+    return [Monkey(f"Monkey {i}", "", "", "", i, rng.uniform(-max_latitude, max_latitude), rng.uniform(-180, 180))
+            for i in range(count)]
+
+
+def _queries(rng: random.Random, count: int):
+    """Query points biased towards the poles and the antimeridian, where the grid wraps and narrows"""
+    for _ in range(count):
+        latitude = rng.choice([rng.uniform(-90, 90), rng.uniform(75, 90), rng.uniform(-90, -75), 90, -90])
+        longitude = rng.choice([rng.uniform(-180, 180), rng.uniform(170, 180), rng.uniform(-180, -170), 180, -180])
+        yield latitude, longitude
+
+
+class MonkeyGeoIndexTest(unittest.TestCase):
+    """Grid queries must return exactly what a scan of every monkey returns"""
+
+    def assert_matches_brute_force(self, result: list, expected: list):
+        self.assertEqual(len({position for position, _ in result}), len(result))
+        self.assertEqual([position for position, _ in result], [position for position, _ in expected])
+        for (_, distance), (_, expected_distance) in zip(result, expected):
+            self.assertAlmostEqual(distance, expected_distance, places=6)
+
+    def brute_force(self, monkeys: list, latitude: float, longitude: float, limit: int,
+                    radius_km: float = math.inf) -> list:
+        distances = [(_distance_km(latitude, longitude, monkey), position) for position, monkey in enumerate(monkeys)]
+        return [(position, distance) for distance, position in sorted(distances) if distance <= radius_km][:limit]
+
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(12)
+        for trial in range(60):
+            monkeys = _monkeys(rng, rng.choice([1, 5, 18, 40, 200]), max_latitude=rng.choice([30, 90]))
+            index = MonkeyGeoIndex(monkeys)
+            for latitude, longitude in _queries(rng, 20):
+                limit = rng.randint(1, len(monkeys))
+                with self.subTest(trial=trial, latitude=latitude, longitude=longitude, limit=limit):
+                    self.assert_matches_brute_force(index.nearest(latitude, longitude, limit),
+                                                    self.brute_force(monkeys, latitude, longitude, limit))
+
+    def test_nearest_does_not_repeat_cells_once_rings_wrap(self):
+        # Tropical rows give 10 degree cells; half of them sit in the column opposite the query, where rings meet
+        monkeys = [Monkey(f"Monkey {i}", "", "", "", i, -20 + 2.5 * i, 15.0 if i % 2 else -175.0 + 20 * i)
+                   for i in range(18)]
+        result = MonkeyGeoIndex(monkeys).nearest(75, -170, 18)
+        self.assertEqual(sorted(position for position, _ in result), list(range(18)))
+
+    def test_within_radius_matches_brute_force(self):
+        rng = random.Random(21)
+        for trial in range(30):
+            monkeys = _monkeys(rng, rng.choice([5, 40, 200]))
+            index = MonkeyGeoIndex(monkeys)
+            for latitude, longitude in _queries(rng, 10):
+                radius_km = rng.choice([10, 500, 3000, 25000])
+                with self.subTest(trial=trial, latitude=latitude, longitude=longitude, radius_km=radius_km):
+                    self.assert_matches_brute_force(
+                        index.nearest(latitude, longitude, len(monkeys), radius_km),
+                        self.brute_force(monkeys, latitude, longitude, len(monkeys), radius_km))
+
+    def test_unlocated_monkeys_are_skipped(self):
+        monkeys = [Monkey("Nowhere", "", "", "", 1, None, None), Monkey("Here", "", "", "", 1, 10.0, 20.0)]
+        self.assertEqual([position for position, _ in MonkeyGeoIndex(monkeys).nearest(0, 0, 5)], [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import random
+import unittest
+
+from Models.Monkey import Monkey
+from Services.MonkeyDiff import MonkeyDiff
+from Services.MonkeySnapshot import MonkeySnapshot
+from Services.MonkeyTable import table_fields
+from Tests.MonkeyGeoIndexTest import _distance_km
+
+syllables = ["ba", "boo", "man", "drill", "ca", "pu", "chin", "how", "ler", "ma", "ca", "que", "ta", "ma", "rin"]
+
+
+def _name(rng: random.Random, i: int) -> str:
+    return " ".join("".join(rng.sample(syllables, 2)).title() for _ in range(2)) + f" {i}"
+
+
+def _monkey(rng: random.Random, name: str) -> Monkey:
+    return Monkey(name, rng.choice(["Borneo", "Peru", "Central Africa", None]),
+                  rng.choice(["long tail", "night howler", "red face", None]), "",
+                  rng.choice([rng.randint(0, 100), rng.randint(0, 100), None]),
+                  rng.choice([rng.uniform(-60, 60), rng.uniform(-60, 60), None]), rng.uniform(-180, 180))
+
+
+def _feed(rng: random.Random, count: int) -> list:
+    return [_monkey(rng, _name(rng, i)) for i in range(count)]
+
+
+def _churn(rng: random.Random, previous: list, share: float, move: bool) -> list:
+    """The next load of a feed: some rows updated, deleted or inserted, optionally with rows moved around"""
+    current = []
+    for monkey in previous:
+        draw = rng.random()
+        if draw < share / 3:
+            continue
+        if draw < 2 * share / 3:
+            updated = _monkey(rng, monkey.Name)
+            updated.Population = monkey.Population if rng.random() < 0.5 else updated.Population
+            current.append(updated)
+        else:
+            current.append(monkey)
+        if rng.random() < share / 3:
+            current.append(_monkey(rng, _name(rng, 10 ** 6 + rng.randint(0, 10 ** 6))))
+    if move and len(current) > 1:
+        for _ in range(rng.randint(1, 3)):
+            i, j = rng.randrange(len(current)), rng.randrange(len(current))
+            current[i], current[j] = current[j], current[i]
+    names = set()
+    return [monkey for monkey in current if not (monkey.Name in names or names.add(monkey.Name))]
+
+
+class MonkeyDiffTest(unittest.TestCase):
+    """Rows are matched by name into inserted, updated and deleted ones"""
+
+    def test_changes_are_classified_by_name(self):
+        previous = [Monkey(name, "", "", "", 1, 0.0, 0.0) for name in ("A", "B", "C", "D")]
+        current = [previous[0], Monkey("C", "", "", "", 2, 0.0, 0.0), Monkey("B", "", "", "", 1, 0.0, 0.0),
+                   Monkey("E", "", "", "", 1, 0.0, 0.0)]
+        diff = MonkeyDiff.compute(previous, current)
+
+        self.assertEqual([monkey.Name for monkey in diff.inserted], ["E"])
+        self.assertEqual([(old.Name, new.Population) for old, new in diff.updated], [("C", 2)])
+        self.assertEqual([monkey.Name for monkey in diff.deleted], ["D"])
+        self.assertEqual(list(diff.remap), [0, 2, -1, -1])
+        self.assertEqual(diff.changed_positions, [1, 3])
+        self.assertEqual(diff.removed_positions, [3, 2])
+        # B still follows A; the updated C does not count as a kept row
+        self.assertTrue(diff.order_preserved)
+        self.assertTrue(diff.rows_moved)
+        # Unchanged rows keep the previous load's objects
+        self.assertIs(diff.monkeys[2], previous[1])
+
+    def test_identical_loads_give_an_empty_diff(self):
+        rng = random.Random(3)
+        previous = _feed(rng, 50)
+        current = [Monkey(**monkey.to_dict()) for monkey in previous]
+        diff = MonkeyDiff.compute(previous, current)
+        self.assertTrue(diff.is_empty)
+        self.assertEqual(list(diff.remap), list(range(50)))
+
+    def test_missing_or_repeated_names_cannot_be_diffed(self):
+        rows = [Monkey("A", "", "", "", 1, 0.0, 0.0), Monkey("B", "", "", "", 1, 0.0, 0.0)]
+        self.assertIsNone(MonkeyDiff.compute(rows, rows + [Monkey("A", "", "", "", 2, 0.0, 0.0)]))
+        self.assertIsNone(MonkeyDiff.compute(rows, rows + [Monkey(None, "", "", "", 2, 0.0, 0.0)]))
+        self.assertIsNone(MonkeyDiff.compute(rows + rows, rows))
+
+
+class MonkeySnapshotApplyTest(unittest.TestCase):
+    """A snapshot updated from the previous version's structures answers exactly like one built from scratch"""
+
+    def assert_same_as_rebuild(self, incremental: MonkeySnapshot, rng: random.Random):
+        rebuilt = MonkeySnapshot(incremental.monkeys, incremental.version)
+        rebuilt.warm()
+
+        for field in table_fields:
+            self.assertEqual(incremental.table.columns[field], rebuilt.table.columns[field])
+            self.assertEqual(incremental.table.non_null_count(field), rebuilt.table.non_null_count(field))
+            for descending in (False, True):
+                self.assertEqual(list(incremental.table.order(field, descending)),
+                                 list(rebuilt.table.order(field, descending)), (field, descending))
+            self.assertEqual(list(incremental.table.ranks(field)), list(rebuilt.table.ranks(field)))
+
+        self.assertEqual(incremental.index._sorted_keys, rebuilt.index._sorted_keys)
+        self.assertEqual([monkey.Name for monkey in incremental.index._sorted_monkeys],
+                         [monkey.Name for monkey in rebuilt.index._sorted_monkeys])
+        self.assertEqual(incremental.index._postings, rebuilt.index._postings)
+        for monkey in incremental.monkeys[:20]:
+            for query in (monkey.Name, monkey.Name[:4], monkey.Name.split()[0][:-1] + "x"):
+                self.assertEqual([found.Name for found in incremental.index.search(query, 10)],
+                                 [found.Name for found in rebuilt.index.search(query, 10)], query)
+
+        for filters in ({"Population": {"between": [20, 60]}}, {"Location": "borneo", "Details": {"tokens": "tail"}},
+                        {"Latitude": {"gt": 0}, "Details": {"contains": "howl"}}):
+            self.assertEqual(incremental.filters.select(filters), rebuilt.filters.select(filters), filters)
+
+        located = [(position, monkey) for position, monkey in enumerate(incremental.monkeys)
+                   if monkey.Latitude is not None]
+        self.assertEqual(incremental.geo.size, len(located))
+        if incremental.geo._cell_degrees == rebuilt.geo._cell_degrees:
+            # On the same grid the points must be laid out cell by cell exactly as a full build lays them out
+            self.assertEqual(incremental.geo._cells, rebuilt.geo._cells)
+            self.assertEqual(incremental.geo._positions, rebuilt.geo._positions)
+            self.assertEqual(incremental.geo._latitudes, rebuilt.geo._latitudes)
+        for _ in range(10):
+            latitude, longitude, limit = rng.uniform(-90, 90), rng.uniform(-180, 180), rng.randint(1, 15)
+            expected = sorted((_distance_km(latitude, longitude, monkey), position) for position, monkey in located)
+            nearest = incremental.geo.nearest(latitude, longitude, limit)
+            self.assertEqual([position for position, _ in nearest], [position for _, position in expected[:limit]])
+
+    def test_successive_refreshes_match_a_full_rebuild(self):
+        rng = random.Random(24)
+        for trial in range(12):
+            move = trial % 2 == 1
+            snapshot = MonkeySnapshot(_feed(rng, rng.choice([1, 40, 400])), 1)
+            snapshot.warm()
+            for version in range(2, 5):
+                changes = MonkeyDiff.compute(snapshot.monkeys, _churn(rng, snapshot.monkeys, 0.1, move))
+                self.assertIsNotNone(changes)
+                snapshot = MonkeySnapshot(changes.monkeys, version, previous=snapshot, changes=changes)
+                snapshot.warm()
+                with self.subTest(trial=trial, version=version, move=move):
+                    self.assert_same_as_rebuild(snapshot, rng)
+
+    def test_emptied_and_refilled_feed_matches_a_full_rebuild(self):
+        rng = random.Random(8)
+        snapshot = MonkeySnapshot(_feed(rng, 30), 1)
+        snapshot.warm()
+        for version, feed in ((2, []), (3, _feed(rng, 30))):
+            changes = MonkeyDiff.compute(snapshot.monkeys, feed)
+            snapshot = MonkeySnapshot(changes.monkeys, version, previous=snapshot, changes=changes)
+            snapshot.warm()
+            self.assert_same_as_rebuild(snapshot, rng)
+
+
+if __name__ == "__main__":
+    unittest.main()
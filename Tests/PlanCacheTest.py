@@ -0,0 +1,87 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from Helpers.PlanCache import PlanCache, normalize_input
+
+plan = {"tool_name": "get_monkeys_filtered", "arguments": {"fields": ["Name"], "sort_by": "Population"}}
+
+
+class PlanCacheTest(unittest.TestCase):
+    """Plans are reused across trivially different messages, expire, and survive in the shared SQLite tier"""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "plans.sqlite")
+
+    def tearDown(self):
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_trivially_different_messages_share_a_plan(self):
+        self.assertEqual(normalize_input("  Show   me the Monkeys!! "), "show me the monkeys")
+        cache = PlanCache("fingerprint", db_path=None)
+        cache.put("Show me the monkeys", plan)
+        self.assertEqual(cache.get("show  me the MONKEYS?"), plan)
+        self.assertIsNone(cache.get("show me the apes"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_plans_are_evicted(self):
+        cache = PlanCache("fingerprint", max_size=2, db_path=None)
+        cache.put("a", plan)
+        cache.put("b", plan)
+        cache.get("a")
+        cache.put("c", plan)
+        self.assertEqual([cache.get(key) is not None for key in ("a", "b", "c")], [True, False, True])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_plans_expire(self):
+        cache = PlanCache("fingerprint", ttl_seconds=60, db_path=self.db_path)
+        with patch("Helpers.PlanCache.time.time", return_value=1000.0):
+            cache.put("a", plan)
+        with patch("Helpers.PlanCache.time.time", return_value=1061.0):
+            self.assertIsNone(cache.get("a"))
+        # Both tiers dropped the plan
+        self.assertEqual(cache.expirations, 2)
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_shared_tier_serves_other_workers_until_the_tool_set_changes(self):
+        PlanCache("fingerprint", db_path=self.db_path).put("a", plan)
+
+        follower = PlanCache("fingerprint", db_path=self.db_path)
+        self.assertEqual(follower.get("a"), plan)
+        self.assertEqual(follower.disk_hits, 1)
+
+        self.assertIsNone(PlanCache("new fingerprint", db_path=self.db_path).get("a"))
+        self.assertIsNone(PlanCache("fingerprint", db_path=self.db_path).get("a"))
+
+    def test_invalidate_clears_both_tiers(self):
+        cache = PlanCache("fingerprint", db_path=self.db_path)
+        cache.put("a", plan)
+        cache.invalidate("new fingerprint")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["fingerprint"], "new fingerprint")
+
+    def test_locked_database_degrades_to_the_memory_tier(self):
+        cache = PlanCache("fingerprint", db_path=self.db_path)
+        cache._db.execute("PRAGMA busy_timeout = 10")
+        other = sqlite3.connect(self.db_path)
+        other.execute("BEGIN EXCLUSIVE")
+        try:
+            cache.put("a", plan)
+            cache.invalidate()
+            cache.put("b", plan)
+            self.assertEqual(cache.get("b"), plan)
+        finally:
+            other.rollback()
+            other.close()
+        cache.put("c", plan)
+        self.assertEqual(PlanCache("fingerprint", db_path=self.db_path).get("c"), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import json
+import logging
+import unittest
+
+from Agents.GeminiClient import GeminiClient
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Benchmarks.FakeServers import start_fake_gemini, start_fake_monkeys
+from Globals.Constants import available_fields
+from Helpers.IntentRouter import IntentRouter
+from Helpers.QueryPlanner import QueryPlanner
+from Helpers.WordCorrection import FuzzyCorrector
+from Services.MonkeyService import MonkeyService
+from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeyTools import MonkeyTools
+
+monkeys = [{"Name": "Baboon", "Location": "Africa", "Details": "Big", "Image": "", "Population": 10000,
+            "Latitude": -8.78, "Longitude": 34.5},
+           {"Name": "Mandrill", "Location": "Cameroon", "Details": "Colourful", "Image": "", "Population": 2000,
+            "Latitude": 3.85, "Longitude": 11.5}]
+
+
+class QueryPlannerMalformedArgumentsTest(unittest.TestCase):
+    """Plans whose optional arguments have the wrong shape are repaired rather than rejected by the tool schema"""
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.CRITICAL)
+        cls.plan = {}
+        cls.gemini = start_fake_gemini(latency=0, responder=lambda prompt: json.dumps(cls.plan))
+        cls.monkeys = start_fake_monkeys(monkeys)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.gemini.stop()
+        cls.monkeys.stop()
+        logging.disable(logging.NOTSET)
+
+    def plan_and_execute(self, arguments: dict):
+        type(self).plan = {"tool_name": "get_monkeys_filtered", "arguments": arguments}
+        planner = QueryPlanner(GeminiClient(GeminiClientOptions(api_url=self.gemini.url, api_key="")), IntentRouter(),
+                               FuzzyCorrector(available_fields))
+        tools = MonkeyTools(MonkeyService(MonkeyServiceOptions(self.monkeys.url, snapshot_path="")))
+
+        async def run():
+            plan = await planner.plan("primates please, the usual way")
+            return plan, await tools.execute_tool(plan["tool_name"], plan["arguments"])
+
+        plan, result = asyncio.run(run())
+        return plan["arguments"], json.loads(result.to_json_bytes())
+
+    def test_scalar_fields_are_wrapped_in_a_list(self):
+        arguments, rows = self.plan_and_execute({"fields": "Name"})
+        self.assertEqual(arguments["fields"], ["Name"])
+        self.assertEqual(rows, [{"Name": "Baboon"}, {"Name": "Mandrill"}])
+
+    def test_null_fields_and_sort_order_return_every_field_ascending(self):
+        _, rows = self.plan_and_execute({"fields": None, "sort_by": "Population", "sort_order": None})
+        self.assertEqual([row["Name"] for row in rows], ["Mandrill", "Baboon"])
+        self.assertEqual(set(rows[0]), set(available_fields.values()))
+
+    def test_wrongly_typed_optional_arguments_are_dropped(self):
+        arguments, rows = self.plan_and_execute({"fields": 3, "sort_by": ["Name"], "sort_order": 1, "filters": "all"})
+        self.assertEqual(arguments, {})
+        self.assertEqual(len(rows), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import unittest
+
+from Benchmarks.FakeServers import start_fake_monkeys
+from Models.Monkey import Monkey
+from Services.MonkeyService import MonkeyService
+from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeySnapshot import MonkeySnapshot
+from Services.MonkeyTable import table_fields
+from Services.SnapshotStore import SnapshotStore
+
+
+def _monkeys(rng: random.Random, count: int) -> list:
+    return [Monkey(f"Monkey {i} ü", rng.choice(["Borneo", "Peru", None]), rng.choice(["", "Long tail", None]),
+                   f"https://example.org/{i}.jpg", rng.choice([rng.randint(0, 10 ** 9), None]),
+                   rng.choice([rng.uniform(-90, 90), None]), rng.uniform(-180, 180))
+            for i in range(count)]
+
+
+class SnapshotStoreTest(unittest.TestCase):
+    """A stored snapshot restores the same rows and sort order, and a snapshot that cannot be stored is skipped"""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "monkeys.snapshot")
+        self.store = SnapshotStore(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_round_trip_restores_rows_and_orders(self):
+        monkeys = _monkeys(random.Random(15), 300)
+        snapshot = MonkeySnapshot(monkeys, 7)
+        self.store.save(snapshot, '"etag"', "Mon, 01 Jan 2024 00:00:00 GMT")
+
+        restored, table, header = self.store.load()
+        self.assertEqual([monkey.to_dict() for monkey in restored], [monkey.to_dict() for monkey in monkeys])
+        self.assertEqual((header["version"], header["etag"], header["last_modified"]),
+                         (7, '"etag"', "Mon, 01 Jan 2024 00:00:00 GMT"))
+        for field in table_fields:
+            for descending in (False, True):
+                with self.subTest(field=field, descending=descending):
+                    self.assertEqual(list(table.order(field, descending)),
+                                     list(snapshot.table.order(field, descending)))
+
+    def test_empty_snapshot_round_trips(self):
+        self.store.save(MonkeySnapshot([], 1), None, None)
+        restored, table, header = self.store.load()
+        self.assertEqual((restored, table.size, header["version"]), ([], 0, 1))
+
+    def test_unencodable_text_keeps_the_previous_file(self):
+        self.store.save(MonkeySnapshot(_monkeys(random.Random(1), 3), 1), None, None)
+        identity = self.store.identity()
+
+        self.store.save(MonkeySnapshot([Monkey("Lone \ud800", "", "", "", 1, 0.0, 0.0)], 2), None, None)
+        self.assertEqual(self.store.identity(), identity)
+        self.assertEqual(self.store.load()[2]["version"], 1)
+        self.assertEqual(os.listdir(self.directory.name), ["monkeys.snapshot"])
+
+    def test_unwritable_location_is_skipped(self):
+        store = SnapshotStore(os.path.join(self.directory.name, "missing", "monkeys.snapshot"))
+        store.save(MonkeySnapshot(_monkeys(random.Random(2), 3), 1), None, None)
+        self.assertIsNone(store.load())
+
+    def test_unreadable_files_are_ignored(self):
+        self.assertIsNone(self.store.load())
+        with open(self.path, "wb") as snapshot_file:
+            snapshot_file.write(b"not a snapshot")
+        self.assertIsNone(self.store.load())
+
+
+class MonkeyServicePersistenceTest(unittest.TestCase):
+    """Failing to store a loaded feed is not a failed feed load"""
+
+    def test_unstorable_feed_still_counts_as_loaded(self):
+        logging.disable(logging.CRITICAL)
+        feed = start_fake_monkeys([{"Name": "Lone \ud800", "Location": "Borneo", "Details": "", "Image": "",
+                                    "Population": 1, "Latitude": 0.0, "Longitude": 0.0}])
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                service = MonkeyService(MonkeyServiceOptions(feed.url, os.path.join(directory, "monkeys.snapshot")))
+                monkeys = asyncio.run(service.get_monkeys_async())
+                self.assertEqual([monkey.Name for monkey in monkeys], ["Lone \ud800"])
+                self.assertFalse(service._is_cache_expired())
+                self.assertEqual(os.listdir(directory), [])
+        finally:
+            feed.stop()
+            logging.disable(logging.NOTSET)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,31 +1,119 @@
 import asyncio
 import json
 import logging
+import math
+import os
+from typing import Optional
 
-from flask import Flask, request
+from flask import Flask, Response, request
 from flask_restx import Api, Resource, fields
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from Agents.GeminiClient import GeminiClient
+from Agents.GeminiClientOptions import GeminiClientOptions
+from Agents.GeminiOverloadedException import GeminiOverloadedException
+from Agents.GeminiUnavailableException import GeminiUnavailableException
+from Agents.McpJsonRpc import McpJsonRpc, PARSE_ERROR, INTERNAL_ERROR, error_response
 from Agents.McpServer import McpServer
 from Globals.Constants import Monkeys_Url, available_fields, Swagger_Version, Swagger_Title, Swagger_Description, \
-    Swagger_Doc, Swagger_Prefix, CHAT_NS
-from Helpers.ExtractQueryInfo import extract_query_info
-from Helpers.WordCorrection import correct_typos_with_gemini
+    Swagger_Doc, Swagger_Prefix, CHAT_NS, MCP_NS, SERVING_MODE, CHAT_REQUEST_TIMEOUT, SNAPSHOT_PATH, \
+    CHAT_BATCH_MAX_MESSAGES, CHAT_BATCH_CONCURRENCY, CHAT_BATCH_TIMEOUT, MCP_REQUEST_TIMEOUT, SHARED_STATE_DIR, \
+    PLAN_CACHE_DB, RESPONSE_CACHE_MAX_BYTES, SHARED_RESPONSE_CACHE_MEMORY_BYTES, RATE_LIMIT_PER_SECOND, \
+    RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS, TRUSTED_PROXY_HOPS
+from Helpers.EventLoopRunner import EventLoopRunner
+from Helpers.ExtractQueryInfo import TOOL_DESCRIPTIONS
+from Helpers.IntentRouter import IntentRouter
+from Helpers.Metrics import metrics, render_stats
+from Helpers.PlanCache import PlanCache, normalize_input, plan_fingerprint
+from Helpers.QueryPlanner import QueryPlanner
+from Helpers.RateLimiter import RateLimiter
+from Helpers.WordCorrection import FuzzyCorrector
+from Services.ChangeImpact import ChangeImpact
 from Services.MonkeyService import MonkeyService
 from Services.MonkeyServiceOptions import MonkeyServiceOptions
+from Services.MonkeySnapshot import MonkeySnapshot
+from Models.ToolResult import RowSetResult, encode_json
+from Services.MonkeyTools import pageable_tools
+from Services.ResponseCache import ResponseCache, cacheable_tools, encode_response, encode_result
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-
-def create_app():
-    monkey_service_options = MonkeyServiceOptions(api_url=Monkeys_Url)
+chat_stage_seconds = metrics.histogram("chat_stage_seconds", "Time spent in each stage of a chat request", ["stage"])
+_request_span = chat_stage_seconds.labels("request")
+_plan_span = chat_stage_seconds.labels("plan")
+_snapshot_span = chat_stage_seconds.labels("snapshot")
+_response_cache_span = chat_stage_seconds.labels("response_cache")
+_tool_span = chat_stage_seconds.labels("tool")
+_encode_span = chat_stage_seconds.labels("encode")
+out_of_context_responses = metrics.counter("chat_out_of_context_total",
+                                           "Chat requests answered with 'Request Is Out Of Context'")
+rate_limited_requests = metrics.counter("chat_rate_limited_total", "Chat requests refused by a client's rate limit")
+overloaded_requests = metrics.counter("chat_overloaded_total",
+                                      "Chat requests shed because the Gemini in-flight cap and queue were full")
+
+
+def client_address() -> str:
+    """The originating client of the current request, as seen by the outermost trusted proxy, else the peer address"""
+    return request.remote_addr
+
+
+def retry_later(status: int, message: str, retry_after: float) -> Response:
+    """Error response telling the client how many whole seconds to wait before trying again"""
+    return Response(encode_json({"message": message}), status=status, mimetype="application/json",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+def run_on_new_loop(coroutine):
+    """Run a coroutine on a throwaway event loop, as the sync serving mode does for every request"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def create_app(monkeys_url: str = Monkeys_Url, gemini_options: Optional[GeminiClientOptions] = None,
+               serving_mode: str = SERVING_MODE, snapshot_path: str = SNAPSHOT_PATH,
+               shared_state_dir: str = SHARED_STATE_DIR, rate_limiter: Optional[RateLimiter] = None,
+               trusted_proxy_hops: int = TRUSTED_PROXY_HOPS):
+    plan_cache_db = PLAN_CACHE_DB
+    response_cache = ResponseCache()
+    if shared_state_dir:
+        # Worker processes on one host elect a single feed loader and share its snapshot file and both caches
+        os.makedirs(shared_state_dir, exist_ok=True)
+        monkey_service_options = MonkeyServiceOptions(
+            api_url=monkeys_url, snapshot_path=snapshot_path or os.path.join(shared_state_dir, "monkeys.snapshot"),
+            loader_lock_path=os.path.join(shared_state_dir, "monkeys.lock"))
+        plan_cache_db = plan_cache_db or os.path.join(shared_state_dir, "plans.sqlite")
+        response_cache = ResponseCache(SHARED_RESPONSE_CACHE_MEMORY_BYTES,
+                                       os.path.join(shared_state_dir, "responses.sqlite"), RESPONSE_CACHE_MAX_BYTES)
+    else:
+        monkey_service_options = MonkeyServiceOptions(api_url=monkeys_url, snapshot_path=snapshot_path)
 
     monkey_service = MonkeyService(monkey_service_options)
     mcp_server = McpServer(monkey_service)
-    gemini_client = GeminiClient()
+    mcp_rpc = McpJsonRpc(mcp_server)
+    gemini_client = GeminiClient(gemini_options)
+    intent_router = IntentRouter()
+    field_corrector = FuzzyCorrector(available_fields)
+    plan_cache = PlanCache(plan_fingerprint(TOOL_DESCRIPTIONS, available_fields), db_path=plan_cache_db)
+    query_planner = QueryPlanner(gemini_client, intent_router, field_corrector, plan_cache)
+
+    def on_snapshot(snapshot: MonkeySnapshot):
+        # Cached responses the changed rows cannot alter stay valid for the new version
+        impact = ChangeImpact.of(snapshot)
+        response_cache.invalidate(snapshot.version, snapshot.previous_version, impact.affects if impact else None)
+
+    monkey_service.add_snapshot_listener(on_snapshot)
+    loop_runner = EventLoopRunner()
+    rate_limiter = rate_limiter or RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS)
 
     application = Flask(__name__)
+    if trusted_proxy_hops > 0:
+        # Only the X-Forwarded-For hops our own proxies appended are trusted; the ones before them are client-supplied
+        application.wsgi_app = ProxyFix(application.wsgi_app, x_for=trusted_proxy_hops)
 
     api = Api(
         application,
@@ -37,29 +125,135 @@ def create_app():
     )
 
     api.add_namespace(CHAT_NS, path='/chat')
+    api.add_namespace(MCP_NS, path='/mcp')
 
     error_model = api.model('Error', {
         'error': fields.String(required=True, description='Error message')
     })
 
     chat_request = api.model('ChatRequest', {
-        'message': fields.String(required=True, description='User message for chat')
+        'message': fields.String(required=True, description='User message for chat'),
+        'limit': fields.Integer(description='Page size for monkey listings'),
+        'cursor': fields.String(description='Cursor from a previous page of the same listing'),
+        'stream': fields.Boolean(description='Stream monkey listings as newline-delimited JSON')
     })
 
     chat_response = api.model('ChatResponse', {
         'response': fields.Raw(description='Chat response (can be text or JSON)')
     })
 
+    chat_batch_request = api.model('ChatBatchRequest', {
+        'messages': fields.List(fields.String, required=True, description='User messages, answered in order')
+    })
+
+    chat_batch_response = api.model('ChatBatchResponse', {
+        'results': fields.List(fields.Raw, description="One {'response': ...} or {'error': ...} per message")
+    })
+
+    def run_async(coroutine, timeout: float):
+        """Run a request's coroutine the way the configured serving mode does"""
+        if serving_mode == "async":
+            return loop_runner.run(coroutine, timeout)
+        return run_on_new_loop(coroutine)
+
+    async def chat(user_input: str, page: Optional[dict] = None, stream: bool = False) -> dict:
+        """Plan a chat message and run the selected tool"""
+        with _plan_span.time():
+            plan = await query_planner.plan(user_input, monkey_service.get_cached_monkeys())
+        tool_name = plan.get("tool_name")
+        arguments = plan.get("arguments", {})
+
+        if tool_name == "chat" and arguments.get("message") == "Request Is Out Of Context":
+            out_of_context_responses.inc()
+            return {"response": encode_response("Request Is Out Of Context")}
+
+        if page and tool_name in pageable_tools:
+            arguments = {**arguments, **page}
+
+        cache_key = None
+        if tool_name in cacheable_tools and not stream:
+            with _snapshot_span.time():
+                snapshot = await monkey_service.get_snapshot_async()
+            with _response_cache_span.time():
+                cache_key = response_cache.key(tool_name, arguments, snapshot.version)
+                cached_response = response_cache.get(cache_key)
+            if cached_response is not None:
+                return {"response": cached_response}
+
+        with _tool_span.time():
+            result = await mcp_server.call_tool(tool_name, arguments)
+
+        if isinstance(result, dict) and "error" in result:
+            return result
+
+        if stream and isinstance(result["result"], RowSetResult):
+            return {"stream": result["result"]}
+
+        with _encode_span.time():
+            encoded = encode_result(result["result"])
+        response_cache.put(cache_key, encoded)
+        return {"response": encoded}
+
+    async def chat_batch(messages: list) -> list:
+        """Answer each distinct message once, at most CHAT_BATCH_CONCURRENCY at a time, in request order"""
+        semaphore = asyncio.Semaphore(CHAT_BATCH_CONCURRENCY)
+
+        async def answer(user_input) -> dict:
+            if not isinstance(user_input, str) or not user_input:
+                return {"error": {"message": "Message is required"}}
+            async with semaphore:
+                try:
+                    return await chat(user_input)
+                except GeminiUnavailableException:
+                    return {"error": {"message": "The planning service is unavailable; please try again shortly"}}
+                except Exception as e:
+                    logger.error(f"Error in chat batch item: {e}")
+                    return {"error": {"message": "An error occurred while processing this message"}}
+
+        def batch_key(message) -> str:
+            return normalize_input(message) if isinstance(message, str) else repr(message)
+
+        distinct = {}
+        for message in messages:
+            distinct.setdefault(batch_key(message), message)
+        answers = dict(zip(distinct, await asyncio.gather(*(answer(message) for message in distinct.values()))))
+        logger.info(f"Answered a batch of {len(messages)} messages ({len(distinct)} distinct)")
+        return [answers[batch_key(message)] for message in messages]
+
+    @application.route('/metrics')
+    def prometheus_metrics():
+        """Prometheus text exposition of this process's metrics"""
+        body = metrics.render() + render_stats("intent_router", intent_router.stats.snapshot()) \
+            + render_stats("plan_cache", plan_cache.stats()) + render_stats("response_cache", response_cache.stats())
+        return Response(body, mimetype="text/plain; version=0.0.4")
+
+    @CHAT_NS.route('/stats')
+    class ChatStats(Resource):
+        def get(self):
+            """Get planning statistics"""
+            return {
+                "intent_router": intent_router.stats.snapshot(),
+                "plan_cache": plan_cache.stats(),
+                "response_cache": response_cache.stats()
+            }
+
     @CHAT_NS.route('/')
     class Chat(Resource):
         @CHAT_NS.expect(chat_request)
-        @CHAT_NS.marshal_with(chat_response)
+        @CHAT_NS.response(200, 'Success (newline-delimited JSON rows when streaming)', chat_response)
+        @CHAT_NS.response(304, 'Not Modified')
         @CHAT_NS.response(400, 'Bad Request', error_model)
+        @CHAT_NS.response(429, 'Too Many Requests from this client (see Retry-After)', error_model)
         @CHAT_NS.response(500, 'Internal Server Error', error_model)
+        @CHAT_NS.response(503, 'Planning Service Unavailable or Overloaded (see Retry-After)', error_model)
         def post(self):
-            ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+            ip = client_address()
             logger.info(f"Received request from IP: {ip}")
-            print(f"Received request from IP: {ip}")
+
+            retry_after = rate_limiter.acquire(ip)
+            if retry_after:
+                rate_limited_requests.inc()
+                return retry_later(429, "Too many requests; please slow down", retry_after)
 
             data = request.get_json()
 
@@ -68,66 +262,103 @@ def create_app():
             if not user_input:
                 api.abort(400, "Message is required")
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            page = {key: data[key] for key in ("limit", "cursor") if data.get(key) is not None}
+            stream = bool(data.get("stream"))
 
             try:
-                query_info = loop.run_until_complete(extract_query_info(user_input, gemini_client))
-                tool_name = query_info.get("tool_name")
-                arguments = query_info.get("arguments", {})
-
-                if tool_name == "chat" and arguments.get("message") == "Request Is Out Of Context":
-                    return {"response": "Request Is Out Of Context"}
-
-                possible_fields = list(arguments.keys())
-                corrected_fields = loop.run_until_complete(
-                    correct_typos_with_gemini(gemini_client, possible_fields, available_fields)
-                )
-
-                corrected_arguments = arguments.copy()
-
-                argument_fields = arguments.get("fields")
-                if isinstance(argument_fields, list):
-                    corrected_field_names_map = loop.run_until_complete(
-                        correct_typos_with_gemini(gemini_client, argument_fields, available_fields)
-                    )
-                    filtered_fields = [
-                        corrected for original, corrected in corrected_field_names_map.items()
-                        if corrected in available_fields.values()
-                    ]
-                    corrected_arguments["fields"] = filtered_fields
-
-                if "sort_by" in arguments:
-                    sort_by = arguments["sort_by"]
-                    sort_by = next(
-                        (f for f in available_fields.values() if f.lower() == sort_by.lower()),
-                        sort_by
-                    )
-                    corrected_arguments["sort_by"] = sort_by
-
-                if "sort_order" in arguments:
-                    sort_order = arguments["sort_order"].lower()
-                    if sort_order in ["asc", "desc"]:
-                        corrected_arguments["sort_order"] = sort_order
-
-                result = loop.run_until_complete(mcp_server.call_tool(tool_name, corrected_arguments))
-
-                if isinstance(result, dict) and "error" in result:
-                    api.abort(400, result["error"].get("message", "Unknown error"))
-
-                content_text = result["content"][0]["text"]
-                try:
-                    parsed_json = json.loads(content_text)
-                    return {"response": parsed_json}
-                except json.JSONDecodeError:
-                    return {"response": content_text}
+                with _request_span.time():
+                    result = run_async(chat(user_input, page, stream), CHAT_REQUEST_TIMEOUT)
+            except GeminiOverloadedException as e:
+                overloaded_requests.inc()
+                logger.warning(f"Shedding chat request: {e}")
+                return retry_later(503, "The planning service is overloaded; please try again shortly", e.retry_after)
+            except GeminiUnavailableException as e:
+                logger.warning(f"Cannot plan chat request: {e}")
+                api.abort(503, "The planning service is unavailable; please try again shortly")
+            except Exception as e:
+                logger.error(f"Error in chat endpoint: {e}")
+                api.abort(500, "An error occurred while processing your request")
 
+            if "error" in result:
+                api.abort(400, result["error"].get("message", "Unknown error"))
+
+            if "stream" in result:
+                rows = result["stream"]
+                streamed = Response(rows.iter_ndjson(), mimetype="application/x-ndjson")
+                if rows.next_cursor:
+                    streamed.headers["X-Next-Cursor"] = rows.next_cursor
+                return streamed
+
+            encoded = result["response"]
+            if request.if_none_match.contains(encoded.etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(encoded.etag)
+                return not_modified
+
+            response = Response(encoded.body, mimetype="application/json")
+            response.set_etag(encoded.etag)
+            return response
+
+    @CHAT_NS.route('/batch')
+    class ChatBatch(Resource):
+        @CHAT_NS.expect(chat_batch_request)
+        @CHAT_NS.response(200, 'Success', chat_batch_response)
+        @CHAT_NS.response(400, 'Bad Request', error_model)
+        @CHAT_NS.response(429, 'Too Many Requests from this client (see Retry-After)', error_model)
+        @CHAT_NS.response(500, 'Internal Server Error', error_model)
+        def post(self):
+            data = request.get_json()
+            messages = data.get("messages") if isinstance(data, dict) else None
+
+            if not isinstance(messages, list) or not messages:
+                api.abort(400, "Messages must be a non-empty list")
+            if len(messages) > CHAT_BATCH_MAX_MESSAGES:
+                api.abort(400, f"A batch can hold at most {CHAT_BATCH_MAX_MESSAGES} messages")
+
+            # Every message may need planning, so a batch costs as much as sending its messages one by one
+            retry_after = rate_limiter.acquire(client_address(), len(messages))
+            if retry_after:
+                rate_limited_requests.inc()
+                return retry_later(429, "Too many requests; please slow down", retry_after)
 
+            try:
+                results = run_async(chat_batch(messages), CHAT_BATCH_TIMEOUT)
             except Exception as e:
-                logger.error(f"Error in chat endpoint: {e}")
+                logger.error(f"Error in chat batch endpoint: {e}")
                 api.abort(500, "An error occurred while processing your request")
-            finally:
-                loop.close()
+
+            items = [result["response"].body if "response" in result
+                     else encode_json({"error": result["error"].get("message", "Unknown error")})
+                     for result in results]
+            return Response(b'{"results":[' + b",".join(items) + b"]}", mimetype="application/json")
+
+    @MCP_NS.route('/')
+    class Mcp(Resource):
+        @MCP_NS.response(200, 'JSON-RPC response or batch, or an event stream of them for large results')
+        @MCP_NS.response(202, 'Accepted (notifications only)')
+        def post(self):
+            """MCP JSON-RPC endpoint: initialize, ping, tools/list and tools/call, single or batched"""
+            try:
+                payload = json.loads(request.get_data())
+            except ValueError:
+                return Response(encode_json(error_response(None, PARSE_ERROR, "Parse error")),
+                                mimetype="application/json")
+
+            try:
+                response = run_async(mcp_rpc.handle(payload), MCP_REQUEST_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error in MCP endpoint: {e}")
+                response = error_response(None, INTERNAL_ERROR, "Internal error")
+
+            if response is None:
+                return Response(status=202)
+
+            messages = response if isinstance(response, list) else [response]
+            accept = request.headers.get("Accept", "")
+            if "text/event-stream" in accept and ("application/json" not in accept or mcp_rpc.has_row_sets(messages)):
+                return Response(mcp_rpc.iter_sse(messages), mimetype="text/event-stream",
+                                headers={"Cache-Control": "no-cache"})
+            return Response(mcp_rpc.encode(response), mimetype="application/json")
 
     return application
 